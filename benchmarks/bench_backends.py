@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Compare the Summariser's inference backends on the same chunks.
+
+Each backend runs in its own process so peak resident memory is measured
+separately. Quality is the ROUGE-L F1 of each backend's summaries against
+the eager fp32 ones.
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SAMPLE = "pdfs/Share your app - Streamlit Docs.pdf"
+
+
+def rouge_l(reference, candidate):
+    reference, candidate = reference.split(), candidate.split()
+    if not reference or not candidate:
+        return float(reference == candidate)
+    previous = [0] * (len(candidate) + 1)
+    for ref_word in reference:
+        current = [0]
+        for j, word in enumerate(candidate):
+            if ref_word == word:
+                current.append(previous[j] + 1)
+            else:
+                current.append(max(previous[j + 1], current[j]))
+        previous = current
+    lcs = previous[-1]
+    if lcs == 0:
+        return 0.0
+    precision, recall = lcs / len(candidate), lcs / len(reference)
+    return 2 * precision * recall / (precision + recall)
+
+
+def run_backend(args):
+    """Worker process: summarise every chunk with one backend."""
+    from max_agent.batching import length_budget
+    from max_agent.summariser import Summariser
+
+    with open(args.chunk_file, encoding="utf-8") as f:
+        chunks = json.load(f)
+
+    start = time.perf_counter()
+    summariser = Summariser(
+        args.model, backend=args.worker, onnx_cache_dir=args.onnx_cache_dir
+    )
+    load_time = time.perf_counter() - start
+
+    budgets = [length_budget(count, 0.25, 0.45) for _, count in chunks]
+    # Warm-up run, not timed
+    summariser.generate_batch([chunks[0][0]], [budgets[0]])
+    latencies = []
+    summaries = []
+    for (text, _), budget in zip(chunks, budgets):
+        start = time.perf_counter()
+        summaries.extend(summariser.generate_batch([text], [budget]))
+        latencies.append(time.perf_counter() - start)
+
+    result = {
+        "load_time": load_time,
+        "latencies": latencies,
+        "summaries": summaries,
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("pdf", nargs="?", default=SAMPLE)
+    parser.add_argument("--model", default="facebook/bart-large-cnn")
+    parser.add_argument("--max-tokens", type=int, default=1024)
+    parser.add_argument("--chunks", type=int, default=8, help="Chunks to summarise")
+    parser.add_argument(
+        "--backends", nargs="+", default=["eager", "int8", "bf16", "onnx"]
+    )
+    parser.add_argument("--onnx-cache-dir", default="./onnx_models/")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    parser.add_argument("--chunk-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_backend(args)
+        return
+
+    from transformers import AutoTokenizer
+    from max_agent.chunker import TokenChunker
+    from max_agent.pdf_processor import PDFProcessor
+
+    text, _, _ = PDFProcessor(font_dir="./dejavu-sans/").process_pdf(
+        args.pdf, save_cleaned=False
+    )
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    max_tokens = min(args.max_tokens, tokenizer.model_max_length)
+    chunks = TokenChunker(tokenizer, max_tokens).chunk(text)[: args.chunks]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chunk_file = os.path.join(tmp, "chunks.json")
+        with open(chunk_file, "w", encoding="utf-8") as f:
+            json.dump([[chunk.text, chunk.token_count] for chunk in chunks], f)
+
+        results = {}
+        for backend in args.backends:
+            output = os.path.join(tmp, f"{backend}.json")
+            subprocess.run(
+                [
+                    sys.executable,
+                    os.path.abspath(__file__),
+                    "--worker",
+                    backend,
+                    "--output",
+                    output,
+                    "--model",
+                    args.model,
+                    "--onnx-cache-dir",
+                    args.onnx_cache_dir,
+                    "--chunk-file",
+                    chunk_file,
+                ],
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            with open(output, encoding="utf-8") as f:
+                results[backend] = json.load(f)
+
+    baseline = results.get("eager") or results[args.backends[0]]
+    base_latency = statistics.median(baseline["latencies"])
+    print(f"{len(chunks)} chunks of up to {max_tokens} tokens, model {args.model}")
+    print(
+        f"{'backend':<8}{'load':>8}{'ms/chunk':>10}{'speedup':>9}"
+        f"{'peak RSS':>11}{'RSS':>7}{'ROUGE-L':>9}"
+    )
+    for backend, result in results.items():
+        latency = statistics.median(result["latencies"])
+        quality = statistics.mean(
+            rouge_l(reference, candidate)
+            for reference, candidate in zip(baseline["summaries"], result["summaries"])
+        )
+        print(
+            f"{backend:<8}{result['load_time']:7.1f}s{latency * 1000:10.0f}"
+            f"{base_latency / latency:8.2f}x{result['peak_rss_mb']:8.0f} MB"
+            f"{result['peak_rss_mb'] / baseline['peak_rss_mb']:7.2f}{quality:9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
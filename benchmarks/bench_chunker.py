@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""Benchmark TokenChunker against the per-sentence bin_text loop."""
+
+import argparse
+import re
+import time
+
+from transformers import AutoTokenizer
+
+from max_agent.chunker import TokenChunker
+
+SAMPLE = "cleaned_texts/Share your app - Streamlit Docs_cleaned.txt"
+
+
+def per_sentence_chunks(tokenizer, text, max_tokens):
+    """The original bin_text: one tokenizer call per sentence."""
+    sentences = re.split(r"(?<=[.!?]) +", text)
+    chunks = []
+    current_chunk = ""
+    current_length = 0
+    for sentence in sentences:
+        sentence_length = tokenizer(
+            sentence, return_tensors="pt", truncation=False
+        ).input_ids.shape[1]
+        if current_length + sentence_length <= max_tokens:
+            current_chunk += " " + sentence
+            current_length += sentence_length
+        else:
+            if current_chunk:
+                chunks.append(current_chunk.strip())
+            current_chunk = sentence
+            current_length = sentence_length
+    if current_chunk:
+        chunks.append(current_chunk.strip())
+    return chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="facebook/bart-large-cnn")
+    parser.add_argument("--text", default=SAMPLE, help="Cleaned text to repeat")
+    parser.add_argument(
+        "--chars", type=int, default=1_500_000, help="Document size (~500 pages)"
+    )
+    parser.add_argument("--max-tokens", type=int, default=1024)
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    with open(args.text, encoding="utf-8") as f:
+        sample = f.read()
+    text = (sample + " ") * (args.chars // len(sample) + 1)
+    text = text[: args.chars]
+
+    start = time.perf_counter()
+    legacy = per_sentence_chunks(tokenizer, text, args.max_tokens)
+    legacy_time = time.perf_counter() - start
+
+    chunker = TokenChunker(tokenizer, args.max_tokens)
+    start = time.perf_counter()
+    chunks = chunker.chunk(text)
+    chunker_time = time.perf_counter() - start
+
+    print(f"document: {len(text):,} chars, {len(chunks)} chunks")
+    print(f"per-sentence bin_text: {legacy_time:8.3f}s")
+    print(f"TokenChunker:          {chunker_time:8.3f}s")
+    print(f"speedup:               {legacy_time / chunker_time:8.1f}x")
+    print(f"same boundaries:       {legacy == [chunk.text for chunk in chunks]}")
+
+
+if __name__ == "__main__":
+    main()
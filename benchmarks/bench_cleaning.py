@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Benchmark the text cleaning stages, reporting MB/s for each stage."""
+
+import argparse
+import re
+import time
+
+from max_agent.cleaning import (
+    CODE_PATTERNS,
+    EQUATION_PATTERNS,
+    GLUE_BOUNDARY,
+    INDENTED_CODE_PATTERN,
+)
+from max_agent.pdf_processor import PDFProcessor
+
+SAMPLE = "pdfs/Share your app - Streamlit Docs.pdf"
+
+FINAL_RULES = [
+    (r"\s+\.", "."),
+    (r"\s+,", ","),
+    (r"\s+;", ";"),
+    (r"\s+\)", ")"),
+    (r"\(\s+", "("),
+    (r":\s+", ":"),
+    (r"\s{2,}", " "),
+]
+
+
+def legacy_extract(page, code_blocks, equations):
+    """The original findall + sub loop over each pattern."""
+    for pattern in CODE_PATTERNS:
+        codes = pattern.findall(page)
+        if pattern is INDENTED_CODE_PATTERN:
+            code_blocks.extend(code[1].strip() for code in codes)
+        else:
+            code_blocks.extend(code.strip() for code in codes)
+        page = pattern.sub("", page)
+    for pattern in EQUATION_PATTERNS:
+        equations.extend(eq.strip() for eq in pattern.findall(page))
+        page = pattern.sub("", page)
+    return page
+
+
+def legacy_split(text):
+    text = re.sub(r"(?<!\n)\n(?!\n)", " ", text)
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", text)
+    text = re.sub(r"([A-Z])([A-Z][a-z])", r"\1 \2", text)
+    text = re.sub(r"([a-zA-Z])(\d)", r"\1 \2", text)
+    text = re.sub(r"(\d)([a-zA-Z])", r"\1 \2", text)
+    return text.split()
+
+
+def legacy_join(words):
+    text = re.sub(r"\s{2,}", " ", " ".join(words)).strip()
+    for pattern, replacement in FINAL_RULES:
+        text = re.sub(pattern, replacement, text)
+    return text
+
+
+def timed(function, items, rounds):
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        results = [function(item) for item in items]
+        best = min(best, time.perf_counter() - start)
+    return best, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("pdf", nargs="?", default=SAMPLE)
+    parser.add_argument(
+        "--repeat", type=int, default=20, help="Times to repeat the document's pages"
+    )
+    parser.add_argument("--rounds", type=int, default=5, help="Best of N timings")
+    args = parser.parse_args()
+
+    processor = PDFProcessor(font_dir="./dejavu-sans/")
+    cleaner = processor.cleaner
+    segmenter = processor.segmenter
+    pages = [page + "\n" for page in processor.extract_raw_text(args.pdf)]
+    pages *= args.repeat
+    size_mb = sum(len(page.encode("utf-8")) for page in pages) / 1e6
+
+    # Warm the segmentation cache so both chains pay the same for it
+    for page in pages:
+        segmenter.split_words(GLUE_BOUNDARY.sub(" ", page).split())
+
+    def legacy_page(page):
+        page = legacy_extract(page, [], [])
+        return legacy_join(segmenter.split_words(legacy_split(page)))
+
+    def engine_page(page):
+        return cleaner.clean(cleaner.extract_page(page, 0, [], []))
+
+    stripped = [cleaner.extract_page(page, 0, [], []) for page in pages]
+    split = [cleaner.split_words(page) for page in stripped]
+    stages = [
+        (
+            "code/equations",
+            lambda page: legacy_extract(page, [], []),
+            lambda page: cleaner.extract_page(page, 0, [], []),
+            pages,
+        ),
+        (
+            "glue split",
+            legacy_split,
+            lambda page: GLUE_BOUNDARY.sub(" ", page).split(),
+            stripped,
+        ),
+        (
+            "segmentation",
+            segmenter.split_words,
+            segmenter.split_words,
+            [GLUE_BOUNDARY.sub(" ", page).split() for page in stripped],
+        ),
+        ("final cleaning", legacy_join, cleaner.join_words, split),
+        ("whole engine", legacy_page, engine_page, pages),
+    ]
+
+    print(f"{len(pages)} pages, {size_mb:.2f} MB (MB/s of page text)")
+    print(f"{'stage':<16}{'legacy':>12}{'engine':>12}{'speedup':>10}  same")
+    for name, legacy, engine, items in stages:
+        legacy_time, legacy_results = timed(legacy, items, args.rounds)
+        engine_time, engine_results = timed(engine, items, args.rounds)
+        print(
+            f"{name:<16}{size_mb / legacy_time:12.2f}{size_mb / engine_time:12.2f}"
+            f"{legacy_time / engine_time:9.1f}x  {legacy_results == engine_results}"
+        )
+
+
+if __name__ == "__main__":
+    main()
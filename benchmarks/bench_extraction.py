@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Report PDFProcessor page extraction throughput against the worker count."""
+
+import argparse
+import os
+import time
+
+from max_agent.pdf_processor import PDFProcessor
+
+SAMPLE = "pdfs/Share your app - Streamlit Docs.pdf"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("pdf", nargs="?", default=SAMPLE)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=sorted({1, 2, 4, os.cpu_count() or 1}),
+        help="Worker counts to compare",
+    )
+    args = parser.parse_args()
+
+    baseline = None
+    for workers in args.workers:
+        processor = PDFProcessor(font_dir="./dejavu-sans/", extraction_workers=workers)
+        start = time.perf_counter()
+        pages = list(processor.iter_raw_pages(args.pdf))
+        elapsed = time.perf_counter() - start
+        if baseline is None:
+            baseline = pages
+        print(
+            f"workers={workers:<3} {len(pages) / elapsed:8.1f} pages/s "
+            f"({elapsed:.2f}s, same output: {pages == baseline})"
+        )
+
+
+if __name__ == "__main__":
+    main()
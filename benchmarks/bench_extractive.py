@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Measure the extractive pre-filter on a directory of PDFs.
+
+Reports model tokens and chunks before and after filtering, the time the
+filter takes and, with --summarise, the first-tier inference time saved.
+"""
+
+import argparse
+import os
+import time
+
+from transformers import AutoTokenizer
+
+from max_agent.chunker import TokenChunker
+from max_agent.extractive import ExtractiveFilter
+from max_agent.pdf_processor import PDFProcessor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("directory", nargs="?", default="pdfs")
+    parser.add_argument("--model", default="facebook/bart-large-cnn")
+    parser.add_argument("--max-tokens", type=int, default=1024)
+    parser.add_argument("--keep-ratio", type=float, default=0.6)
+    parser.add_argument("--redundancy", type=float, default=0.8)
+    parser.add_argument(
+        "--summarise", action="store_true", help="Also time first-tier inference"
+    )
+    args = parser.parse_args()
+
+    processor = PDFProcessor(font_dir="./dejavu-sans/")
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    chunker = TokenChunker(tokenizer, min(args.max_tokens, tokenizer.model_max_length))
+    extractive = ExtractiveFilter(args.keep_ratio, args.redundancy)
+    summariser = None
+    if args.summarise:
+        from max_agent.summariser import Summariser
+
+        summariser = Summariser(args.model)
+
+    def tokens(chunks):
+        return sum(chunk.token_count for chunk in chunks)
+
+    def summarise(chunks):
+        start = time.perf_counter()
+        summariser.summarise_batch(chunks, 0.25, 0.45)
+        return time.perf_counter() - start
+
+    header = f"{'document':<32}{'tokens in':>10}{'out':>8}{'kept':>7}"
+    header += f"{'chunks':>8}{'out':>5}{'filter':>9}"
+    if summariser:
+        header += f"{'infer in':>10}{'out':>8}"
+    print(header)
+    totals = [0, 0, 0.0, 0.0, 0.0]
+    for name in sorted(os.listdir(args.directory)):
+        if not name.lower().endswith(".pdf"):
+            continue
+        text, _, _ = processor.process_pdf(
+            os.path.join(args.directory, name), save_cleaned=False
+        )
+        start = time.perf_counter()
+        filtered = extractive.filter(text)
+        filter_time = time.perf_counter() - start
+        before, after = chunker.chunk(text), chunker.chunk(filtered)
+        line = (
+            f"{name[:31]:<32}{tokens(before):>10}{tokens(after):>8}"
+            f"{tokens(after) / max(tokens(before), 1):7.0%}"
+            f"{len(before):>8}{len(after):>5}{filter_time * 1000:7.1f}ms"
+        )
+        totals[0] += tokens(before)
+        totals[1] += tokens(after)
+        totals[2] += filter_time
+        if summariser:
+            infer_before, infer_after = summarise(before), summarise(after)
+            totals[3] += infer_before
+            totals[4] += infer_after
+            line += f"{infer_before:9.1f}s{infer_after:7.1f}s"
+        print(line)
+
+    line = (
+        f"{'total':<32}{totals[0]:>10}{totals[1]:>8}"
+        f"{totals[1] / max(totals[0], 1):7.0%}{'':>13}{totals[2] * 1000:7.1f}ms"
+    )
+    if summariser:
+        line += f"{totals[3]:9.1f}s{totals[4]:7.1f}s"
+    print(line)
+
+
+if __name__ == "__main__":
+    main()
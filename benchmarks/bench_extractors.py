@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Compare the page text extractors over sample PDFs.
+
+Reports pages per second and the speedup over pdfplumber, the auto
+extractor's fallback rate, and how closely each extractor's words match
+pdfplumber's (multiset overlap F1, so line order does not matter).
+"""
+
+import argparse
+import os
+import time
+from collections import Counter
+
+from max_agent.extractors import EXTRACTORS, get_extractor
+
+SAMPLE = "pdfs"
+
+
+def word_f1(reference, candidate):
+    reference, candidate = Counter(reference.split()), Counter(candidate.split())
+    overlap = sum((reference & candidate).values())
+    if not overlap:
+        return float(reference == candidate)
+    precision = overlap / sum(candidate.values())
+    recall = overlap / sum(reference.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def pdf_paths(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(".pdf"):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("paths", nargs="*", default=[SAMPLE], help="PDFs or folders")
+    parser.add_argument("--extractors", nargs="+", default=list(EXTRACTORS))
+    args = parser.parse_args()
+
+    paths = list(pdf_paths(args.paths))
+    texts = {}
+    timings = {}
+    for name in args.extractors:
+        extractor = get_extractor(name)
+        start = time.perf_counter()
+        texts[name] = {
+            path: "\n".join(text for _, text in extractor.iter_pages(path))
+            for path in paths
+        }
+        timings[name] = (time.perf_counter() - start, extractor)
+
+    reference = texts.get("pdfplumber")
+    base = timings["pdfplumber"][0] if "pdfplumber" in timings else None
+    print(f"{len(paths)} PDF(s)")
+    print(
+        f"{'extractor':<12}{'pages/s':>9}{'speedup':>9}{'fallback':>10}"
+        f"{'word F1':>9}"
+    )
+    for name, (elapsed, extractor) in timings.items():
+        speedup = f"{base / elapsed:8.1f}x" if base else f"{'-':>9}"
+        fallbacks = getattr(extractor, "fallbacks", None)
+        fallback = (
+            f"{100 * fallbacks / extractor.pages:9.1f}%"
+            if fallbacks is not None and extractor.pages
+            else f"{'-':>10}"
+        )
+        quality = (
+            sum(word_f1(reference[path], texts[name][path]) for path in paths)
+            / len(paths)
+            if reference and paths
+            else float("nan")
+        )
+        print(
+            f"{name:<12}{extractor.pages / elapsed:9.1f}{speedup}{fallback}"
+            f"{quality:9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
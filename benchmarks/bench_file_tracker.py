@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Benchmark FileTracker startup and lookups over a large processing history."""
+
+import argparse
+import os
+import tempfile
+import time
+
+from max_agent.file_tracker import FileTracker
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "state.sqlite3")
+        tracker = FileTracker(db_path, model_id="model", fingerprint="bench")
+        start = time.perf_counter()
+        tracker.connection.execute("BEGIN")
+        tracker.connection.executemany(
+            "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                (f"/pdfs/{i}.pdf", i, i, f"{i:064x}", "model", "bench", 0.0)
+                for i in range(args.entries)
+            ),
+        )
+        tracker.connection.execute("COMMIT")
+        tracker.close()
+        print(
+            f"history of {args.entries} entries written in "
+            f"{time.perf_counter() - start:.2f}s"
+        )
+
+        pdf_path = os.path.join(tmp, "sample.pdf")
+        with open(pdf_path, "wb") as f:
+            f.write(os.urandom(1024 * 1024))
+
+        start = time.perf_counter()
+        tracker = FileTracker(db_path, model_id="model", fingerprint="bench")
+        print(f"startup:            {(time.perf_counter() - start) * 1000:8.2f} ms")
+
+        start = time.perf_counter()
+        tracker.is_processed(pdf_path)
+        print(f"new file (hashed):  {(time.perf_counter() - start) * 1000:8.2f} ms")
+        tracker.mark_as_processed(pdf_path)
+
+        rounds = 1000
+        start = time.perf_counter()
+        for _ in range(rounds):
+            tracker.is_processed(pdf_path)
+        elapsed = (time.perf_counter() - start) * 1000 / rounds
+        print(f"known file (stat):  {elapsed:8.3f} ms")
+        tracker.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Measure Summariser throughput and memory against the inference worker count.
+
+Each worker count runs in its own process. Memory is the total PSS
+(proportional set size) of that process and its inference workers, so
+weights shared copy-on-write are counted once. 1 runs in-process.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+SAMPLE = "pdfs/Share your app - Streamlit Docs.pdf"
+
+
+def pss_mb(pid):
+    with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def run_workers(args):
+    """Worker process: summarise every chunk with one pool size."""
+    from max_agent.chunker import Chunk
+    from max_agent.summariser import Summariser
+
+    with open(args.chunk_file, encoding="utf-8") as f:
+        chunks = [Chunk(*chunk) for chunk in json.load(f)]
+    summariser = Summariser(args.model, batch_size=args.batch_size)
+    if args.worker > 1:
+        summariser.start_pool(args.worker, threads=args.threads)
+    pids = [os.getpid()]
+    if summariser.pool is not None:
+        pids += [process.pid for process in summariser.pool.processes]
+
+    # Warm-up run, not timed
+    summariser.summarise_batch(chunks[: args.batch_size], 0.25, 0.45)
+    start = time.perf_counter()
+    summariser.summarise_batch(chunks, 0.25, 0.45)
+    elapsed = time.perf_counter() - start
+    result = {"seconds": elapsed, "pss_mb": sum(pss_mb(pid) for pid in pids)}
+    summariser.close_pool()
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("pdf", nargs="?", default=SAMPLE)
+    parser.add_argument("--model", default="facebook/bart-large-cnn")
+    parser.add_argument("--max-tokens", type=int, default=1024)
+    parser.add_argument("--chunks", type=int, default=32, help="Chunks to summarise")
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=sorted({1, 2, 4, os.cpu_count() or 1}),
+        help="Inference worker counts to compare",
+    )
+    parser.add_argument(
+        "--threads", type=int, help="torch threads per worker (default: even split)"
+    )
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    parser.add_argument("--chunk-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_workers(args)
+        return
+
+    from transformers import AutoTokenizer
+    from max_agent.chunker import TokenChunker
+    from max_agent.pdf_processor import PDFProcessor
+
+    text, _, _ = PDFProcessor(font_dir="./dejavu-sans/").process_pdf(
+        args.pdf, save_cleaned=False
+    )
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    max_tokens = min(args.max_tokens, tokenizer.model_max_length)
+    chunks = TokenChunker(tokenizer, max_tokens).chunk(text)
+    # Repeat the document's chunks up to the requested count
+    chunks = [chunks[i % len(chunks)] for i in range(args.chunks)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chunk_file = os.path.join(tmp, "chunks.json")
+        with open(chunk_file, "w", encoding="utf-8") as f:
+            json.dump([[chunk.text, chunk.token_count] for chunk in chunks], f)
+
+        print(f"{len(chunks)} chunks of up to {max_tokens} tokens, model {args.model}")
+        print(f"{'workers':<9}{'chunks/s':>9}{'scaling':>9}{'total PSS':>12}")
+        baseline = None
+        for workers in args.workers:
+            output = os.path.join(tmp, f"{workers}.json")
+            command = [
+                sys.executable,
+                os.path.abspath(__file__),
+                "--worker",
+                str(workers),
+                "--output",
+                output,
+                "--model",
+                args.model,
+                "--batch-size",
+                str(args.batch_size),
+                "--chunk-file",
+                chunk_file,
+            ]
+            if args.threads:
+                command += ["--threads", str(args.threads)]
+            subprocess.run(
+                command,
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            with open(output, encoding="utf-8") as f:
+                result = json.load(f)
+            rate = len(chunks) / result["seconds"]
+            baseline = baseline or rate
+            print(
+                f"{workers:<9}{rate:9.2f}{rate / baseline:8.2f}x"
+                f"{result['pss_mb']:9.0f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
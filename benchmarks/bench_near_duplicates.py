@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark the near-duplicate chunk index.
+
+Fills an index with synthetic chunks, then times lookups of unseen chunks
+and of revised copies (a few words changed, as between manual revisions)
+and reports how many revisions are recognised.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from max_agent.near_duplicates import NearDuplicateIndex
+
+SCOPE = "bench"
+
+
+def chunk(rng, words):
+    return " ".join(f"w{rng.randrange(20000)}" for _ in range(words))
+
+
+def revise(rng, text, changes):
+    words = text.split()
+    for _ in range(changes):
+        words[rng.randrange(len(words))] = f"page{rng.randrange(1000)}"
+    return " ".join(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=1_000_000)
+    parser.add_argument("--words", type=int, default=300, help="Words per chunk")
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--changes", type=int, nargs="+", default=[1, 3, 10, 30])
+    parser.add_argument("--index", help="Existing index to reuse between runs")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.index or os.path.join(tmp, "near.sqlite3")
+        index = NearDuplicateIndex(path)
+        (stored,) = index.connection.execute("SELECT COUNT(*) FROM chunks").fetchone()
+        start = time.perf_counter()
+        batch = []
+        for i in range(stored, args.chunks):
+            text = chunk(rng, args.words)
+            batch.append((text, f"summary {i}"))
+            if len(batch) == 1000:
+                index.add_many(batch, SCOPE)
+                batch = []
+        if batch:
+            index.add_many(batch, SCOPE)
+        if args.chunks > stored:
+            elapsed = time.perf_counter() - start
+            print(f"indexed {args.chunks - stored} chunks in {elapsed:.1f}s")
+
+        # Chunks to look up later, indexed last
+        originals = [chunk(rng, args.words) for _ in range(args.lookups)]
+        index.add_many([(text, "original") for text in originals], SCOPE)
+        (stored,) = index.connection.execute("SELECT COUNT(*) FROM chunks").fetchone()
+        print(f"index holds {stored} chunks ({os.path.getsize(path) / 1e6:.0f} MB)")
+
+        def timed_lookups(texts):
+            times, found = [], 0
+            for text in texts:
+                start = time.perf_counter()
+                found += index.lookup(text, SCOPE) is not None
+                times.append(time.perf_counter() - start)
+            return statistics.median(times) * 1000, found / len(texts)
+
+        signing = time.perf_counter()
+        for text in originals[:100]:
+            index.signature(text)
+        signing = (time.perf_counter() - signing) * 10
+        print(f"signature of a {args.words}-word chunk: {signing:.3f} ms")
+
+        latency, found = timed_lookups(
+            [chunk(rng, args.words) for _ in range(args.lookups)]
+        )
+        print(f"unseen chunks:      {latency:.3f} ms/lookup, {found:.1%} matched")
+        for changes in args.changes:
+            revised = [revise(rng, text, changes) for text in originals]
+            latency, found = timed_lookups(revised)
+            print(
+                f"{changes:>3} word(s) changed: {latency:.3f} ms/lookup, "
+                f"{found:.1%} reused"
+            )
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Benchmark rendering a run of summaries into PDFs with PDFGenerator."""
+
+import argparse
+import os
+import tempfile
+import time
+
+from max_agent.pdf_generator import PDFGenerator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=50)
+    parser.add_argument("--words", type=int, default=1500)
+    parser.add_argument("--font-dir", default="./dejavu-sans/")
+    args = parser.parse_args()
+
+    words = "The summary describes results of the experiment in plain words".split()
+    text = "\n".join(
+        " ".join(words[(line + i) % len(words)] for i in range(15))
+        for line in range(args.words // 15)
+    )
+
+    start = time.perf_counter()
+    generator = PDFGenerator(args.font_dir)
+    print(f"font setup:     {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        times = []
+        for i in range(args.documents):
+            path = os.path.join(tmp, f"{i}.pdf")
+            start = time.perf_counter()
+            generator.add_text(text)
+            generator.save_pdf(path)
+            times.append(time.perf_counter() - start)
+        size = os.path.getsize(path)
+
+    print(f"first document: {times[0] * 1000:8.1f} ms")
+    print(f"last document:  {times[-1] * 1000:8.1f} ms ({size / 1024:.0f} KiB)")
+    print(
+        f"mean:           {sum(times) * 1000 / len(times):8.1f} ms "
+        f"over {args.documents} documents"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""Load-test the summarisation service: latency percentiles and throughput.
+
+Either point it at a running service (--url) or give --config to start
+`max-agent --serve` with that configuration, once per --max-wait-ms value,
+to compare micro-batching windows. Every request summarises a different
+slice of the sample text, so the summary cache does not answer them.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import yaml
+
+
+async def summarise(host, port, body, content_type):
+    """Return (seconds to the first chunk summary, total seconds, chunks)."""
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(
+        f"POST /summarise HTTP/1.1\r\nHost: {host}\r\n"
+        f"Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\n\r\n".encode(
+            "latin-1"
+        )
+        + body
+    )
+    await writer.drain()
+    status = await reader.readline()
+    if b" 200 " not in status:
+        raise RuntimeError(status.decode().strip())
+    while (await reader.readline()) not in (b"\r\n", b""):
+        pass
+    first_chunk = None
+    chunks = 0
+    while True:
+        size = int(await reader.readline(), 16)
+        if not size:
+            break
+        event = json.loads(await reader.readexactly(size))
+        await reader.readexactly(2)
+        if event["event"] == "chunk":
+            chunks += 1
+            if first_chunk is None:
+                first_chunk = time.perf_counter() - start
+        elif event["event"] == "error":
+            raise RuntimeError(event["message"])
+    writer.close()
+    return first_chunk or 0.0, time.perf_counter() - start, chunks
+
+
+def percentile(values, q):
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+async def load(host, port, bodies, content_type, concurrency):
+    queue = asyncio.Queue()
+    for body in bodies:
+        queue.put_nowait(body)
+    results = []
+
+    async def client():
+        while not queue.empty():
+            results.append(
+                await summarise(host, port, queue.get_nowait(), content_type)
+            )
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return results, time.perf_counter() - start
+
+
+def report(label, concurrency, results, elapsed):
+    first = [result[0] for result in results]
+    total = [result[1] for result in results]
+    chunks = sum(result[2] for result in results)
+    print(
+        f"{label:>10} {concurrency:>5} {len(results):>5} "
+        f"{percentile(first, 50) * 1000:>9.0f} {percentile(total, 50) * 1000:>9.0f} "
+        f"{percentile(total, 99) * 1000:>9.0f} {len(results) / elapsed:>8.2f} "
+        f"{chunks / elapsed:>9.1f}"
+    )
+
+
+def wait_for(url, process, timeout=600):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("The service exited during startup.")
+        try:
+            urllib.request.urlopen(f"{url}/health", timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError("The service did not start in time.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--config", help="start a service with this config")
+    parser.add_argument("--max-wait-ms", type=float, nargs="+", default=[None])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--words", type=int, default=300)
+    parser.add_argument(
+        "--text",
+        default="cleaned_texts/Share your app - Streamlit Docs_cleaned.txt",
+        help="text to take request bodies from",
+    )
+    parser.add_argument("--pdf", help="send this PDF in every request instead")
+    args = parser.parse_args()
+
+    host, port = args.url.split("://")[-1].rsplit(":", 1)
+    port = int(port)
+    if args.pdf:
+        with open(args.pdf, "rb") as f:
+            pdf = f.read()
+        content_type = "application/pdf"
+    else:
+        with open(args.text, encoding="utf-8") as f:
+            words = f.read().split()
+        content_type = "text/plain"
+    rng = random.Random(0)
+
+    def bodies():
+        if args.pdf:
+            return [pdf] * args.requests
+        result = []
+        for _ in range(args.requests):
+            # Shuffled slices, so no two requests share chunks
+            piece = words[: args.words * 4]
+            rng.shuffle(piece)
+            result.append(" ".join(piece[: args.words]).encode("utf-8"))
+        return result
+
+    print(
+        f"{'max wait':>10} {'conc':>5} {'reqs':>5} {'first p50':>9} "
+        f"{'p50 ms':>9} {'p99 ms':>9} {'req/s':>8} {'chunks/s':>9}"
+    )
+    for max_wait in args.max_wait_ms:
+        process = None
+        label = "server" if max_wait is None else f"{max_wait:g} ms"
+        if args.config:
+            with open(args.config) as f:
+                config = yaml.safe_load(f)
+            if max_wait is not None:
+                config["service_max_wait_ms"] = max_wait
+            config_file = tempfile.NamedTemporaryFile("w", suffix=".yaml", delete=False)
+            with config_file:
+                yaml.safe_dump(config, config_file)
+            process = subprocess.Popen(
+                [
+                    sys.executable,
+                    "-m",
+                    "max_agent.cli",
+                    "--config",
+                    config_file.name,
+                    "--serve",
+                    "--port",
+                    str(port),
+                    "--log-level",
+                    "WARNING",
+                ],
+                stdout=subprocess.DEVNULL,
+            )
+        try:
+            if process is not None:
+                wait_for(f"http://{host}:{port}", process)
+            for concurrency in args.concurrency:
+                results, elapsed = asyncio.run(
+                    load(host, port, bodies(), content_type, concurrency)
+                )
+                report(label, concurrency, results, elapsed)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+                os.unlink(config_file.name)
+
+
+if __name__ == "__main__":
+    main()
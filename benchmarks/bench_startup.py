@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Benchmark CLI startup: package import, --version and a run with no new PDFs."""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def wall_times(command, runs, cwd):
+    env = dict(os.environ, PYTHONPATH=SRC)
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            command,
+            cwd=cwd,
+            env=env,
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, "pdfs"))
+        config_file = os.path.join(tmp, "config.yaml")
+        with open(config_file, "w") as f:
+            f.write(
+                f'input_directory: "{tmp}/pdfs/"\n'
+                f'output_directory: "{tmp}/out/"\n'
+                f'cleaned_text_directory: "{tmp}/clean/"\n'
+                f'processed_files_db: "{tmp}/processed.sqlite3"\n'
+                f'log_file: "{tmp}/app.log"\n'
+            )
+
+        cli = [sys.executable, "-m", "max_agent.cli"]
+        commands = [
+            ("python startup", [sys.executable, "-c", "pass"]),
+            ("import max_agent", [sys.executable, "-c", "import max_agent"]),
+            ("max-agent --version", cli + ["--version"]),
+            ("empty directory run", cli + ["--config", config_file]),
+        ]
+        print(f"{'command':<22}{'median':>10}{'min':>10}")
+        for name, command in commands:
+            times = wall_times(command, args.runs, cwd=tmp)
+            print(
+                f"{name:<22}{statistics.median(times) * 1000:8.0f}ms"
+                f"{min(times) * 1000:8.0f}ms"
+            )
+
+        # Modules that must not be imported when there is nothing to do
+        check = (
+            "import sys\n"
+            f"sys.argv = ['max-agent', '--config', {config_file!r}]\n"
+            "from max_agent import cli\n"
+            "try:\n    cli.main()\nexcept SystemExit:\n    pass\n"
+            "heavy = ['torch', 'transformers', 'pdfplumber', 'fpdf']\n"
+            "print(', '.join(m for m in heavy if m in sys.modules) or 'none')\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", check],
+            cwd=tmp,
+            env=dict(os.environ, PYTHONPATH=SRC),
+            capture_output=True,
+            text=True,
+        )
+        print(
+            "heavy modules loaded by the empty run: "
+            f"{result.stdout.splitlines()[-1]}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""Reproducible benchmark suite: every stage alone and end to end.
+
+`run` writes the synthetic corpus (synthetic.py) and builds a tiny random
+stand-in for bart-large-cnn (tiny_model.py), both offline and identical on
+every machine. It then times PDFProcessor.process_pdf, bin_text,
+Summariser.summarise, PDFGenerator and the whole of process_pdf for each
+document, with the caches off, and saves the results as JSON. `compare`
+checks results against a baseline and exits with status 1 when a
+benchmark got slower by more than --threshold. On shared virtual machines
+the timings of two identical runs can differ by 20-30%; raise --repeat
+and --threshold there.
+
+    python benchmarks/bench_suite.py run --output bench_results.json
+    python benchmarks/bench_suite.py compare bench_results.json
+    python benchmarks/bench_suite.py run --output benchmarks/baselines/reference.json
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import yaml
+
+from synthetic import CORPUS, write_corpus
+from tiny_model import build_tiny_model
+
+DEFAULT_BASELINE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baselines", "reference.json"
+)
+
+
+def environment():
+    import torch
+    import transformers
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "torch": torch.__version__,
+        "torch_threads": torch.get_num_threads(),
+        "transformers": transformers.__version__,
+    }
+
+
+def make_app(workdir, corpus_dir, model, font_dir):
+    """A PDFSummariserApp reading the corpus, with every cache turned off."""
+    from max_agent.pdf_summariser_app import PDFSummariserApp
+
+    config = {
+        "input_directory": corpus_dir,
+        "output_directory": os.path.join(workdir, "out"),
+        "cleaned_text_directory": os.path.join(workdir, "cleaned"),
+        "font_directory": font_dir,
+        "processed_files_db": os.path.join(workdir, "processed.sqlite3"),
+        "processed_files_log": os.path.join(workdir, "processed.txt"),
+        "log_file": os.path.join(workdir, "bench.log"),
+        "summarization_model_id": model,
+        "raw_page_cache_path": None,
+        "summary_cache_path": None,
+        "checkpoint_directory": None,
+        "chunk_store": False,
+    }
+    config_file = os.path.join(workdir, "config.yaml")
+    with open(config_file, "w") as f:
+        yaml.safe_dump(config, f)
+    app = PDFSummariserApp(config_file)
+    # The app logs every step to the console
+    logging.disable(logging.WARNING)
+    return app
+
+
+def measure(function, repeat, min_seconds=0.2):
+    """
+    Run ``function`` once to warm up, then time it ``repeat`` times. Each
+    run calls it until ``min_seconds`` have passed, so fast stages are not
+    timed from a single call, and records the mean time per call.
+    """
+    result = function()
+    runs = []
+    for _ in range(repeat):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            function()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_seconds:
+                break
+        runs.append(elapsed / calls)
+    return result, timing(runs)
+
+
+def timing(runs):
+    return {
+        "median": statistics.median(runs),
+        "min": min(runs),
+        "runs": [round(run, 6) for run in runs],
+    }
+
+
+def bench_document(name, path, digest, model, font_dir, repeat):
+    """
+    Benchmark one document with a fresh app. Runs in a process of its own,
+    so its timings do not depend on the documents benchmarked before it.
+    """
+    with tempfile.TemporaryDirectory() as workdir:
+        app = make_app(workdir, os.path.dirname(path), model, font_dir)
+        setup = {}
+        start = time.perf_counter()
+        app.pdf_processor
+        setup["setup/pdf_processor"] = time.perf_counter() - start
+        start = time.perf_counter()
+        app.summariser
+        setup["setup/summariser"] = time.perf_counter() - start
+        results, work = bench_stages(app, name, path, repeat)
+    work["pdf"] = digest
+    return setup, results, work
+
+
+def bench_stages(app, name, path, repeat):
+    config = app.config
+    results = {}
+    output_path = os.path.join(config.output_directory, f"{name}_render.pdf")
+
+    def process_pdf():
+        return app.pdf_processor.process_pdf(pdf_path=path, save_cleaned=False)
+
+    (text, code_blocks, equations), results[f"process_pdf/{name}"] = measure(
+        process_pdf, repeat
+    )
+    chunks, results[f"bin_text/{name}"] = measure(lambda: app.bin_text(text), repeat)
+
+    def summarise():
+        return app.summariser.summarise(
+            chunks,
+            config.first_min_ratio,
+            config.first_max_ratio,
+            config.second_min_ratio,
+            config.second_max_ratio,
+        )
+
+    summary, results[f"summarise/{name}"] = measure(summarise, repeat)
+    final_text = app.reintegrate_code_equations(summary, code_blocks, equations)
+
+    def render():
+        app.pdf_generator.add_text(final_text)
+        app.pdf_generator.save_pdf(output_path)
+
+    _, results[f"render/{name}"] = measure(render, repeat)
+    _, results[f"end_to_end/{name}"] = measure(
+        lambda: app.process_pdf(os.path.basename(path)), repeat
+    )
+    # What the stages worked on; a change here means the timings are not
+    # comparable, rather than a regression
+    work = {
+        "words": len(text.split()),
+        "code_blocks": len(code_blocks),
+        "equations": len(equations),
+        "chunks": len(chunks),
+        "tokens_in": sum(chunk.token_count for chunk in chunks),
+        "summary_words": len(summary.split()),
+    }
+    return results, work
+
+
+def run(args):
+    specs = [spec for spec in CORPUS if spec.name in (args.documents or [spec.name])]
+    with tempfile.TemporaryDirectory() as workdir:
+        corpus_dir = os.path.join(workdir, "corpus")
+        paths, digests = write_corpus(corpus_dir, specs)
+        model = args.model or build_tiny_model(
+            args.model_dir or os.path.join(workdir, "tiny-bart")
+        )
+        setups = {}
+        results = {}
+        work = {}
+        context = multiprocessing.get_context("spawn")
+        for spec in specs:
+            print(f"Benchmarking {spec.name}...", file=sys.stderr)
+            with ProcessPoolExecutor(1, mp_context=context) as executor:
+                setup, document_results, work[spec.name] = executor.submit(
+                    bench_document,
+                    spec.name,
+                    paths[spec.name],
+                    digests[spec.name],
+                    model,
+                    args.font_dir,
+                    args.repeat,
+                ).result()
+            for name, seconds in setup.items():
+                setups.setdefault(name, []).append(seconds)
+            results.update(document_results)
+        # Setup is timed once per document process
+        results = {
+            **{name: timing(runs) for name, runs in setups.items()},
+            **results,
+        }
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": environment(),
+        "model": args.model or "tiny-bart",
+        "repeat": args.repeat,
+        "work": work,
+        "benchmarks": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+    print(f"{'benchmark':<24} {'median ms':>10} {'min ms':>10}")
+    for name, values in results.items():
+        print(
+            f"{name:<24} {values['median'] * 1000:10.1f} {values['min'] * 1000:10.1f}"
+        )
+    print(f"Results saved to '{args.output}'.")
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    for key in ("model", "repeat"):
+        if baseline.get(key) != current.get(key):
+            print(f"warning: {key} differs ({baseline.get(key)} vs {current.get(key)})")
+    for key, value in baseline["environment"].items():
+        if current["environment"].get(key) != value:
+            print(
+                f"warning: {key} differs "
+                f"({value} vs {current['environment'].get(key)})"
+            )
+    for name, counts in baseline["work"].items():
+        if current["work"].get(name, counts) != counts:
+            print(f"warning: the work done for '{name}' changed; not comparable")
+
+    print(f"{'benchmark':<24} {'baseline ms':>12} {'current ms':>12} {'change':>8}")
+    regressions = []
+    for name, values in current["benchmarks"].items():
+        if name not in baseline["benchmarks"]:
+            print(f"{name:<24} {'new':>12}")
+            continue
+        before = baseline["benchmarks"][name][args.statistic]
+        after = values[args.statistic]
+        change = after / before - 1 if before else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -args.threshold:
+            flag = "  faster"
+        print(
+            f"{name:<24} {before * 1000:12.1f} {after * 1000:12.1f} "
+            f"{change:+8.1%}{flag}"
+        )
+    for name in baseline["benchmarks"]:
+        if name not in current["benchmarks"]:
+            print(f"{name:<24} {'missing':>12}")
+
+    if regressions:
+        print(
+            f"{len(regressions)} benchmark(s) slower than the baseline by more "
+            f"than {args.threshold:.0%}: {', '.join(regressions)}"
+        )
+        return 1
+    print(f"No regressions beyond {args.threshold:.0%}.")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the suite and save results")
+    run_parser.add_argument("--output", default="bench_results.json")
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument(
+        "--documents",
+        nargs="+",
+        choices=[spec.name for spec in CORPUS],
+        help="benchmark only these synthetic documents",
+    )
+    run_parser.add_argument("--font-dir", default="./dejavu-sans/")
+    run_parser.add_argument(
+        "--model", help="a real model to use instead of the tiny stand-in"
+    )
+    run_parser.add_argument(
+        "--model-dir", help="keep the tiny model here instead of rebuilding it"
+    )
+
+    compare_parser = commands.add_parser(
+        "compare", help="flag regressions against a baseline"
+    )
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("baseline", nargs="?", default=DEFAULT_BASELINE)
+    compare_parser.add_argument(
+        "--threshold", type=float, default=0.15, help="allowed slowdown (0.15 = 15%%)"
+    )
+    # The fastest run is the least disturbed by other load on the machine
+    compare_parser.add_argument("--statistic", choices=["min", "median"], default="min")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+
+if __name__ == "__main__":
+    main()
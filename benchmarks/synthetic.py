@@ -0,0 +1,151 @@
+"""Deterministic synthetic PDFs for the benchmark suite.
+
+Every document is generated from a seeded random stream, so the same spec
+gives the same text (and byte-identical PDFs) on every machine. A spec
+controls the page count, the words per page, the share of words glued to
+their neighbour (as extraction does when the gaps between letters are
+narrow) and the number of fenced code blocks and $$ equations per page.
+"""
+
+import os
+import random
+import hashlib
+from dataclasses import dataclass
+
+from fpdf import FPDF
+
+WORDS = """
+the of and to in is that for it as was with be by on not he this are or his
+from at which but have an they you were her she there been one all we their
+has would when if so no will more about can said up what out into some them
+two only time other these could first than then its also made over such new
+after most used many where those between well should under each system data
+model results study analysis method research paper section figure table value
+process document summary language network training learning performance test
+energy measure signal function design report sample control group effect
+however during because through against without within information approach
+evaluation experiment observed proposed significant previous different large
+small number structure important general particular following increase
+""".split()
+
+CODE_LINES = [
+    "def score(values, weights):",
+    "    total = sum(v * w for v, w in zip(values, weights))",
+    "    return total / max(len(values), 1)",
+    "for index, row in enumerate(rows):",
+    "    if row.value > threshold:",
+    "        selected.append(index)",
+    "result = model.fit(train_x, train_y, epochs=10)",
+    "print(f'{name}: {value:.3f}')",
+]
+
+EQUATIONS = [
+    "E = m c^2",
+    "\\sum_{i=1}^{n} x_i = n \\bar{x}",
+    "f(x) = \\frac{1}{\\sigma \\sqrt{2 \\pi}} e^{-(x - \\mu)^2 / 2 \\sigma^2}",
+    "\\nabla \\cdot E = \\rho / \\epsilon_0",
+    "p(y | x) = \\prod_{t} p(y_t | y_{<t}, x)",
+]
+
+
+@dataclass(frozen=True)
+class Spec:
+    name: str
+    pages: int
+    words_per_page: int
+    glued_ratio: float = 0.0
+    code_blocks_per_page: int = 0
+    equations_per_page: int = 0
+    seed: int = 0
+
+
+# The corpus the suite runs on: short and long plain documents, one with
+# many glued words for the segmenter and one full of code and equations
+CORPUS = [
+    Spec("short", pages=2, words_per_page=250, seed=1),
+    Spec("long", pages=12, words_per_page=450, seed=2),
+    Spec("glued", pages=6, words_per_page=400, glued_ratio=0.3, seed=3),
+    Spec(
+        "technical",
+        pages=6,
+        words_per_page=300,
+        code_blocks_per_page=1,
+        equations_per_page=3,
+        seed=4,
+    ),
+]
+
+
+class FixedDatePDF(FPDF):
+    """FPDF without the creation time in the metadata, for identical bytes."""
+
+    def _putinfo(self):
+        self._out("/Producer " + self._textstring("max-agent benchmarks"))
+        self._out("/CreationDate " + self._textstring("D:20000101000000"))
+
+
+def sentence(rng, glued_ratio):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 20))]
+    words[0] = words[0].capitalize()
+    text = words[0]
+    for word in words[1:]:
+        text += word if rng.random() < glued_ratio else " " + word
+    return text + "."
+
+
+def page_paragraphs(spec, rng):
+    """The paragraphs of one page, with code blocks and equations in between."""
+    paragraphs = []
+    words = 0
+    while words < spec.words_per_page:
+        paragraph = []
+        while words < spec.words_per_page and len(paragraph) < 5:
+            text = sentence(rng, spec.glued_ratio)
+            words += text.count(" ") + 1
+            paragraph.append(text)
+        paragraphs.append(" ".join(paragraph))
+    for _ in range(spec.code_blocks_per_page):
+        start = rng.randrange(len(CODE_LINES) - 2)
+        block = "\n".join(CODE_LINES[start : start + 3])
+        paragraphs.insert(rng.randint(0, len(paragraphs)), f"```\n{block}\n```")
+    for _ in range(spec.equations_per_page):
+        index = rng.randrange(len(paragraphs))
+        paragraphs[index] += f" $${rng.choice(EQUATIONS)}$$"
+    return paragraphs
+
+
+def document_pages(spec):
+    rng = random.Random(spec.seed)
+    return ["\n\n".join(page_paragraphs(spec, rng)) for _ in range(spec.pages)]
+
+
+def write_pdf(spec, path):
+    pdf = FixedDatePDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.set_font("Helvetica", size=10)
+    for page in document_pages(spec):
+        pdf.add_page()
+        pdf.multi_cell(0, 5, page)
+    pdf.output(path, "F")
+
+
+def write_corpus(directory, specs=CORPUS):
+    """Write ``<name>.pdf`` for every spec; returns their paths and digests."""
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    digests = {}
+    for spec in specs:
+        path = os.path.join(directory, f"{spec.name}.pdf")
+        write_pdf(spec, path)
+        with open(path, "rb") as f:
+            digests[spec.name] = hashlib.sha256(f.read()).hexdigest()[:16]
+        paths[spec.name] = path
+    return paths, digests
+
+
+if __name__ == "__main__":
+    import sys
+
+    paths, digests = write_corpus(sys.argv[1] if len(sys.argv) > 1 else "synthetic")
+    for name, path in paths.items():
+        print(f"{path} {digests[name]}")
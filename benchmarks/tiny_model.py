@@ -0,0 +1,79 @@
+"""A tiny randomly initialised stand-in for facebook/bart-large-cnn.
+
+It has the same architecture, window (1024 tokens), special tokens and
+beam search as the real model, but nearly a thousand times fewer weights
+and a byte-level BPE vocabulary trained on the synthetic corpus, so it is
+built offline in a few seconds. Its summaries are nonsense, but
+they have the lengths the summariser asks for, which is what sets the
+cost of generation. Weights come from a fixed seed.
+"""
+
+import os
+
+from synthetic import CORPUS, document_pages
+
+SPECIAL_TOKENS = ["<s>", "<pad>", "</s>", "<unk>", "<mask>"]
+
+
+def train_tokenizer(vocab_size=2000):
+    from tokenizers import ByteLevelBPETokenizer
+    from transformers import PreTrainedTokenizerFast
+
+    corpus = [page for spec in CORPUS for page in document_pages(spec)]
+    bpe = ByteLevelBPETokenizer()
+    bpe.train_from_iterator(
+        corpus, vocab_size=vocab_size, special_tokens=SPECIAL_TOKENS
+    )
+    return PreTrainedTokenizerFast(
+        tokenizer_object=bpe,
+        bos_token="<s>",
+        pad_token="<pad>",
+        eos_token="</s>",
+        unk_token="<unk>",
+        mask_token="<mask>",
+        model_max_length=1024,
+        model_input_names=["input_ids", "attention_mask"],
+    )
+
+
+def build_tiny_model(directory, d_model=64, layers=2, seed=0):
+    """Save the tokenizer and model to ``directory`` unless already there."""
+    if os.path.exists(os.path.join(directory, "model.safetensors")):
+        return directory
+    import torch
+    from transformers import BartConfig, BartForConditionalGeneration
+
+    tokenizer = train_tokenizer()
+    config = BartConfig(
+        vocab_size=len(tokenizer),
+        max_position_embeddings=1024,
+        d_model=d_model,
+        encoder_layers=layers,
+        decoder_layers=layers,
+        encoder_attention_heads=4,
+        decoder_attention_heads=4,
+        encoder_ffn_dim=d_model * 4,
+        decoder_ffn_dim=d_model * 4,
+        bos_token_id=0,
+        pad_token_id=1,
+        eos_token_id=2,
+        decoder_start_token_id=2,
+        forced_eos_token_id=2,
+    )
+    torch.manual_seed(seed)
+    model = BartForConditionalGeneration(config).eval()
+    # bart-large-cnn's beam search settings, except no_repeat_ngram_size,
+    # whose pure Python n-gram bookkeeping would dominate the timings
+    model.generation_config.forced_bos_token_id = 0
+    model.generation_config.num_beams = 4
+    model.generation_config.length_penalty = 2.0
+    model.generation_config.early_stopping = True
+    tokenizer.save_pretrained(directory)
+    model.save_pretrained(directory)
+    return directory
+
+
+if __name__ == "__main__":
+    import sys
+
+    print(build_tiny_model(sys.argv[1] if len(sys.argv) > 1 else "tiny-bart"))
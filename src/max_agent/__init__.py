@@ -1,9 +1,28 @@
 """Max Agent - PDF summarization and context embedding for chat agents."""
 
-from .pdf_summariser_app import PDFSummariserApp
-from .pdf_processor import PDFProcessor
-from .summariser import Summariser
-from .config import Config
+import importlib
 
 __version__ = "0.1.0"
 __all__ = ["PDFSummariserApp", "PDFProcessor", "Summariser", "Config"]
+
+# Public classes are imported on first access, so importing the package (or
+# running ``max-agent --version``) does not pull in torch or transformers
+_LAZY_IMPORTS = {
+    "PDFSummariserApp": ".pdf_summariser_app",
+    "PDFProcessor": ".pdf_processor",
+    "Summariser": ".summariser",
+    "Config": ".config",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_IMPORTS))
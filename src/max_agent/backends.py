@@ -0,0 +1,137 @@
+# backends.py
+import os
+import re
+import shutil
+import hashlib
+import logging
+import tempfile
+from contextlib import ExitStack
+
+
+class EagerBackend:
+    """Full-precision PyTorch model, as loaded by transformers."""
+
+    name = "eager"
+
+    def load(self, model_id, device):
+        from transformers import AutoModelForSeq2SeqLM
+
+        model = AutoModelForSeq2SeqLM.from_pretrained(model_id)
+        model.to("cpu" if device < 0 else f"cuda:{device}")
+        model.eval()
+        return model
+
+    def inference_context(self):
+        import torch
+
+        return torch.no_grad()
+
+
+class Int8Backend(EagerBackend):
+    """Dynamic int8 quantisation of the model's linear layers (CPU only)."""
+
+    name = "int8"
+
+    def load(self, model_id, device):
+        import torch
+
+        if device >= 0:
+            logging.warning("int8 backend runs on the CPU only; ignoring the GPU.")
+        model = super().load(model_id, -1)
+        logging.info("Quantising linear layers to int8...")
+        return torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+
+
+class BF16Backend(EagerBackend):
+    """fp32 weights with bf16 autocast, where the hardware supports it."""
+
+    name = "bf16"
+
+    def load(self, model_id, device):
+        import torch
+
+        self.device_type = "cpu" if device < 0 else "cuda"
+        if self.device_type == "cpu":
+            self.supported = torch.ops.mkldnn._is_mkldnn_bf16_supported()
+        else:
+            self.supported = torch.cuda.is_bf16_supported()
+        if not self.supported:
+            logging.warning(
+                "This device does not support bf16; running in fp32 instead."
+            )
+        return super().load(model_id, device)
+
+    def inference_context(self):
+        import torch
+
+        stack = ExitStack()
+        stack.enter_context(torch.no_grad())
+        if self.supported:
+            stack.enter_context(
+                torch.autocast(device_type=self.device_type, dtype=torch.bfloat16)
+            )
+        return stack
+
+
+class OnnxBackend(EagerBackend):
+    """
+    ONNX Runtime graph exported with optimum.
+
+    The first load exports the model into ``cache_dir``; later loads reuse
+    the exported graph.
+    """
+
+    name = "onnx"
+
+    def __init__(self, cache_dir="./onnx_models/"):
+        self.cache_dir = cache_dir
+
+    def export_path(self, model_id):
+        digest = hashlib.sha256(model_id.encode("utf-8")).hexdigest()[:12]
+        name = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_id).strip("_")
+        return os.path.join(self.cache_dir, f"{name}-{digest}")
+
+    def load(self, model_id, device):
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+        provider = "CPUExecutionProvider" if device < 0 else "CUDAExecutionProvider"
+        path = self.export_path(model_id)
+        if os.path.exists(os.path.join(path, "config.json")):
+            logging.info(f"Loading ONNX export from '{path}'...")
+            return ORTModelForSeq2SeqLM.from_pretrained(path, provider=provider)
+
+        logging.info(f"Exporting '{model_id}' to ONNX (first run only)...")
+        model = ORTModelForSeq2SeqLM.from_pretrained(
+            model_id, export=True, provider=provider
+        )
+        # Export into a temporary directory and move it into place, so an
+        # interrupted export is never mistaken for a complete one
+        os.makedirs(self.cache_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=self.cache_dir, prefix=".export-")
+        try:
+            model.save_pretrained(staging)
+            os.replace(staging, path)
+        except OSError:
+            # Another process finished its export first
+            shutil.rmtree(staging, ignore_errors=True)
+        logging.info(f"ONNX export saved to '{path}'.")
+        return model
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (EagerBackend, Int8Backend, BF16Backend, OnnxBackend)
+}
+
+
+def get_backend(name, onnx_cache_dir="./onnx_models/"):
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Unknown inference backend '{name}'; "
+            f"choose one of {', '.join(BACKENDS)}."
+        )
+    if name == OnnxBackend.name:
+        return OnnxBackend(onnx_cache_dir)
+    return BACKENDS[name]()
@@ -0,0 +1,103 @@
+# batching.py
+from typing import List, Optional, Sequence, Tuple
+
+
+def length_budget(
+    token_count: int,
+    min_ratio: float,
+    max_ratio: float,
+    limit: Optional[int] = None,
+) -> Tuple[int, int]:
+    """
+    Return the (min_length, max_length) summary budget for a chunk.
+
+    With ``limit`` set, ``max_length`` never exceeds it and ``min_length``
+    stays below it.
+    """
+    min_length = max(int(token_count * min_ratio), 1)
+    max_length = max(int(token_count * max_ratio), min_length + 1)
+    if limit is not None:
+        max_length = min(max_length, limit)
+        min_length = min(min_length, max_length - 1)
+    return min_length, max_length
+
+
+def plan_batches(
+    lengths: Sequence[int],
+    batch_size: int,
+    max_batch_tokens: int,
+    window: Optional[int] = None,
+) -> List[List[int]]:
+    """
+    Group item indices into padded batches.
+
+    Items are sorted by token length (longest first) so that each batch pads
+    to a similar length. A batch is closed when it holds ``batch_size`` items
+    or when adding another item would push the padded size
+    (items x longest item) past ``max_batch_tokens``. An item longer than
+    ``max_batch_tokens`` still gets a batch of its own.
+
+    With ``window`` set, sorting only happens within consecutive windows of
+    that many items and batches never span two windows, so running the
+    batches in order completes the items roughly in index order.
+    """
+    window = window or max(len(lengths), 1)
+    batches = []
+    for window_start in range(0, len(lengths), window):
+        indices = range(window_start, min(window_start + window, len(lengths)))
+        order = sorted(indices, key=lambda i: (-lengths[i], i))
+        current = []
+        padded_length = 0
+        for index in order:
+            if current and (
+                len(current) >= batch_size
+                or (len(current) + 1) * padded_length > max_batch_tokens
+            ):
+                batches.append(current)
+                current = []
+            if not current:
+                padded_length = lengths[index]
+            current.append(index)
+        if current:
+            batches.append(current)
+    return batches
+
+
+class LengthBudgetLogitsProcessor:
+    """
+    Enforce a separate min/max summary length for every item in a batch.
+
+    ``generate`` only accepts one ``min_length``/``max_length`` per call, so the
+    batch is run with the largest budget and this processor blocks EOS until
+    each item reaches its own minimum and forces EOS once it hits its own
+    maximum. Rows are laid out as ``batch_size * num_beams``.
+    """
+
+    def __init__(self, min_lengths, max_lengths, eos_token_id, num_beams=1):
+        self.min_lengths = list(min_lengths)
+        self.max_lengths = list(max_lengths)
+        self.eos_token_id = eos_token_id
+        self.num_beams = num_beams
+        self._row_min = None
+        self._row_max = None
+
+    def __call__(self, input_ids, scores):
+        import torch
+
+        if self._row_min is None:
+            self._row_min = torch.tensor(
+                self.min_lengths, device=scores.device
+            ).repeat_interleave(self.num_beams)
+            self._row_max = torch.tensor(
+                self.max_lengths, device=scores.device
+            ).repeat_interleave(self.num_beams)
+
+        cur_len = input_ids.shape[-1]
+        too_short = cur_len < self._row_min
+        scores[too_short, self.eos_token_id] = -float("inf")
+
+        at_limit = cur_len >= self._row_max - 1
+        if at_limit.any():
+            scores[at_limit] = -float("inf")
+            scores[at_limit, self.eos_token_id] = 0
+        return scores
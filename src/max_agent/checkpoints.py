@@ -0,0 +1,137 @@
+# checkpoints.py
+import os
+import json
+import shutil
+import hashlib
+import logging
+
+from .file_tracker import known_digest
+from .summariser import chunk_text
+
+
+def chunk_digest(chunk):
+    return hashlib.sha1(chunk_text(chunk).encode("utf-8")).hexdigest()
+
+
+def _fsync_directory(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class DocumentCheckpoint:
+    """
+    Durable progress of one document's first summarisation tier.
+
+    ``plan.json`` holds the digest of every chunk and is replaced
+    atomically; ``partials.jsonl`` gets one line per finished chunk,
+    flushed and fsynced before the next chunk is recorded. A partial is
+    only reused for a chunk at the same index with the same digest, so a
+    changed chunk plan never picks up stale summaries, and a line cut short
+    by a crash is ignored.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.plan_path = os.path.join(path, "plan.json")
+        self.partials_path = os.path.join(path, "partials.jsonl")
+        self.partials = {}
+        if os.path.exists(self.partials_path):
+            with open(self.partials_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.partials[record["index"]] = (
+                        record["digest"],
+                        record["summary"],
+                    )
+
+    def start(self, chunks):
+        """Write the chunk plan, dropping partials of a different plan."""
+        digests = [chunk_digest(chunk) for chunk in chunks]
+        if os.path.exists(self.plan_path):
+            with open(self.plan_path, encoding="utf-8") as f:
+                if json.load(f) == digests:
+                    return
+        if self.partials:
+            logging.info(f"Chunk plan changed; discarding checkpoint '{self.path}'.")
+            self.partials = {}
+        os.makedirs(self.path, exist_ok=True)
+        if os.path.exists(self.partials_path):
+            os.remove(self.partials_path)
+        staging = f"{self.plan_path}.tmp"
+        with open(staging, "w", encoding="utf-8") as f:
+            json.dump(digests, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(staging, self.plan_path)
+        _fsync_directory(self.path)
+
+    def completed(self, chunks, offset=0):
+        """``{index: summary}`` of checkpointed chunks among ``chunks``."""
+        done = {}
+        for index, chunk in enumerate(chunks, offset):
+            if index in self.partials:
+                digest, summary = self.partials[index]
+                if digest == chunk_digest(chunk):
+                    done[index] = summary
+        return done
+
+    def record(self, index, chunk, summary):
+        digest = chunk_digest(chunk)
+        os.makedirs(self.path, exist_ok=True)
+        line = json.dumps({"index": index, "digest": digest, "summary": summary})
+        with open(self.partials_path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.partials[index] = (digest, summary)
+
+
+class CheckpointStore:
+    """
+    Per-document checkpoints under ``directory``.
+
+    A document's checkpoint is keyed by its content hash, the model id and
+    the summary settings fingerprint, so a checkpoint is only resumed for
+    the same file summarised the same way. Content hashes are kept while a
+    file's size and mtime stay the same, and ``known_digests`` (path to
+    ``(size, mtime_ns, hash)``, such as ``FileTracker.checked``) supplies
+    hashes computed elsewhere, so a PDF is not read again to find its
+    checkpoint.
+    """
+
+    def __init__(self, directory, model_id="", fingerprint="", known_digests=None):
+        self.directory = directory
+        self.model_id = model_id
+        self.fingerprint = fingerprint
+        self.known_digests = known_digests if known_digests is not None else {}
+        self.digests = {}
+
+    def digest(self, pdf_path):
+        entry = known_digest(pdf_path, self.digests, self.known_digests)
+        self.digests[pdf_path] = entry
+        return entry[2]
+
+    def path(self, pdf_path):
+        key = f"{self.digest(pdf_path)}:{self.model_id}:{self.fingerprint}"
+        return os.path.join(
+            self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+        )
+
+    def open(self, pdf_path):
+        checkpoint = DocumentCheckpoint(self.path(pdf_path))
+        if checkpoint.partials:
+            logging.info(
+                f"Resuming '{os.path.basename(pdf_path)}' from a checkpoint with "
+                f"{len(checkpoint.partials)} chunk summaries."
+            )
+        return checkpoint
+
+    def remove(self, pdf_path):
+        shutil.rmtree(self.path(pdf_path), ignore_errors=True)
+        self.digests.pop(pdf_path, None)
@@ -0,0 +1,129 @@
+# chunk_store.py
+import os
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+
+import numpy as np
+
+from .chunker import Chunk
+
+FORMAT_VERSION = 1
+
+
+def tokenizer_fingerprint(tokenizer):
+    """Hash of a tokenizer's vocabulary and rules, shared across model ids."""
+    backend = getattr(tokenizer, "backend_tokenizer", None)
+    state = backend.to_str() if backend is not None else tokenizer.name_or_path
+    return hashlib.sha256(state.encode("utf-8")).hexdigest()
+
+
+class ChunkStore:
+    """
+    Pre-tokenised chunk plans on disk, one directory per document.
+
+    A plan holds the chunk texts and the token ids of every chunk (with
+    special tokens), as flat ``.npy`` arrays plus offsets, and is opened
+    memory-mapped: chunks carry views into the mapped ids, so they are
+    paged in only while their batch is generated. ``meta.json`` records a
+    hash of the chunked text, the tokenizer fingerprint and the chunk size;
+    a plan is reused when all three match, which includes re-summarising
+    with another model that shares the tokenizer.
+    """
+
+    def __init__(self, chunker, batch_size=256):
+        self.chunker = chunker
+        self.batch_size = batch_size
+        self.tokenizer_key = tokenizer_fingerprint(chunker.tokenizer)
+
+    def meta(self, text):
+        return {
+            "version": FORMAT_VERSION,
+            "text": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+            "tokenizer": self.tokenizer_key,
+            "max_tokens": self.chunker.max_tokens,
+        }
+
+    def chunk(self, text, path):
+        """Chunks of ``text``, from the plan at ``path`` when it is current."""
+        meta = self.meta(text)
+        chunks = self.load(path, meta)
+        if chunks is not None:
+            logging.info(f"Loaded {len(chunks)} pre-tokenised chunks from '{path}'.")
+            return chunks
+        self.save(path, meta, self.chunker.chunk(text))
+        return self.load(path, meta)
+
+    def load(self, path, meta):
+        try:
+            with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+                if json.load(f) != meta:
+                    return None
+        except (OSError, ValueError):
+            return None
+        token_ids = np.load(os.path.join(path, "token_ids.npy"), mmap_mode="r")
+        token_offsets = np.load(os.path.join(path, "token_offsets.npy"))
+        text = np.load(os.path.join(path, "text.npy"), mmap_mode="r")
+        text_offsets = np.load(os.path.join(path, "text_offsets.npy"))
+        return [
+            Chunk(
+                text=text[text_start:text_end].tobytes().decode("utf-8"),
+                token_count=int(token_end - token_start),
+                token_ids=token_ids[token_start:token_end],
+            )
+            for text_start, text_end, token_start, token_end in zip(
+                text_offsets[:-1],
+                text_offsets[1:],
+                token_offsets[:-1],
+                token_offsets[1:],
+            )
+        ]
+
+    def save(self, path, meta, chunks):
+        encoded = [chunk.text.encode("utf-8") for chunk in chunks]
+        text_offsets = np.zeros(len(chunks) + 1, dtype=np.int64)
+        np.cumsum([len(data) for data in encoded], out=text_offsets[1:])
+
+        # Chunks are tokenised whole, as generate would tokenise them
+        token_ids = []
+        for start in range(0, len(chunks), self.batch_size):
+            token_ids.extend(
+                self.chunker.tokenizer(
+                    [chunk.text for chunk in chunks[start : start + self.batch_size]],
+                    return_attention_mask=False,
+                    truncation=False,
+                )["input_ids"]
+            )
+        token_offsets = np.zeros(len(chunks) + 1, dtype=np.int64)
+        np.cumsum([len(ids) for ids in token_ids], out=token_offsets[1:])
+        flat_ids = np.fromiter(
+            (token for ids in token_ids for token in ids),
+            dtype=np.int32,
+            count=int(token_offsets[-1]),
+        )
+
+        # Written to a staging directory and moved into place, so a reader
+        # never sees a half-written plan
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=parent, prefix=".chunks-")
+        try:
+            np.save(os.path.join(staging, "token_ids.npy"), flat_ids)
+            np.save(os.path.join(staging, "token_offsets.npy"), token_offsets)
+            np.save(
+                os.path.join(staging, "text.npy"),
+                np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            )
+            np.save(os.path.join(staging, "text_offsets.npy"), text_offsets)
+            with open(os.path.join(staging, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(staging, path)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        logging.info(
+            f"Saved {len(chunks)} chunks ({int(token_offsets[-1])} tokens) to '{path}'."
+        )
@@ -0,0 +1,132 @@
+# chunker.py
+import re
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?]) +")
+
+
+class Chunk(NamedTuple):
+    """
+    A piece of text sized for the model, with its token count.
+
+    Chunks loaded from a ChunkStore also carry their token ids.
+    """
+
+    text: str
+    token_count: int
+    token_ids: Optional[np.ndarray] = None
+
+
+class TokenChunker:
+    """
+    Split text into chunks of at most ``max_tokens`` tokens on sentence
+    boundaries.
+
+    All sentences are tokenised in one batched call to the (fast) tokenizer
+    and chunk boundaries are picked from a prefix sum of the sentence
+    lengths, instead of calling the tokenizer once per sentence. Boundaries
+    are the same as the greedy per-sentence packing in
+    ``PDFSummariserApp.bin_text``: each sentence is budgeted with the
+    tokenizer's special tokens, and a sentence that is longer than
+    ``max_tokens`` on its own becomes a chunk by itself.
+    """
+
+    def __init__(self, tokenizer, max_tokens: int, batch_size: int = 4096) -> None:
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.batch_size = batch_size
+        self.special_tokens = tokenizer.num_special_tokens_to_add()
+
+    def split_sentences(self, text: str) -> List[str]:
+        return SENTENCE_SPLIT.split(text)
+
+    def sentence_lengths(self, sentences: List[str]) -> np.ndarray:
+        """Token counts of ``sentences``, without special tokens."""
+        lengths = np.empty(len(sentences), dtype=np.int64)
+        for start in range(0, len(sentences), self.batch_size):
+            batch = sentences[start : start + self.batch_size]
+            encoded = self.tokenizer(
+                batch,
+                add_special_tokens=False,
+                return_attention_mask=False,
+                return_token_type_ids=False,
+            )["input_ids"]
+            lengths[start : start + len(batch)] = [len(ids) for ids in encoded]
+        return lengths
+
+    def _pack(
+        self, sentences: List[str], lengths: np.ndarray, final: bool
+    ) -> Tuple[List[Chunk], int]:
+        """
+        Greedily pack ``sentences`` into chunks.
+
+        Returns the chunks and the number of sentences they use. Unless
+        ``final`` is set, the last chunk is left out because later sentences
+        may still fit in it.
+        """
+        # Sentences are packed with their own special tokens counted, like
+        # separate count_tokens calls would
+        budgets = np.concatenate(([0], np.cumsum(lengths + self.special_tokens)))
+        tokens = np.concatenate(([0], np.cumsum(lengths)))
+
+        chunks = []
+        start = 0
+        while start < len(sentences):
+            end = (
+                int(
+                    np.searchsorted(
+                        budgets, budgets[start] + self.max_tokens, side="right"
+                    )
+                )
+                - 1
+            )
+            end = max(end, start + 1)
+            if end == len(sentences) and not final:
+                break
+            chunks.append(
+                Chunk(
+                    text=" ".join(sentences[start:end]).strip(),
+                    token_count=int(tokens[end] - tokens[start]) + self.special_tokens,
+                )
+            )
+            start = end
+        return chunks, start
+
+    def chunk_sentences(self, sentences: List[str]) -> List[Chunk]:
+        if not sentences:
+            return []
+        chunks, _ = self._pack(sentences, self.sentence_lengths(sentences), final=True)
+        return chunks
+
+    def chunk(self, text: str) -> List[Chunk]:
+        return self.chunk_sentences(self.split_sentences(text))
+
+    def iter_chunks(self, pieces: Iterable[str]) -> Iterator[Chunk]:
+        """
+        Chunk text that arrives in pieces, such as page by page.
+
+        Yields the same chunks as ``chunk("".join(pieces))`` while only
+        holding the sentences of the chunk that is still being filled.
+        """
+        carry = ""
+        sentences = []
+        lengths = np.empty(0, dtype=np.int64)
+        for piece in pieces:
+            parts = self.split_sentences(carry + piece)
+            # The text after the last boundary may continue in the next piece
+            carry = parts.pop()
+            if not parts:
+                continue
+            sentences.extend(parts)
+            lengths = np.concatenate((lengths, self.sentence_lengths(parts)))
+            chunks, used = self._pack(sentences, lengths, final=False)
+            yield from chunks
+            sentences = sentences[used:]
+            lengths = lengths[used:]
+
+        sentences.append(carry)
+        lengths = np.concatenate((lengths, self.sentence_lengths([carry])))
+        chunks, _ = self._pack(sentences, lengths, final=True)
+        yield from chunks
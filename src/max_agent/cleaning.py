@@ -0,0 +1,105 @@
+# cleaning.py
+import re
+import logging
+from typing import List, Optional
+
+from .segmentation import GlueWordSegmenter
+
+# Patterns for code blocks and equations, applied to each page in order
+INDENTED_CODE_PATTERN = re.compile(r"(^|\n)\s{4,}(.*)", re.MULTILINE)
+CODE_PATTERNS = [
+    re.compile(r"```(.*?)```", re.DOTALL),  # Triple backticks
+    re.compile(r"<code>(.*?)</code>", re.DOTALL),  # <code> tags
+    INDENTED_CODE_PATTERN,  # Indented code blocks
+]
+EQUATION_PATTERNS = [re.compile(r"\$\$?(.*?)\$\$?", re.DOTALL)]
+
+# Every position where a word boundary is missing: lowercase followed by
+# uppercase, an uppercase run followed by a capitalised word, and letters
+# next to digits in either direction
+GLUE_BOUNDARY = re.compile(
+    r"(?<=[a-z])(?=[A-Z])"
+    r"|(?<=[A-Z])(?=[A-Z][a-z])"
+    r"|(?<=[a-zA-Z])(?=\d)"
+    r"|(?<=\d)(?=[a-zA-Z])"
+)
+
+# Spaces to drop from single-spaced text: after "(" or ":" and before
+# ".", ",", ";" or ")"
+NO_SPACE_AFTER = ("(", ":")
+NO_SPACE_BEFORE = (".", ",", ";", ")")
+PUNCTUATION_SPACE = re.compile(r"(?<=[(:]) | (?=[.,;)])")
+
+
+class CleaningEngine:
+    """
+    Precompiled version of PDFProcessor's cleaning rules.
+
+    ``clean`` gives the same result as ``final_text_cleaning(clean_text())``
+    with two regex scans instead of thirteen: the four glued-word rules are
+    one zero-width pattern, and once the text is split into words and
+    joined with single spaces the seven final rules reduce to dropping the
+    space after "(" or ":" and before ".", ",", ";" or ")". Code blocks and
+    equations are collected and removed in the same match loop.
+    """
+
+    def __init__(self, segmenter: Optional[GlueWordSegmenter] = None) -> None:
+        self.segmenter = segmenter or GlueWordSegmenter()
+
+    @staticmethod
+    def _collect(pattern: re.Pattern, page: str, found: List[str], group: int) -> str:
+        """Remove the matches of ``pattern`` from ``page``, keeping ``group``."""
+
+        def take(match):
+            found.append(match.group(group).strip())
+            return ""
+
+        return pattern.sub(take, page)
+
+    def extract_page(
+        self,
+        page: str,
+        page_num: int,
+        code_blocks: List[str],
+        equations: List[str],
+    ) -> str:
+        """Move one page's code blocks and equations into the given lists."""
+        for pattern in CODE_PATTERNS:
+            count = len(code_blocks)
+            group = 2 if pattern is INDENTED_CODE_PATTERN else 1
+            page = self._collect(pattern, page, code_blocks, group)
+            if len(code_blocks) > count:
+                logging.info(
+                    f"Extracted {len(code_blocks) - count} code block(s) "
+                    f"from page {page_num}."
+                )
+
+        for pattern in EQUATION_PATTERNS:
+            count = len(equations)
+            page = self._collect(pattern, page, equations, 1)
+            if len(equations) > count:
+                logging.info(
+                    f"Extracted {len(equations) - count} equation(s) "
+                    f"from page {page_num}."
+                )
+
+        return page
+
+    def split_words(self, text: str) -> List[str]:
+        """Split ``text`` into words, separating glued words."""
+        return self.segmenter.split_words(GLUE_BOUNDARY.sub(" ", text).split())
+
+    def join_words(self, words: List[str]) -> str:
+        return PUNCTUATION_SPACE.sub("", " ".join(words))
+
+    def clean(self, text: str) -> str:
+        return self.join_words(self.split_words(text))
+
+    @staticmethod
+    def separator(previous: str, following: str) -> str:
+        """The space ``clean`` would put between two cleaned pieces of text."""
+        if not previous or not following:
+            return ""
+        if previous.endswith(NO_SPACE_AFTER) or following.startswith(NO_SPACE_BEFORE):
+            return ""
+        return " "
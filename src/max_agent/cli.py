@@ -5,10 +5,11 @@ import logging
 import argparse
 import os
 import sys
+from contextlib import nullcontext
 from pathlib import Path
 from typing import Optional
 
-from .pdf_summariser_app import PDFSummariserApp
+from . import __version__
 
 
 def setup_logging(log_level: str = "INFO") -> None:
@@ -19,8 +20,8 @@ def setup_logging(log_level: str = "INFO") -> None:
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
         handlers=[
             logging.StreamHandler(sys.stdout),
-            logging.FileHandler("max_agent.log")
-        ]
+            logging.FileHandler("max_agent.log"),
+        ],
     )
 
 
@@ -31,11 +32,11 @@ def find_config_file() -> Optional[str]:
         "src/max_agent/config.yaml",
         Path(__file__).parent / "config.yaml",
     ]
-    
+
     for location in possible_locations:
         if Path(location).exists():
             return str(location)
-    
+
     return None
 
 
@@ -49,32 +50,68 @@ Examples:
   max-agent                     # Use default config.yaml
   max-agent --config my.yaml   # Use custom config file
   max-agent --log-level DEBUG  # Enable debug logging
-        """
+  max-agent --workers 8        # Extract PDFs in 8 processes
+  max-agent --inference-workers 4  # Summarise in 4 processes sharing the model
+  max-agent --watch            # Keep running and summarise PDFs as they arrive
+  max-agent --serve            # Summarise uploads over HTTP on localhost
+  max-agent --profile run.prof # Save a cProfile of the run
+        """,
     )
-    
+
     parser.add_argument(
-        "--config",
-        type=str,
-        help="Path to the YAML configuration file"
+        "--config", type=str, help="Path to the YAML configuration file"
     )
     parser.add_argument(
         "--log-level",
         choices=["DEBUG", "INFO", "WARNING", "ERROR"],
         default="INFO",
-        help="Set the logging level (default: INFO)"
+        help="Set the logging level (default: INFO)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of extraction processes for the batch pipeline "
+        "(default: from config, 1 runs documents one at a time)",
+    )
+    parser.add_argument(
+        "--inference-workers",
+        type=int,
+        help="Number of inference processes sharing one copy of the model "
+        "(default: from config)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep the model loaded and summarise new or changed PDFs as they "
+        "appear in the input directory, until SIGTERM or Ctrl-C",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Serve summaries of uploaded PDFs or text over HTTP "
+        "(POST /summarise), until SIGTERM or Ctrl-C",
+    )
+    parser.add_argument(
+        "--port", type=int, help="Port for --serve (default: from config)"
     )
     parser.add_argument(
-        "--version",
-        action="version",
-        version="Max Agent v0.1.0"
+        "--profile",
+        nargs="?",
+        const="max_agent.prof",
+        metavar="PATH",
+        help="Run under cProfile (all threads of the main process) and save "
+        "the stats to PATH (default: max_agent.prof)",
     )
-    
+    parser.add_argument(
+        "--version", action="version", version=f"Max Agent v{__version__}"
+    )
+
     args = parser.parse_args()
-    
+
     # Set up logging
     setup_logging(args.log_level)
     logger = logging.getLogger(__name__)
-    
+
     # Find config file
     config_file = args.config
     if not config_file:
@@ -84,19 +121,34 @@ Examples:
                 "No config.yaml file found. Please create one or specify with --config"
             )
             sys.exit(1)
-    
+
     if not os.path.exists(config_file):
         logger.error(f"Config file not found: {config_file}")
         sys.exit(1)
-    
+
     logger.info(f"Using config file: {config_file}")
-    
+
     try:
-        # Initialize and run the PDF summarizer
-        app = PDFSummariserApp(config_file=config_file)
-        app.run()
-        logger.info("PDF summarization completed successfully.")
-        
+        # Initialize and run the PDF summarizer; imported here so --help and
+        # --version do not load the processing stack
+        from .pdf_summariser_app import PDFSummariserApp
+
+        from .metrics import profiled
+
+        app = PDFSummariserApp(
+            config_file=config_file,
+            workers=args.workers,
+            inference_workers=args.inference_workers,
+        )
+        with profiled(args.profile) if args.profile else nullcontext():
+            if args.serve:
+                app.serve(port=args.port)
+            elif args.watch:
+                app.watch()
+            else:
+                app.run()
+                logger.info("PDF summarization completed successfully.")
+
     except KeyboardInterrupt:
         logger.info("Operation cancelled by user.")
         sys.exit(130)
@@ -104,9 +156,10 @@ Examples:
         logger.error(f"An error occurred: {e}")
         if args.log_level == "DEBUG":
             import traceback
+
             logger.error(traceback.format_exc())
         sys.exit(1)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
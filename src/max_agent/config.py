@@ -1,5 +1,7 @@
 # config.py
 import os
+import json
+import hashlib
 import yaml
 
 # Type hints removed as they weren't used
@@ -16,6 +18,10 @@ class Config:
             "cleaned_text_directory", "./cleaned_texts/"
         )
         self.font_directory = config.get("font_directory", "./dejavu-sans/")
+        # Processed-file state; the legacy text log is imported once
+        self.processed_files_db = config.get(
+            "processed_files_db", "./processed_pdfs.sqlite3"
+        )
         self.processed_files_log = config.get(
             "processed_files_log", "./processed_pdfs.txt"
         )
@@ -28,7 +34,98 @@ class Config:
         self.second_min_ratio = config.get("second_min_ratio", 0.60)
         self.second_max_ratio = config.get("second_max_ratio", 0.80)
         self.max_tokens = config.get("max_tokens", 1024)
+        # Reduce tree over partial summaries: summaries per group, optional
+        # [min, max] ratios per level (the last pair repeats; defaults to the
+        # second ratios) and the length to reduce down to (defaults to the
+        # model's max length)
+        self.reduce_fan_in = config.get("reduce_fan_in", 8)
+        self.reduce_level_ratios = config.get("reduce_level_ratios", None)
+        self.reduce_target_tokens = config.get("reduce_target_tokens", None)
         self.do_sample = config.get("do_sample", False)
+        # Optional extractive pre-filter: share of words to keep (null
+        # disables it) and the similarity above which sentences are redundant
+        self.extractive_keep_ratio = config.get("extractive_keep_ratio", None)
+        self.extractive_redundancy = config.get("extractive_redundancy", 0.8)
+        # Inference backend: eager, int8, bf16 or onnx (exported once into
+        # onnx_cache_dir)
+        self.inference_backend = config.get("inference_backend", "eager")
+        self.onnx_cache_dir = config.get("onnx_cache_dir", "./onnx_models/")
+        # Batched inference: chunks per generate call and padded token cap
+        self.batch_size = config.get("batch_size", 8)
+        self.max_batch_tokens = config.get("max_batch_tokens", 8192)
+        # Processes sharing the pages of one document during extraction
+        self.extraction_workers = config.get("extraction_workers", 1)
+        # Page text extractor: pdfplumber, pdfium, pdfminer, or auto (pdfium
+        # with per-page fallback to pdfplumber on empty or glued text)
+        self.pdf_extractor = config.get("pdf_extractor", "pdfplumber")
+        # Extract, clean and chunk page by page instead of whole documents
+        self.streaming_extraction = config.get("streaming_extraction", False)
+        # Compressed cache of raw extracted pages, so changes to cleaning or
+        # chunking do not re-parse PDFs; set the path to null to disable it
+        self.raw_page_cache_path = config.get(
+            "raw_page_cache_path", "./raw_page_cache.sqlite3"
+        )
+        self.raw_page_cache_max_mb = config.get("raw_page_cache_max_mb", 1024)
+        # Persistent summary cache; set the path to null to disable it
+        self.summary_cache_path = config.get(
+            "summary_cache_path", "./summary_cache.sqlite3"
+        )
+        self.summary_cache_max_mb = config.get("summary_cache_max_mb", 512)
+        # Save each document's chunks with their token ids next to the
+        # cleaned text, so re-summarising it does not tokenise again
+        self.chunk_store = config.get("chunk_store", True)
+        # Per-document checkpoints of finished chunk summaries, so an
+        # interrupted document resumes where it stopped; null disables them
+        self.checkpoint_directory = config.get("checkpoint_directory", "./checkpoints/")
+        # Reuse the summary of a near-identical earlier chunk (MinHash LSH);
+        # null disables it
+        self.near_duplicate_index_path = config.get("near_duplicate_index_path", None)
+        self.near_duplicate_threshold = config.get("near_duplicate_threshold", 0.9)
+        # Batch pipeline: extraction processes and bounded queue depth
+        self.workers = config.get("workers", 1)
+        self.queue_size = config.get("queue_size", None)
+        # Inference processes forked after the model is loaded, sharing its
+        # weights; torch threads per process default to an even core split
+        self.inference_workers = config.get("inference_workers", 1)
+        self.inference_threads = config.get("inference_threads", None)
+        self.pin_inference_workers = config.get("pin_inference_workers", True)
+        # Watch mode: seconds a new file's size and mtime must stay unchanged
+        # before it is read, the polling interval, and whether to poll even
+        # where inotify is available (network mounts)
+        self.watch_settle_seconds = config.get("watch_settle_seconds", 1.0)
+        self.watch_poll_interval = config.get("watch_poll_interval", 1.0)
+        self.watch_polling = config.get("watch_polling", False)
+        # HTTP service (--serve): address, how long the first queued batch
+        # waits for batches of other requests to share its generate call,
+        # requests summarised at once and the largest accepted upload
+        self.service_host = config.get("service_host", "127.0.0.1")
+        self.service_port = config.get("service_port", 8765)
+        self.service_max_wait_ms = config.get("service_max_wait_ms", 10)
+        self.service_max_requests = config.get("service_max_requests", 8)
+        self.service_max_upload_mb = config.get("service_max_upload_mb", 64)
+        # Per-document stage timings and counters as JSON, plus run totals in
+        # Prometheus text format; null disables them
+        self.metrics_directory = config.get("metrics_directory", None)
+
+    def summary_fingerprint(self) -> str:
+        """Hash of the settings that change a document's summary."""
+        settings = {
+            "first_min_ratio": self.first_min_ratio,
+            "first_max_ratio": self.first_max_ratio,
+            "second_min_ratio": self.second_min_ratio,
+            "second_max_ratio": self.second_max_ratio,
+            "max_tokens": self.max_tokens,
+            "reduce_fan_in": self.reduce_fan_in,
+            "reduce_level_ratios": self.reduce_level_ratios,
+            "reduce_target_tokens": self.reduce_target_tokens,
+            "do_sample": self.do_sample,
+            "inference_backend": self.inference_backend,
+            "extractive_keep_ratio": self.extractive_keep_ratio,
+            "extractive_redundancy": self.extractive_redundancy,
+            "pdf_extractor": self.pdf_extractor,
+        }
+        encoded = json.dumps(settings, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()[:16]
 
     def create_directories(self) -> None:
         os.makedirs(self.output_directory, exist_ok=True)
@@ -0,0 +1,140 @@
+# extractive.py
+import re
+import logging
+from typing import Iterable, Iterator, List, Set
+
+import numpy as np
+
+from .chunker import SENTENCE_SPLIT
+
+WORD = re.compile(r"\w+")
+
+
+class ExtractiveFilter:
+    """
+    Drop low-value sentences before abstractive summarisation.
+
+    Sentences are scored with TextRank over TF-IDF cosine similarities, in
+    blocks of ``block_size`` consecutive sentences so the similarity matrix
+    stays small. Exact repeats anywhere in the document (page headers,
+    navigation) and sentences nearly identical to a better one in the same
+    block are removed, then the best sentences are kept, in their original
+    order, until ``keep_ratio`` of the block's words is reached.
+    """
+
+    def __init__(
+        self,
+        keep_ratio: float = 0.6,
+        redundancy_threshold: float = 0.8,
+        block_size: int = 512,
+        damping: float = 0.85,
+        iterations: int = 30,
+        min_sentences: int = 4,
+    ) -> None:
+        self.keep_ratio = keep_ratio
+        self.redundancy_threshold = redundancy_threshold
+        self.block_size = block_size
+        self.damping = damping
+        self.iterations = iterations
+        self.min_sentences = min_sentences
+
+    def tfidf(self, sentences: List[List[str]]) -> np.ndarray:
+        """L2-normalised TF-IDF rows for tokenised ``sentences``."""
+        vocabulary = {}
+        rows, columns = [], []
+        for row, words in enumerate(sentences):
+            for word in words:
+                rows.append(row)
+                columns.append(vocabulary.setdefault(word, len(vocabulary)))
+        width = max(len(vocabulary), 1)
+        cells = np.asarray(rows, dtype=np.int64) * width + np.asarray(
+            columns, dtype=np.int64
+        )
+        matrix = np.bincount(cells, minlength=len(sentences) * width)
+        matrix = matrix.reshape(len(sentences), width).astype(np.float64)
+        document_frequency = np.count_nonzero(matrix, axis=0)
+        matrix *= np.log((1 + len(sentences)) / (1 + document_frequency)) + 1
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    def textrank(self, similarity: np.ndarray) -> np.ndarray:
+        """PageRank scores over a sentence similarity matrix, mean 1."""
+        count = len(similarity)
+        weights = similarity.copy()
+        np.fill_diagonal(weights, 0)
+        totals = weights.sum(axis=1, keepdims=True)
+        # Sentences similar to nothing link to every sentence evenly
+        transition = np.where(
+            totals > 0, weights / np.where(totals == 0, 1, totals), 1 / count
+        )
+        scores = np.full(count, 1 / count)
+        for _ in range(self.iterations):
+            scores = (1 - self.damping) / count + self.damping * (transition.T @ scores)
+        return scores * count
+
+    def select(self, sentences: List[str], seen: Set[str]) -> List[str]:
+        """Return the sentences of one block worth keeping, in order."""
+        words = [WORD.findall(sentence.lower()) for sentence in sentences]
+        keys = [" ".join(sentence_words) for sentence_words in words]
+
+        # Exact repeats, here or in an earlier block
+        candidates = []
+        for index, key in enumerate(keys):
+            if key and key in seen:
+                continue
+            seen.add(key)
+            candidates.append(index)
+        if len(candidates) < self.min_sentences:
+            return [sentences[index] for index in candidates]
+
+        vectors = self.tfidf([words[index] for index in candidates])
+        similarity = vectors @ vectors.T
+        scores = self.textrank(similarity)
+        lengths = np.array([len(words[index]) for index in candidates])
+        budget = self.keep_ratio * lengths.sum()
+
+        kept = []
+        kept_words = 0
+        for position in np.argsort(-scores, kind="stable"):
+            if kept_words >= budget:
+                break
+            if kept and similarity[position, kept].max() > self.redundancy_threshold:
+                continue
+            kept.append(position)
+            kept_words += lengths[position]
+        return [sentences[candidates[position]] for position in sorted(kept)]
+
+    def iter_filter(self, pieces: Iterable[str]) -> Iterator[str]:
+        """
+        Filter text that arrives in pieces, such as page by page.
+
+        Yields the kept text one block at a time; the blocks joined together
+        are the same as ``filter`` on the whole text.
+        """
+        seen = set()
+        carry = ""
+        block = []
+        first = True
+        for piece in pieces:
+            parts = SENTENCE_SPLIT.split(carry + piece)
+            # The text after the last boundary may continue in the next piece
+            carry = parts.pop()
+            block.extend(parts)
+            while len(block) >= self.block_size:
+                kept = self.select(block[: self.block_size], seen)
+                block = block[self.block_size :]
+                if kept:
+                    yield ("" if first else " ") + " ".join(kept)
+                    first = False
+        if carry:
+            block.append(carry)
+        kept = self.select(block, seen) if block else []
+        if kept:
+            yield ("" if first else " ") + " ".join(kept)
+
+    def filter(self, text: str) -> str:
+        filtered = "".join(self.iter_filter([text]))
+        logging.info(
+            f"Extractive filter kept {len(filtered)} of {len(text)} characters."
+        )
+        return filtered
@@ -0,0 +1,267 @@
+# extractors.py
+import re
+import sys
+import time
+import logging
+from contextlib import ExitStack
+from typing import Iterator, Optional, Tuple
+
+LONG_ALPHA_RUN = re.compile(r"[A-Za-z]{15,}")
+
+
+class Extractor:
+    """
+    Base class for page text extractors.
+
+    ``iter_pages`` yields ``(page_num, text)`` for a 1-based inclusive page
+    range and keeps a running count of pages and seconds spent, so
+    backends can be compared from the logs.
+    """
+
+    name = ""
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.pages = 0
+        self.seconds = 0.0
+
+    @property
+    def params(self) -> str:
+        """Everything besides the file that changes the extracted text."""
+        return self.name
+
+    def page_count(self, pdf_path: str) -> int:
+        import pypdfium2
+
+        document = pypdfium2.PdfDocument(pdf_path)
+        try:
+            return len(document)
+        finally:
+            document.close()
+
+    def iter_pages(
+        self, pdf_path: str, first_page: int = 1, last_page: Optional[int] = None
+    ) -> Iterator[Tuple[int, str]]:
+        pages = self._iter_pages(pdf_path, first_page, last_page)
+        while True:
+            start = time.perf_counter()
+            page = next(pages, None)
+            self.seconds += time.perf_counter() - start
+            if page is None:
+                return
+            self.pages += 1
+            yield page
+
+    def _iter_pages(self, pdf_path, first_page, last_page):
+        raise NotImplementedError
+
+    def merge(self, other: "Extractor") -> None:
+        """Add the counters of a copy that ran in a worker process."""
+        self.pages += other.pages
+        self.seconds += other.seconds
+
+    def log_stats(self) -> None:
+        if self.pages:
+            logging.info(
+                f"{self.name} extractor: {self.pages} page(s) in "
+                f"{self.seconds:.2f}s ({1000 * self.seconds / self.pages:.1f} ms/page)."
+            )
+
+
+class PdfplumberExtractor(Extractor):
+    """pdfplumber's character-level layout engine; slow but robust."""
+
+    name = "pdfplumber"
+
+    def __init__(self, x_tolerance: float = 1, y_tolerance: float = 1) -> None:
+        super().__init__()
+        self.x_tolerance = x_tolerance
+        self.y_tolerance = y_tolerance
+
+    @property
+    def params(self) -> str:
+        return f"{self.name}:x={self.x_tolerance}:y={self.y_tolerance}"
+
+    def page_count(self, pdf_path: str) -> int:
+        import pdfplumber
+
+        with pdfplumber.open(pdf_path) as pdf:
+            return len(pdf.pages)
+
+    def extract(self, page) -> str:
+        """Text of one pdfplumber page, releasing its layout objects."""
+        try:
+            return (
+                page.extract_text(
+                    x_tolerance=self.x_tolerance, y_tolerance=self.y_tolerance
+                )
+                or ""
+            )
+        finally:
+            page.close()
+
+    def _iter_pages(self, pdf_path, first_page, last_page):
+        import pdfplumber
+
+        # Only parse the requested pages when a range is given
+        pages = None if last_page is None else range(first_page, last_page + 1)
+        with pdfplumber.open(pdf_path, pages=pages) as pdf:
+            for page in pdf.pages:
+                if page.page_number >= first_page:
+                    yield page.page_number, self.extract(page)
+
+
+class PdfiumExtractor(Extractor):
+    """PDFium's native text extraction (pypdfium2), for born-digital PDFs."""
+
+    name = "pdfium"
+
+    def _iter_pages(self, pdf_path, first_page, last_page):
+        import pypdfium2
+
+        document = pypdfium2.PdfDocument(pdf_path)
+        try:
+            last_page = len(document) if last_page is None else last_page
+            for page_num in range(first_page, last_page + 1):
+                page = document[page_num - 1]
+                textpage = page.get_textpage()
+                try:
+                    text = textpage.get_text_range()
+                finally:
+                    textpage.close()
+                    page.close()
+                yield page_num, text.replace("\r\n", "\n")
+        finally:
+            document.close()
+
+
+class PdfminerExtractor(Extractor):
+    """pdfminer.six line and word grouping, without text box ordering."""
+
+    name = "pdfminer"
+
+    def _iter_pages(self, pdf_path, first_page, last_page):
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LAParams, LTTextContainer
+
+        # boxes_flow=None skips the pairwise text box ordering, the costly
+        # part of pdfminer's layout analysis; boxes keep reading order
+        layouts = extract_pages(
+            pdf_path,
+            page_numbers=range(first_page - 1, last_page or sys.maxsize),
+            laparams=LAParams(boxes_flow=None),
+        )
+        for page_num, layout in enumerate(layouts, first_page):
+            text = "".join(
+                element.get_text()
+                for element in layout
+                if isinstance(element, LTTextContainer)
+            )
+            yield page_num, text
+
+
+class AutoExtractor(Extractor):
+    """
+    A fast extractor with per-page fallback to pdfplumber.
+
+    A page goes to the fallback when the fast result is (nearly) empty or
+    looks glued: more than ``max_glued_ratio`` of its words are alphabetic
+    runs of 15 letters or more, which spaced text almost never has.
+    """
+
+    name = "auto"
+
+    def __init__(
+        self,
+        fast: Optional[Extractor] = None,
+        fallback: Optional[PdfplumberExtractor] = None,
+        min_chars: int = 10,
+        max_glued_ratio: float = 0.05,
+    ) -> None:
+        self.fast = fast or PdfiumExtractor()
+        self.fallback = fallback or PdfplumberExtractor()
+        self.min_chars = min_chars
+        self.max_glued_ratio = max_glued_ratio
+        super().__init__()
+
+    def reset(self) -> None:
+        super().reset()
+        self.fast.reset()
+        self.fallback.reset()
+        self.fallbacks = 0
+
+    @property
+    def params(self) -> str:
+        return (
+            f"{self.name}:{self.fast.params}+{self.fallback.params}:"
+            f"min={self.min_chars}:glued={self.max_glued_ratio}"
+        )
+
+    def page_count(self, pdf_path: str) -> int:
+        return self.fast.page_count(pdf_path)
+
+    def acceptable(self, text: str) -> bool:
+        words = text.split()
+        if sum(len(word) for word in words) < self.min_chars:
+            return False
+        glued = len(LONG_ALPHA_RUN.findall(text))
+        return glued <= self.max_glued_ratio * len(words)
+
+    def _iter_pages(self, pdf_path, first_page, last_page):
+        import pdfplumber
+
+        with ExitStack() as stack:
+            pdf = None
+            for page_num, text in self.fast.iter_pages(pdf_path, first_page, last_page):
+                if not self.acceptable(text):
+                    # Opened on the first fallback only, then reused
+                    if pdf is None:
+                        pdf = stack.enter_context(pdfplumber.open(pdf_path))
+                    start = time.perf_counter()
+                    text = self.fallback.extract(pdf.pages[page_num - 1])
+                    self.fallback.seconds += time.perf_counter() - start
+                    self.fallback.pages += 1
+                    self.fallbacks += 1
+                yield page_num, text
+
+    def merge(self, other: "AutoExtractor") -> None:
+        super().merge(other)
+        self.fast.merge(other.fast)
+        self.fallback.merge(other.fallback)
+        self.fallbacks += other.fallbacks
+
+    def log_stats(self) -> None:
+        self.fast.log_stats()
+        self.fallback.log_stats()
+        if self.pages:
+            logging.info(
+                f"auto extractor: {self.fallbacks} of {self.pages} page(s) "
+                f"({100 * self.fallbacks / self.pages:.1f}%) fell back to "
+                f"{self.fallback.name}."
+            )
+
+
+EXTRACTORS = {
+    extractor.name: extractor
+    for extractor in (
+        PdfplumberExtractor,
+        PdfiumExtractor,
+        PdfminerExtractor,
+        AutoExtractor,
+    )
+}
+
+
+def get_extractor(name, x_tolerance=1, y_tolerance=1):
+    if name not in EXTRACTORS:
+        raise ValueError(
+            f"Unknown PDF extractor '{name}'; choose one of {', '.join(EXTRACTORS)}."
+        )
+    fallback = PdfplumberExtractor(x_tolerance, y_tolerance)
+    if name == PdfplumberExtractor.name:
+        return fallback
+    if name == AutoExtractor.name:
+        return AutoExtractor(fallback=fallback)
+    return EXTRACTORS[name]()
@@ -1,24 +1,185 @@
 # file_tracker.py
 import os
+import time
+import hashlib
 import logging
+import threading
+
+from .storage import connect
+
+
+def file_digest(path, block_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def known_digest(path, *known):
+    """
+    ``(size, mtime_ns, hash)`` of ``path``.
+
+    The file is only hashed when none of the ``known`` mappings (path to
+    ``(size, mtime_ns, hash)``, such as ``FileTracker.checked``) has an
+    entry matching its current size and mtime.
+    """
+    stat = os.stat(path)
+    for digests in known:
+        entry = digests.get(path)
+        if entry and entry[:2] == (stat.st_size, stat.st_mtime_ns):
+            return entry
+    return stat.st_size, stat.st_mtime_ns, file_digest(path)
 
 
 class FileTracker:
-    def __init__(self, log_file):
-        self.log_file = log_file
-        self.processed_files = self.load_processed_files()
-
-    def load_processed_files(self):
-        if os.path.exists(self.log_file):
-            with open(self.log_file, "r", encoding="utf-8") as f:
-                return set(line.strip() for line in f if line.strip())
-        return set()
-
-    def is_processed(self, filename):
-        return filename in self.processed_files
-
-    def mark_as_processed(self, filename):
-        self.processed_files.add(filename)
-        with open(self.log_file, "a", encoding="utf-8") as f:
-            f.write(f"{filename}\n")
-        logging.info(f"Marked '{filename}' as processed.")
+    """
+    Record which PDFs have been summarised, and with which settings.
+
+    Each processed file is stored with its size, mtime, content hash, the
+    model id and a fingerprint of the settings that change the summary. A
+    file whose size and mtime match its record is not read at all; any
+    other file is hashed, so a renamed or copied file is recognised by its
+    content and a changed file under the same name is processed again.
+    State lives in a SQLite database in WAL mode with indexed lookups, so
+    startup does not depend on the size of the history and concurrent runs
+    can update it safely.
+
+    Filenames from a legacy ``processed_pdfs.txt`` log are imported once and
+    treated as processed with the current settings.
+    """
+
+    def __init__(self, db_path, model_id="", fingerprint="", legacy_log=None):
+        self.db_path = db_path
+        self.model_id = model_id
+        self.fingerprint = fingerprint
+        self.lock = threading.Lock()
+        # Stat and hash of files checked by is_processed, reused when they
+        # are marked as processed
+        self.checked = {}
+        self.connection = connect(db_path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                model_id TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                processed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS files_content
+                ON files (content_hash, model_id, fingerprint);
+            CREATE TABLE IF NOT EXISTS legacy_names (name TEXT PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            """)
+        if legacy_log:
+            self.import_legacy_log(legacy_log)
+
+    def import_legacy_log(self, log_file):
+        """Import the filenames of a processed_pdfs.txt log once."""
+        if not os.path.exists(log_file):
+            return
+        stat = os.stat(log_file)
+        marker = f"{stat.st_size}:{stat.st_mtime_ns}"
+        key = f"legacy_log:{os.path.abspath(log_file)}"
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT value FROM meta WHERE key = ?", (key,)
+            ).fetchone()
+            if row and row[0] == marker:
+                return
+            with open(log_file, "r", encoding="utf-8") as f:
+                names = [(line.strip(),) for line in f if line.strip()]
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                self.connection.executemany(
+                    "INSERT OR IGNORE INTO legacy_names (name) VALUES (?)", names
+                )
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                    (key, marker),
+                )
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+        logging.info(f"Imported {len(names)} filename(s) from '{log_file}'.")
+
+    def _matches_settings(self, model_id, fingerprint):
+        return model_id == self.model_id and fingerprint == self.fingerprint
+
+    def is_processed(self, path):
+        # A file that cannot be read (deleted, a directory, no permission)
+        # must not stop the other files from being checked
+        try:
+            return self._is_processed(path)
+        except OSError as e:
+            logging.warning(f"Cannot check '{path}' ({e}); treating it as new.")
+            return False
+
+    def _is_processed(self, path):
+        stat = os.stat(path)
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT size, mtime_ns, model_id, fingerprint FROM files "
+                "WHERE path = ?",
+                (path,),
+            ).fetchone()
+        if (
+            row
+            and row[:2] == (stat.st_size, stat.st_mtime_ns)
+            and self._matches_settings(*row[2:])
+        ):
+            return True
+
+        # The stat check failed, so compare the content
+        content_hash = file_digest(path)
+        self.checked[path] = (stat.st_size, stat.st_mtime_ns, content_hash)
+        with self.lock:
+            known = self.connection.execute(
+                "SELECT 1 FROM files WHERE content_hash = ? AND model_id = ? "
+                "AND fingerprint = ? LIMIT 1",
+                (content_hash, self.model_id, self.fingerprint),
+            ).fetchone()
+            if not known and not row:
+                known = self.connection.execute(
+                    "SELECT 1 FROM legacy_names WHERE name = ?",
+                    (os.path.basename(path),),
+                ).fetchone()
+        if known:
+            # Same content under a new name or mtime: record it so the next
+            # run only needs the stat check
+            self._record(path, stat.st_size, stat.st_mtime_ns, content_hash)
+            return True
+        return False
+
+    def mark_as_processed(self, path):
+        stat = os.stat(path)
+        checked = self.checked.pop(path, None)
+        if checked and checked[:2] == (stat.st_size, stat.st_mtime_ns):
+            content_hash = checked[2]
+        else:
+            content_hash = file_digest(path)
+        self._record(path, stat.st_size, stat.st_mtime_ns, content_hash)
+        logging.info(f"Marked '{os.path.basename(path)}' as processed.")
+
+    def _record(self, path, size, mtime_ns, content_hash):
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, content_hash, "
+                "model_id, fingerprint, processed_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    path,
+                    size,
+                    mtime_ns,
+                    content_hash,
+                    self.model_id,
+                    self.fingerprint,
+                    time.time(),
+                ),
+            )
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
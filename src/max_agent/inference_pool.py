@@ -0,0 +1,156 @@
+# inference_pool.py
+import os
+import time
+import queue
+import signal
+import logging
+import itertools
+import threading
+import multiprocessing
+
+
+def _worker_main(summariser, worker, tasks, results, threads, cpus):
+    """Inference loop of one forked worker; it inherits the loaded model."""
+    # Ctrl-C is for the parent, which stops the workers through their queues;
+    # close() only signals workers that do not stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    if cpus:
+        os.sched_setaffinity(0, cpus)
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        job_id, texts, budgets, token_ids, retries, delay = task
+        start = time.perf_counter()
+        try:
+            summaries = summariser._generate_with_retries(
+                texts, budgets, retries=retries, delay=delay, token_ids=token_ids
+            )
+        except Exception as e:
+            results.put((worker, job_id, None, 0.0, repr(e)))
+        else:
+            results.put((worker, job_id, summaries, time.perf_counter() - start, None))
+
+
+class InferencePool:
+    """
+    Inference workers forked from a process that has the model loaded.
+
+    Forking after the load shares the weights copy-on-write, and inference
+    never writes to them, so each worker adds little more than its own
+    activations. Every worker runs ``threads`` torch threads, pinned to its
+    own slice of the available cores when there are enough of them. Batches
+    go to the worker with the fewest tokens outstanding, at most
+    ``max_inflight`` batches per worker, so a worker stuck on a long batch
+    does not hold up the queue.
+
+    The pool must be started before the parent runs any inference, since
+    OpenMP thread pools do not survive a fork.
+    """
+
+    def __init__(self, summariser, workers, threads=None, pin=True, max_inflight=2):
+        context = multiprocessing.get_context("fork")
+        cores = sorted(os.sched_getaffinity(0))
+        self.threads = threads or max(1, len(cores) // workers)
+        self.max_inflight = max_inflight
+        self.pinned = pin and workers * self.threads <= len(cores)
+        self.results = context.Queue()
+        self.tasks = []
+        self.processes = []
+        for worker in range(workers):
+            cpus = None
+            if self.pinned:
+                cpus = cores[worker * self.threads : (worker + 1) * self.threads]
+            tasks = context.SimpleQueue()
+            process = context.Process(
+                target=_worker_main,
+                args=(summariser, worker, tasks, self.results, self.threads, cpus),
+                name=f"max-agent-inference-{worker}",
+                daemon=True,
+            )
+            process.start()
+            self.tasks.append(tasks)
+            self.processes.append(process)
+        self.load = [0] * workers
+        self.inflight = [0] * workers
+        self.jobs = {}
+        self.job_ids = itertools.count()
+        self.lock = threading.Lock()
+        logging.info(
+            f"Started {workers} inference worker(s) with {self.threads} thread(s) "
+            f"each{' (pinned)' if self.pinned else ''}."
+        )
+
+    def _least_loaded(self):
+        free = [
+            worker
+            for worker in range(len(self.processes))
+            if self.inflight[worker] < self.max_inflight
+        ]
+        return min(free, key=lambda worker: self.load[worker]) if free else None
+
+    def _next_result(self):
+        while True:
+            try:
+                return self.results.get(timeout=1.0)
+            except queue.Empty:
+                for process in self.processes:
+                    if not process.is_alive():
+                        raise RuntimeError(
+                            f"Inference worker '{process.name}' exited "
+                            f"with code {process.exitcode}."
+                        )
+
+    def run(self, jobs):
+        """
+        Run ``(texts, budgets, token_ids, retries, delay, cost)`` jobs.
+
+        Yields ``(job_index, summaries, seconds)`` as jobs complete, which
+        is not necessarily in job order. ``cost`` (the batch's token count)
+        is what load balancing counts.
+        """
+        jobs = list(jobs)
+        with self.lock:
+            pending = {}
+            next_job = 0
+            while next_job < len(jobs) or pending:
+                while next_job < len(jobs):
+                    worker = self._least_loaded()
+                    if worker is None:
+                        break
+                    *task, cost = jobs[next_job]
+                    job_id = next(self.job_ids)
+                    self.jobs[job_id] = (worker, cost)
+                    self.load[worker] += cost
+                    self.inflight[worker] += 1
+                    pending[job_id] = next_job
+                    self.tasks[worker].put((job_id, *task))
+                    next_job += 1
+
+                worker, job_id, summaries, elapsed, error = self._next_result()
+                worker, cost = self.jobs.pop(job_id)
+                self.load[worker] -= cost
+                self.inflight[worker] -= 1
+                if job_id not in pending:
+                    # Left over from a run whose caller stopped early
+                    continue
+                index = pending.pop(job_id)
+                if error is not None:
+                    raise RuntimeError(f"Inference worker {worker} failed: {error}")
+                yield index, summaries, elapsed
+
+    def close(self):
+        for tasks in self.tasks:
+            tasks.put(None)
+        for process in self.processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        self.results.close()
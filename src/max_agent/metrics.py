@@ -0,0 +1,273 @@
+# metrics.py
+import io
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# The report that spans and counters of the running code are added to; it
+# is unset unless metrics are enabled, which makes them no-ops
+_report = contextvars.ContextVar("max_agent_report", default=None)
+
+
+def peak_rss_bytes():
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Report:
+    """
+    Stage timings and counters of one document, or of the documents that
+    were summarised together in one pipeline group.
+    """
+
+    def __init__(self, documents=()):
+        self.documents = list(documents)
+        self.started = time.time()
+        self.start = time.perf_counter()
+        self.seconds = None
+        self.peak_rss = None
+        self.spans = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def add_span(self, name, seconds, calls=1):
+        with self.lock:
+            total, count = self.spans.get(name, (0.0, 0))
+            self.spans[name] = (total + seconds, count + calls)
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def snapshot(self):
+        """Spans and counters, picklable for reports from worker processes."""
+        with self.lock:
+            return dict(self.spans), dict(self.counters)
+
+    def merge(self, snapshot):
+        spans, counters = snapshot
+        for name, (seconds, calls) in spans.items():
+            self.add_span(name, seconds, calls)
+        for name, value in counters.items():
+            self.count(name, value)
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self.start
+        self.peak_rss = peak_rss_bytes()
+
+    def as_dict(self):
+        spans, counters = self.snapshot()
+        report = {
+            "documents": self.documents,
+            "started": self.started,
+            "seconds": self.seconds,
+            "peak_rss_bytes": self.peak_rss,
+            "stages": {
+                name: {"seconds": round(seconds, 6), "calls": calls}
+                for name, (seconds, calls) in spans.items()
+            },
+            "counters": counters,
+        }
+        extract = spans.get("extract", (0.0, 0))[0]
+        if extract and counters.get("pages"):
+            report["pages_per_second"] = counters["pages"] / extract
+        if counters.get("model_chunks"):
+            report["model_seconds_per_chunk"] = (
+                counters["model_seconds"] / counters["model_chunks"]
+            )
+        return report
+
+
+def current():
+    return _report.get()
+
+
+@contextmanager
+def recording(report):
+    """Add the spans and counters of the enclosed code to ``report``."""
+    token = _report.set(report)
+    try:
+        yield report
+    finally:
+        _report.reset(token)
+
+
+class span:
+    """Time the enclosed block as stage ``name`` of the current report."""
+
+    __slots__ = ("name", "report", "start")
+
+    def __init__(self, name):
+        self.name = name
+        self.report = _report.get()
+
+    def __enter__(self):
+        if self.report is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.report is not None:
+            self.report.add_span(self.name, time.perf_counter() - self.start)
+
+
+def count(name, value=1):
+    report = _report.get()
+    if report is not None:
+        report.count(name, value)
+
+
+def timed(items, name, counter=None):
+    """
+    Yield from ``items``, timing every step as stage ``name`` and counting
+    the items as ``counter``; for stages that run inside an iterator.
+    """
+    report = _report.get()
+    items = iter(items)
+    while True:
+        start = time.perf_counter()
+        item = next(items, _END)
+        report.add_span(name, time.perf_counter() - start)
+        if item is _END:
+            return
+        if counter:
+            report.count(counter)
+        yield item
+
+
+_END = object()
+
+
+class MetricsWriter:
+    """
+    Write each finished report to ``<directory>/<document>.json`` and keep
+    run totals in ``<directory>/max_agent.prom``, in the Prometheus text
+    format (e.g. for node_exporter's textfile collector). Documents that
+    were summarised together share one report.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.documents = 0
+        self.seconds = 0.0
+        self.stages = {}
+        self.counters = {}
+        self.peak_rss = 0
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _write(self, path, text):
+        staging = f"{path}.tmp"
+        with open(staging, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(staging, path)
+
+    def write(self, report):
+        report.finish()
+        data = report.as_dict()
+        text = json.dumps(data, indent=2)
+        for document in report.documents:
+            name = os.path.splitext(os.path.basename(document))[0]
+            self._write(os.path.join(self.directory, f"{name}.json"), text)
+        with self.lock:
+            self.documents += len(report.documents)
+            self.seconds += report.seconds
+            for stage, values in data["stages"].items():
+                self.stages[stage] = self.stages.get(stage, 0.0) + values["seconds"]
+            for name, value in data["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            self.peak_rss = max(self.peak_rss, report.peak_rss)
+            self._write(
+                os.path.join(self.directory, "max_agent.prom"), self.prometheus()
+            )
+        logging.info(
+            f"Metrics for {', '.join(report.documents)}: {report.seconds:.2f}s, "
+            + ", ".join(
+                f"{stage} {values['seconds']:.2f}s"
+                for stage, values in data["stages"].items()
+            )
+        )
+
+    def prometheus(self):
+        lines = [
+            "# HELP max_agent_documents_total Documents summarised.",
+            "# TYPE max_agent_documents_total counter",
+            f"max_agent_documents_total {self.documents}",
+            "# HELP max_agent_seconds_total Wall-clock seconds spent on documents.",
+            "# TYPE max_agent_seconds_total counter",
+            f"max_agent_seconds_total {self.seconds:.6f}",
+            "# HELP max_agent_stage_seconds_total Seconds spent per stage.",
+            "# TYPE max_agent_stage_seconds_total counter",
+        ]
+        lines.extend(
+            f'max_agent_stage_seconds_total{{stage="{stage}"}} {seconds:.6f}'
+            for stage, seconds in sorted(self.stages.items())
+        )
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"# TYPE max_agent_{name}_total counter")
+            lines.append(f"max_agent_{name}_total {value}")
+        lines.extend(
+            [
+                "# HELP max_agent_peak_rss_bytes Peak resident set size.",
+                "# TYPE max_agent_peak_rss_bytes gauge",
+                f"max_agent_peak_rss_bytes {self.peak_rss}",
+            ]
+        )
+        return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def profiled(path, top=25):
+    """
+    Run the enclosed code under cProfile, including threads started in it,
+    and save the combined stats to ``path`` (for ``python -m pstats`` or
+    snakeviz). Forked worker processes are not profiled. On Python 3.12 and
+    later only one profiler can be active at a time, so threads started in
+    the enclosed code get no profiler of their own there.
+    """
+    profiles = []
+    per_thread = sys.version_info < (3, 12)
+
+    def start_thread_profile(frame, event, arg):
+        # Called once in each new thread; the profiler then takes over
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        profiles.append(profile)
+        profile.enable()
+
+    main = cProfile.Profile()
+    if per_thread:
+        threading.setprofile(start_thread_profile)
+    else:
+        logging.info("Profiling the main thread only on this Python version.")
+    main.enable()
+    try:
+        yield
+    finally:
+        main.disable()
+        if per_thread:
+            threading.setprofile(None)
+        stream = io.StringIO()
+        stats = pstats.Stats(main, stream=stream)
+        for profile in profiles:
+            profile.disable()
+            stats.add(profile)
+        stats.dump_stats(path)
+        logging.info(f"Profile of {len(profiles) + 1} thread(s) saved to '{path}'.")
+        stats.sort_stats("cumulative").print_stats(top)
+        logging.info(stream.getvalue())
@@ -0,0 +1,166 @@
+# micro_batcher.py
+import time
+import queue
+import logging
+import threading
+
+
+class MicroBatcher:
+    """
+    Inference dispatch shared by concurrent callers of one Summariser.
+
+    It stands in for ``Summariser.pool`` and offers the same ``run(jobs)``
+    interface as InferencePool, but may be called from many threads at
+    once. Jobs (batches planned by each caller's ``iter_summaries``) are
+    queued to a single inference thread, which waits up to ``max_wait``
+    seconds for more work once a job arrives and merges queued jobs into
+    shared ``generate`` calls of at most ``batch_size`` chunks and
+    ``max_batch_tokens`` tokens. A request with a single chunk therefore
+    shares a batch with whatever else is in flight instead of running
+    alone. With an InferencePool behind it (``inner``), several merged
+    batches are handed to the pool at once.
+    """
+
+    def __init__(self, summariser, max_wait=0.01, inner=None):
+        self.summariser = summariser
+        self.max_wait = max_wait
+        self.inner = inner
+        self.batch_size = summariser.batch_size
+        self.max_batch_tokens = summariser.max_batch_tokens
+        self.queue = queue.Queue()
+        self.jobs = 0
+        self.batches = 0
+        self.chunks = 0
+        self.thread = threading.Thread(
+            target=self._loop, name="max-agent-micro-batcher", daemon=True
+        )
+        self.thread.start()
+
+    def run(self, jobs):
+        """
+        Run ``(texts, budgets, token_ids, retries, delay, cost)`` jobs.
+
+        Yields ``(job_index, summaries, seconds)`` as jobs complete; closing
+        the generator drops the caller's jobs that have not started yet.
+        """
+        results = queue.Queue()
+        cancelled = threading.Event()
+        jobs = list(jobs)
+        for index, job in enumerate(jobs):
+            self.queue.put((index, job, results, cancelled))
+        try:
+            for _ in range(len(jobs)):
+                index, summaries, elapsed, error = results.get()
+                if error is not None:
+                    raise RuntimeError(f"Inference failed: {error}")
+                yield index, summaries, elapsed
+        finally:
+            cancelled.set()
+
+    def _collect(self, first):
+        """``first`` plus the jobs that arrive within ``max_wait``."""
+        waiting = [first]
+        rows = len(first[1][0])
+        deadline = time.monotonic() + self.max_wait
+        while rows < self.batch_size:
+            try:
+                item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is None:
+                # Closing; run what was collected first
+                self.queue.put(None)
+                break
+            waiting.append(item)
+            rows += len(item[1][0])
+        return [item for item in waiting if not item[3].is_set()]
+
+    def _merge(self, waiting):
+        """Pack queued jobs, in arrival order, into merged batches."""
+        batches = []
+        batch, rows, tokens = [], 0, 0
+        for item in waiting:
+            texts, _, _, _, _, cost = item[1]
+            if batch and (
+                rows + len(texts) > self.batch_size
+                or tokens + cost > self.max_batch_tokens
+            ):
+                batches.append(batch)
+                batch, rows, tokens = [], 0, 0
+            batch.append(item)
+            rows += len(texts)
+            tokens += cost
+        if batch:
+            batches.append(batch)
+        return batches
+
+    @staticmethod
+    def _merged_job(batch):
+        token_ids = [job[2] for _, job, _, _ in batch]
+        return (
+            [text for _, job, _, _ in batch for text in job[0]],
+            [budget for _, job, _, _ in batch for budget in job[1]],
+            (
+                None
+                if any(ids is None for ids in token_ids)
+                else [row for ids in token_ids for row in ids]
+            ),
+            max(job[3] for _, job, _, _ in batch),
+            min(job[4] for _, job, _, _ in batch),
+            sum(job[5] for _, job, _, _ in batch),
+        )
+
+    def _generate(self, merged):
+        """Yield ``(batch_index, summaries, seconds)`` for merged jobs."""
+        if self.inner is not None:
+            yield from self.inner.run(merged)
+            return
+        for index, (texts, budgets, token_ids, retries, delay, _) in enumerate(merged):
+            start = time.perf_counter()
+            summaries = self.summariser._generate_with_retries(
+                texts, budgets, retries=retries, delay=delay, token_ids=token_ids
+            )
+            yield index, summaries, time.perf_counter() - start
+
+    def _loop(self):
+        while True:
+            first = self.queue.get()
+            if first is None:
+                return
+            batches = self._merge(self._collect(first))
+            if not batches:
+                continue
+            merged = [self._merged_job(batch) for batch in batches]
+            done = set()
+            try:
+                for index, summaries, elapsed in self._generate(merged):
+                    done.add(index)
+                    offset = 0
+                    for job_index, job, results, _ in batches[index]:
+                        count = len(job[0])
+                        summary_slice = summaries[offset : offset + count]
+                        results.put((job_index, summary_slice, elapsed, None))
+                        offset += count
+                    self.batches += 1
+                    self.jobs += len(batches[index])
+                    self.chunks += offset
+            except Exception as e:
+                logging.error(f"Micro-batch failed: {e}")
+                for index, batch in enumerate(batches):
+                    if index in done:
+                        continue
+                    for job_index, _, results, _ in batch:
+                        results.put((job_index, None, 0.0, repr(e)))
+
+    def log_stats(self):
+        if self.batches:
+            logging.info(
+                f"Micro-batching: {self.jobs} job(s) merged into {self.batches} "
+                f"batch(es), {self.chunks / self.batches:.1f} chunk(s) per batch."
+            )
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        if self.inner is not None:
+            self.inner.close()
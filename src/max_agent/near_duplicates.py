@@ -0,0 +1,167 @@
+# near_duplicates.py
+import re
+import zlib
+import hashlib
+import logging
+import threading
+
+import numpy as np
+
+from .storage import connect
+
+WORD = re.compile(r"\w+")
+
+
+class NearDuplicateIndex:
+    """
+    Persistent MinHash LSH index of summarised chunks.
+
+    Each chunk is reduced to a MinHash signature over word ``shingle``-grams
+    and stored with its summary. The signature is split into ``bands``
+    bands, and chunks that share any band bucket become candidates whose
+    Jaccard similarity is then estimated from the full signatures. A chunk
+    whose best candidate reaches ``threshold`` reuses that summary. With
+    the defaults (128 permutations, 16 bands of 8 rows) a pair at 0.9
+    similarity collides with probability above 0.9999, while pairs below
+    0.5 rarely become candidates.
+
+    Entries are scoped (model, backend and length ratios), so a summary is
+    only reused for the same kind of request. Buckets live in an indexed
+    SQLite table, so a lookup costs ``bands`` index probes however many
+    chunks are stored.
+    """
+
+    def __init__(
+        self,
+        path,
+        threshold=0.9,
+        num_perm=128,
+        bands=16,
+        shingle=3,
+        max_candidates=32,
+        seed=1,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands.")
+        self.path = path
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle = shingle
+        self.max_candidates = max_candidates
+        # Multiply-shift hash functions, one per permutation
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(0, 2**63, size=num_perm, dtype=np.int64).astype(
+            np.uint64
+        ) | np.uint64(1)
+        self.b = rng.randint(0, 2**63, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self.lookups = 0
+        self.reused = 0
+        self.lock = threading.Lock()
+        self.connection = connect(path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY,
+                signature BLOB NOT NULL,
+                summary TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS buckets (
+                bucket INTEGER NOT NULL,
+                chunk_id INTEGER NOT NULL,
+                PRIMARY KEY (bucket, chunk_id)
+            ) WITHOUT ROWID;
+            """)
+
+    def signature(self, text):
+        words = WORD.findall(text.lower()) or [""]
+        word_hashes = np.fromiter(
+            (zlib.crc32(word.encode("utf-8")) for word in words),
+            dtype=np.uint64,
+            count=len(words),
+        )
+        # Rolling hash of each run of ``shingle`` consecutive words
+        size = min(self.shingle, len(words))
+        shingles = np.zeros(len(words) - size + 1, dtype=np.uint64)
+        for offset in range(size):
+            shingles = (shingles * np.uint64(1000003)) ^ word_hashes[
+                offset : offset + len(shingles)
+            ]
+        hashes = np.unique(shingles & np.uint64(0xFFFFFFFF))
+        # uint64 arithmetic wraps around, which multiply-shift relies on
+        permuted = np.multiply.outer(self.a, hashes)
+        permuted += self.b[:, None]
+        permuted >>= np.uint64(32)
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _buckets(self, signature, scope):
+        buckets = []
+        for band, rows in enumerate(np.split(signature, self.bands)):
+            digest = hashlib.blake2b(
+                rows.tobytes(), digest_size=8, person=f"{band}".encode("utf-8")
+            )
+            digest.update(scope.encode("utf-8"))
+            buckets.append(int.from_bytes(digest.digest(), "big", signed=True))
+        return buckets
+
+    def lookup(self, text, scope):
+        """Return the summary of a stored near-duplicate of ``text``, or None."""
+        return self.lookup_many([text], scope)[0]
+
+    def lookup_many(self, texts, scope):
+        results = []
+        with self.lock:
+            for text in texts:
+                signature = self.signature(text)
+                buckets = self._buckets(signature, scope)
+                rows = self.connection.execute(
+                    "SELECT signature, summary FROM chunks WHERE id IN ("
+                    "SELECT DISTINCT chunk_id FROM buckets WHERE bucket IN "
+                    f"({','.join('?' * len(buckets))}) LIMIT ?)",
+                    (*buckets, self.max_candidates),
+                ).fetchall()
+                best, best_summary = 0.0, None
+                for stored, summary in rows:
+                    similarity = np.mean(
+                        np.frombuffer(stored, dtype=np.uint32) == signature
+                    )
+                    if similarity > best:
+                        best, best_summary = similarity, summary
+                results.append(best_summary if best >= self.threshold else None)
+            self.lookups += len(texts)
+            self.reused += sum(summary is not None for summary in results)
+        return results
+
+    def add_many(self, items, scope):
+        """Index ``(text, summary)`` pairs."""
+        rows = [(self.signature(text), summary) for text, summary in items if summary]
+        if not rows:
+            return
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                for signature, summary in rows:
+                    chunk_id = self.connection.execute(
+                        "INSERT INTO chunks (signature, summary) VALUES (?, ?)",
+                        (signature.tobytes(), summary),
+                    ).lastrowid
+                    buckets = self._buckets(signature, scope)
+                    self.connection.executemany(
+                        "INSERT OR IGNORE INTO buckets (bucket, chunk_id) "
+                        "VALUES (?, ?)",
+                        [(bucket, chunk_id) for bucket in buckets],
+                    )
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+
+    def log_stats(self):
+        rate = 100.0 * self.reused / self.lookups if self.lookups else 0.0
+        logging.info(
+            f"Near-duplicate index: {self.reused} of {self.lookups} chunk(s) "
+            f"reused an earlier summary ({rate:.1f}% of inference avoided)."
+        )
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
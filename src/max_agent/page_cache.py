@@ -0,0 +1,215 @@
+# page_cache.py
+import time
+import zlib
+import logging
+import threading
+
+from .storage import cache_size_schema, connect, evict_to_budget
+
+
+class RawPageCache:
+    """
+    Persistent, compressed cache of raw extracted page text.
+
+    Pages are keyed by the PDF's content hash, the page number and the
+    extraction parameters (backend and tolerances), and stored
+    zlib-compressed in a SQLite database in WAL mode. A document is only
+    served from the cache once all of its pages were stored, and its pages
+    are then read back one at a time. When the compressed pages exceed
+    ``max_bytes``, pages of extractions that never finished are dropped
+    first (those started within ``stale_seconds`` may still be running, in
+    this or another process), then the least recently used documents as a
+    whole.
+    """
+
+    def __init__(self, path, max_bytes=1024 * 1024 * 1024, level=6, stale_seconds=3600):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stale_seconds = stale_seconds
+        self.level = level
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.connection = connect(path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                pdf_hash TEXT NOT NULL,
+                params TEXT NOT NULL,
+                page_count INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (pdf_hash, params)
+            );
+            CREATE INDEX IF NOT EXISTS documents_last_access
+                ON documents (last_access);
+            CREATE TABLE IF NOT EXISTS pages (
+                pdf_hash TEXT NOT NULL,
+                params TEXT NOT NULL,
+                page_num INTEGER NOT NULL,
+                text BLOB NOT NULL,
+                PRIMARY KEY (pdf_hash, params, page_num)
+            ) WITHOUT ROWID;
+            -- Extractions in progress, whose pages eviction leaves alone
+            CREATE TABLE IF NOT EXISTS extractions (
+                pdf_hash TEXT NOT NULL,
+                params TEXT NOT NULL,
+                started REAL NOT NULL,
+                PRIMARY KEY (pdf_hash, params)
+            );
+            """)
+        self.connection.executescript(cache_size_schema("pages", "text", "length"))
+
+    def has_document(self, pdf_hash, params):
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT 1 FROM documents WHERE pdf_hash = ? AND params = ?",
+                (pdf_hash, params),
+            ).fetchone()
+            if row:
+                self.connection.execute(
+                    "UPDATE documents SET last_access = ? "
+                    "WHERE pdf_hash = ? AND params = ?",
+                    (time.time(), pdf_hash, params),
+                )
+                self.hits += 1
+            else:
+                self.misses += 1
+        return row is not None
+
+    def iter_pages(self, pdf_hash, params):
+        """Yield ``(page_num, text)`` for a cached document, one page at a time."""
+        page_num = 0
+        while True:
+            with self.lock:
+                row = self.connection.execute(
+                    "SELECT page_num, text FROM pages WHERE pdf_hash = ? "
+                    "AND params = ? AND page_num > ? ORDER BY page_num LIMIT 1",
+                    (pdf_hash, params, page_num),
+                ).fetchone()
+            if row is None:
+                return
+            page_num = row[0]
+            yield page_num, zlib.decompress(row[1]).decode("utf-8")
+
+    def start_document(self, pdf_hash, params):
+        """Register an extraction whose pages are about to be stored."""
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO extractions (pdf_hash, params, started) "
+                "VALUES (?, ?, ?)",
+                (pdf_hash, params, time.time()),
+            )
+
+    def put_page(self, pdf_hash, params, page_num, text):
+        data = zlib.compress(text.encode("utf-8"), self.level)
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO pages (pdf_hash, params, page_num, text) "
+                "VALUES (?, ?, ?, ?)",
+                (pdf_hash, params, page_num, data),
+            )
+
+    def finish_document(self, pdf_hash, params, page_count):
+        """Mark a document complete once all its pages are stored, then evict."""
+        key = (pdf_hash, params)
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                self.connection.execute(
+                    "DELETE FROM extractions WHERE pdf_hash = ? AND params = ?", key
+                )
+                (stored,) = self.connection.execute(
+                    "SELECT COUNT(*) FROM pages WHERE pdf_hash = ? AND params = ?",
+                    key,
+                ).fetchone()
+                if stored == page_count:
+                    self.connection.execute(
+                        "INSERT OR REPLACE INTO documents "
+                        "(pdf_hash, params, page_count, last_access) "
+                        "VALUES (?, ?, ?, ?)",
+                        (pdf_hash, params, page_count, time.time()),
+                    )
+                else:
+                    # Some pages were evicted while the document was extracted
+                    self.connection.execute(
+                        "DELETE FROM pages WHERE pdf_hash = ? AND params = ?", key
+                    )
+                self._evict()
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+
+    def abandon_document(self, pdf_hash, params):
+        """Drop the pages of an extraction that will not finish."""
+        key = (pdf_hash, params)
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                self.connection.execute(
+                    "DELETE FROM extractions WHERE pdf_hash = ? AND params = ?", key
+                )
+                # Another process may have finished the same document
+                self.connection.execute(
+                    "DELETE FROM pages WHERE pdf_hash = ? AND params = ? "
+                    "AND NOT EXISTS (SELECT 1 FROM documents "
+                    "WHERE pdf_hash = ? AND params = ?)",
+                    key + key,
+                )
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+
+    def _evict_orphans(self):
+        """
+        Drop pages that no document references and no recent extraction is
+        still adding to, such as those of a process that was killed.
+        """
+        stale = time.time() - self.stale_seconds
+        self.connection.execute("DELETE FROM extractions WHERE started < ?", (stale,))
+        return self.connection.execute(
+            "DELETE FROM pages WHERE NOT EXISTS (SELECT 1 FROM documents d "
+            "WHERE d.pdf_hash = pages.pdf_hash AND d.params = pages.params) "
+            "AND NOT EXISTS (SELECT 1 FROM extractions e "
+            "WHERE e.pdf_hash = pages.pdf_hash AND e.params = pages.params)"
+        ).rowcount
+
+    def _evict_oldest_document(self):
+        row = self.connection.execute(
+            "SELECT pdf_hash, params FROM documents ORDER BY last_access LIMIT 1"
+        ).fetchone()
+        if row is None:
+            # Only pages of documents still being extracted are left
+            return 0
+        self.connection.execute(
+            "DELETE FROM pages WHERE pdf_hash = ? AND params = ?", row
+        )
+        self.connection.execute(
+            "DELETE FROM documents WHERE pdf_hash = ? AND params = ?", row
+        )
+        return 1
+
+    def _evict(self):
+        # Unfinished extractions go first, then the oldest documents
+        counts = evict_to_budget(
+            self.connection,
+            self.max_bytes,
+            self._evict_orphans,
+            self._evict_oldest_document,
+        )
+        if counts is None:
+            return
+        orphans, evicted = counts
+        if orphans:
+            logging.info(f"Raw page cache evicted {orphans} unfinished page(s).")
+        logging.info(f"Raw page cache evicted {evicted} document(s).")
+
+    def log_stats(self):
+        logging.info(
+            f"Raw page cache: {self.hits} document(s) served from cache, "
+            f"{self.misses} extracted."
+        )
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
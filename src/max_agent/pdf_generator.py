@@ -1,66 +1,132 @@
 # pdf_generator.py
 import os
 import logging
-from fpdf import FPDF
+import threading
 import unicodedata
+from collections import OrderedDict
+
 import regex
+import fpdf.fpdf
+from fpdf import FPDF
+from fpdf.ttfonts import TTFontFile
+
+FONT_STYLES = {
+    "": "DejaVuSans.ttf",
+    "B": "DejaVuSans-Bold.ttf",
+    "I": "DejaVuSans-Oblique.ttf",
+    "BI": "DejaVuSans-BoldOblique.ttf",
+}
+
+# ASCII control characters other than the newline; everything else outside
+# ASCII is dropped when encoding
+SANITISE_TABLE = {
+    code: None for code in list(range(0x00, 0x20)) + [0x7F] if code != ord("\n")
+}
+
+# Private Use Area (BMP PUA: U+E000 to U+F8FF), used for icon font glyphs
+PUA_PATTERN = regex.compile(r"[\uE000-\uF8FF]")
+
+_fonts = {}
+_fonts_lock = threading.Lock()
+_putfonts_lock = threading.Lock()
+
+
+class CachedTTFontFile(TTFontFile):
+    """TTFontFile whose font subsets are built once per process."""
+
+    subsets = OrderedDict()
+    max_subsets = 64
+    lock = threading.Lock()
+
+    def makeSubset(self, file, subset):
+        # Subsets do not depend on the order characters were first used in
+        key = (file, tuple(sorted(set(subset))))
+        with self.lock:
+            cached = self.subsets.get(key)
+            if cached is not None:
+                self.subsets.move_to_end(key)
+        if cached is None:
+            stream = super().makeSubset(file, subset)
+            cached = (stream, self.codeToGlyph, self.maxUni)
+            with self.lock:
+                self.subsets[key] = cached
+                if len(self.subsets) > self.max_subsets:
+                    self.subsets.popitem(last=False)
+        stream, self.codeToGlyph, self.maxUni = cached
+        return stream
+
+
+class SummaryPDF(FPDF):
+    def header(self):
+        # Ensure fonts are registered before setting them
+        self.set_font("DejaVuSans", "B", 14)
+        self.cell(
+            0,
+            10,
+            "Summarised PDF by Max_Agent",
+            border=False,
+            ln=True,
+            align="C",
+        )
+        self.ln(10)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font("DejaVuSans", "I", 8)
+        self.cell(0, 10, f"Page {self.page_no()}", 0, 0, "C")
+
+    def _putfonts(self):
+        # fpdf builds a TTFontFile from its module globals to subset each font
+        with _putfonts_lock:
+            fpdf.fpdf.TTFontFile = CachedTTFontFile
+            try:
+                super()._putfonts()
+            finally:
+                fpdf.fpdf.TTFontFile = TTFontFile
+
+
+def registered_fonts(font_dir):
+    """
+    The four DejaVuSans fonts as registered with fpdf, loaded once per
+    process; each document gets its own copy of the mutable parts.
+    """
+    with _fonts_lock:
+        if font_dir not in _fonts:
+            logging.info("Registering DejaVuSans fonts...")
+            pdf = SummaryPDF()
+            for style, filename in FONT_STYLES.items():
+                pdf.add_font(
+                    "DejaVuSans", style, os.path.join(font_dir, filename), uni=True
+                )
+            _fonts[font_dir] = (pdf.fonts, pdf.font_files)
+            logging.info("DejaVuSans fonts registered successfully.")
+        fonts, font_files = _fonts[font_dir]
+    # Character widths are shared; the subset grows with the document
+    return (
+        {key: dict(font, subset=list(font["subset"])) for key, font in fonts.items()},
+        {key: dict(font_file) for key, font_file in font_files.items()},
+    )
 
 
 class PDFGenerator:
+    """
+    Render summaries into PDFs, one fresh document per output file.
+
+    The parsed fonts and their embedded subsets are cached per process, so
+    rendering time depends only on the summary, not on how many documents
+    were rendered before it.
+    """
+
     def __init__(self, font_dir):
         self.font_dir = font_dir
         self.pdf = self.setup_pdf()
 
     def setup_pdf(self):
-        class PDF(FPDF):
-            def header(self):
-                # Ensure fonts are registered before setting them
-                self.set_font("DejaVuSans", "B", 14)
-                self.cell(
-                    0,
-                    10,
-                    "Summarised PDF by Max_Agent",
-                    border=False,
-                    ln=True,
-                    align="C",
-                )
-                self.ln(10)
-
-            def footer(self):
-                self.set_y(-15)
-                self.set_font("DejaVuSans", "I", 8)
-                self.cell(0, 10, f"Page {self.page_no()}", 0, 0, "C")
-
-        pdf = PDF()
+        pdf = SummaryPDF()
 
         # Register fonts
         try:
-            logging.info("Registering DejaVuSans fonts...")
-            pdf.add_font(
-                "DejaVuSans",
-                "",
-                os.path.join(self.font_dir, "DejaVuSans.ttf"),
-                uni=True,
-            )
-            pdf.add_font(
-                "DejaVuSans",
-                "B",
-                os.path.join(self.font_dir, "DejaVuSans-Bold.ttf"),
-                uni=True,
-            )
-            pdf.add_font(
-                "DejaVuSans",
-                "I",
-                os.path.join(self.font_dir, "DejaVuSans-Oblique.ttf"),
-                uni=True,
-            )
-            pdf.add_font(
-                "DejaVuSans",
-                "BI",
-                os.path.join(self.font_dir, "DejaVuSans-BoldOblique.ttf"),
-                uni=True,
-            )
-            logging.info("DejaVuSans fonts registered successfully.")
+            pdf.fonts, pdf.font_files = registered_fonts(self.font_dir)
         except Exception as e:
             logging.error(f"Failed to add fonts: {e}")
             raise
@@ -86,49 +152,34 @@ class PDFGenerator:
         Returns:
         - str: The sanitized text with PUA characters replaced.
         """
-        # Define PUA range in Unicode (BMP PUA: U+E000 to U+F8FF)
-        pua_pattern = regex.compile(r"[\uE000-\uF8FF]")
-
-        # Replace each PUA character with the replacement character
-        sanitized_text = pua_pattern.sub(replacement, text)
+        return PUA_PATTERN.sub(replacement, text)
 
-        logging.debug(f"Replaced PUA characters with '{replacement}'.")
-        return sanitized_text
-
-        # Trying to avoid unicode characters causing list index out of range errors
-
-    def remove_non_ascii(self, text):
-        return "".join(ch for ch in text if ord(ch) < 128)
-
-    def add_text(self, text):
-        # Normalize text
-        text = unicodedata.normalize("NFKD", text)
-        text = "".join(c for c in text if c.isprintable())
-
-        # Replace multiple newlines with single newline
-        text = regex.sub(r"\n+", "\n", text).strip()
+    def sanitise(self, text):
+        """
+        Reduce ``text`` to printable ASCII and newlines.
 
-        # Replace PUA characters
+        Characters are decomposed first, so accented letters keep their
+        base letter, and Private Use Area glyphs become ``#``.
+        """
+        text = unicodedata.normalize("NFKD", text).translate(SANITISE_TABLE)
         text = self.replace_pua_characters(text)
+        text = text.encode("ascii", "ignore").decode("ascii")
+        # Replace multiple newlines with single newline
+        return regex.sub(r"\n+", "\n", text).strip()
 
-        # Remove all non-ASCII characters as a last resort
-        text = self.remove_non_ascii(text)
-
-        logging.debug(f"Final sanitized text sample: {text[:100]}")
-
-        lines = text.split("\n")
-        logging.debug(f"Number of lines to add: {len(lines)}")
-
-        for idx, line in enumerate(lines, 1):
-            if line.strip():
-                logging.debug(f"Adding line {idx}: '{line}'")
-                try:
-                    self.pdf.multi_cell(0, 10, line)
-                except IndexError as e:
-                    logging.error(f"IndexError while adding line {idx}: {e}")
-                    print(f"Error: {e} while adding line {idx}.")
-            else:
-                logging.debug(f"Skipping empty line {idx}.")
+    def add_text(self, text):
+        text = self.sanitise(text)
+        lines = [line for line in text.split("\n") if line.strip()]
+        logging.debug(f"Adding {len(lines)} line(s) of text.")
+        if not lines:
+            return
+
+        # multi_cell breaks at newlines itself, so all lines are laid out
+        # in one call
+        try:
+            self.pdf.multi_cell(0, 10, "\n".join(lines))
+        except IndexError as e:
+            logging.error(f"IndexError while adding text: {e}")
 
     def save_pdf(self, output_pdf_path):
         try:
@@ -136,3 +187,6 @@ class PDFGenerator:
             logging.info(f"PDF saved to '{output_pdf_path}'.")
         except Exception as e:
             logging.error(f"Failed to save PDF '{output_pdf_path}': {e}")
+        finally:
+            # The next summary starts a new document
+            self.pdf = self.setup_pdf()
@@ -1,29 +1,162 @@
 # pdf_processor.py
-import pdfplumber
 import re
 import logging
 
 # from fpdf import FPDF  # Unused import
-from typing import List, Tuple, Optional
+from typing import Iterator, List, Tuple, Optional
+
+from . import metrics
+from .cleaning import CleaningEngine
+from .extractors import Extractor, get_extractor
+from .file_tracker import known_digest
+from .process_pools import start_pool
+from .segmentation import GlueWordSegmenter
+
+
+def extract_page_range(
+    pdf_path: str, first_page: int, last_page: int, extractor: Extractor
+) -> Tuple[List[Tuple[int, str]], Extractor]:
+    """
+    Extract pages ``first_page``..``last_page`` (1-based, inclusive).
+
+    Runs in a worker process: it opens the file itself, parses only its own
+    pages and returns ``(page_num, text)`` pairs, along with its copy of
+    the extractor so the caller can merge the timing counters.
+    """
+    extractor.reset()
+    results = list(extractor.iter_pages(pdf_path, first_page, last_page))
+    return results, extractor
 
 
 class PDFProcessor:
-    def __init__(self, font_dir: str, cleaned_text_dir: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        font_dir: str,
+        cleaned_text_dir: Optional[str] = None,
+        extraction_workers: int = 1,
+        page_cache=None,
+        x_tolerance: float = 1,
+        y_tolerance: float = 1,
+        extractor: str = "pdfplumber",
+        known_digests: Optional[dict] = None,
+    ) -> None:
         self.font_dir = font_dir
         self.cleaned_text_dir = cleaned_text_dir
+        self.extraction_workers = extraction_workers
+        # Page extraction pool, started on first use and kept for the run
+        self.executor = None
+        self.page_cache = page_cache
+        # Content hashes computed elsewhere, see known_digest
+        self.known_digests = known_digests if known_digests is not None else {}
+        self.extractor = get_extractor(extractor, x_tolerance, y_tolerance)
+        self.segmenter = GlueWordSegmenter()
+        self.cleaner = CleaningEngine(self.segmenter)
+
+    def iter_raw_pages(self, pdf_path: str) -> Iterator[Tuple[int, str]]:
+        """
+        Yield ``(page_num, text)`` for each page of ``pdf_path`` in order.
+
+        Pages are extracted one at a time and each page's cached layout
+        objects are released as soon as its text is read, so memory does not
+        grow with the page count. Pages without text yield an empty string.
+
+        With ``extraction_workers`` above 1 the page range is split into
+        slices that are extracted in a process pool, kept until ``close``;
+        slices are yielded in page order, so the output is the same as the
+        serial path.
+
+        With a ``page_cache``, a document extracted before with the same
+        parameters is read back from the cache without opening the PDF. The
+        PDF is only hashed to look it up when ``known_digests`` has no hash
+        for its current size and mtime.
+        """
+        if self.page_cache is None:
+            pages = self._extract_pages(pdf_path)
+        else:
+            pdf_hash = known_digest(pdf_path, self.known_digests)[2]
+            params = self.extraction_params
+            if self.page_cache.has_document(pdf_hash, params):
+                logging.info(f"Reading raw pages of '{pdf_path}' from the page cache.")
+                pages = self.page_cache.iter_pages(pdf_hash, params)
+            else:
+                pages = self._cache_pages(
+                    self._extract_pages(pdf_path), pdf_hash, params
+                )
+        if metrics.current() is not None:
+            pages = metrics.timed(pages, "extract", "pages")
+        for page_num, page_text in pages:
+            if not page_text:
+                logging.warning(f"No text found on page {page_num} of {pdf_path}.")
+            yield page_num, page_text
+
+    @property
+    def extraction_params(self) -> str:
+        """Everything besides the file that changes the extracted text."""
+        return self.extractor.params
+
+    def _extract_pages(self, pdf_path: str) -> Iterator[Tuple[int, str]]:
+        if self.extraction_workers > 1:
+            return self._iter_pages_parallel(pdf_path)
+        return self.extractor.iter_pages(pdf_path)
+
+    def _cache_pages(
+        self, pages: Iterator[Tuple[int, str]], pdf_hash: str, params: str
+    ) -> Iterator[Tuple[int, str]]:
+        self.page_cache.start_document(pdf_hash, params)
+        page_count = 0
+        try:
+            for page_num, page_text in pages:
+                self.page_cache.put_page(pdf_hash, params, page_num, page_text)
+                page_count += 1
+                yield page_num, page_text
+        except BaseException:
+            # An error, or the caller stopped reading: the pages stored so
+            # far could never be served
+            self.page_cache.abandon_document(pdf_hash, params)
+            raise
+        # Only reached once every page was extracted and stored
+        self.page_cache.finish_document(pdf_hash, params, page_count)
+
+    def _iter_pages_parallel(self, pdf_path: str) -> Iterator[Tuple[int, str]]:
+        page_count = self.extractor.page_count(pdf_path)
+        if page_count == 0:
+            return
+
+        # A few slices per worker keeps the pool busy when pages differ in cost
+        slice_count = min(page_count, self.extraction_workers * 4)
+        bounds = [page_count * i // slice_count for i in range(slice_count + 1)]
+        logging.info(
+            f"Extracting {page_count} pages of '{pdf_path}' in {slice_count} "
+            f"slices over {self.extraction_workers} processes."
+        )
+        if self.executor is None:
+            self.executor = start_pool(self.extraction_workers)
+        futures = [
+            self.executor.submit(
+                extract_page_range, pdf_path, start + 1, stop, self.extractor
+            )
+            for start, stop in zip(bounds, bounds[1:])
+        ]
+        try:
+            for future in futures:
+                pages, extractor = future.result()
+                self.extractor.merge(extractor)
+                yield from pages
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def close(self) -> None:
+        """Stop the page extraction processes, if any were started."""
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
 
     def extract_raw_text(self, pdf_path: str) -> List[str]:
-        extracted_text = []
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                for page_num, page in enumerate(pdf.pages, 1):
-                    page_text = page.extract_text(x_tolerance=1, y_tolerance=1)
-                    if page_text:
-                        extracted_text.append(page_text)
-                    else:
-                        logging.warning(
-                            f"No text found on page {page_num} of {pdf_path}."
-                        )
+            extracted_text = [
+                page_text for _, page_text in self.iter_raw_pages(pdf_path) if page_text
+            ]
             logging.info(f"Extracted raw text from '{pdf_path}'.")
             return extracted_text
         except Exception as e:
@@ -31,55 +164,11 @@ class PDFProcessor:
             return []
 
     def separate_glued_words(self, text: str) -> str:
-        import wordsegment
-
-        wordsegment.load()
-
-        # First apply regex-based separation for common patterns
-        # Add space between lowercase followed by uppercase
-        text = re.sub(r"([a-z])([A-Z])", r"\1 \2", text)
-
-        # Add space between uppercase letters followed by lowercase letters
-        text = re.sub(r"([A-Z])([A-Z][a-z])", r"\1 \2", text)
-
-        # Add space between letters and numbers (both directions)
-        text = re.sub(r"([a-zA-Z])(\d)", r"\1 \2", text)
-        text = re.sub(r"(\d)([a-zA-Z])", r"\1 \2", text)
-
-        # Now split into words and handle remaining glued lowercase words
-        words = text.split()
-        result_words = []
-
-        for word in words:
-            # Check for words that might be glued (mixed case or long lowercase)
-            if re.match(r"^[a-zA-Z]+$", word) and len(word) > 6:
-                # Try wordsegment first
-                segmented = wordsegment.segment(word.lower())
-                if len(segmented) > 1:
-                    # Capitalize first letter of first word if original was capitalized
-                    if word[0].isupper() and segmented:
-                        segmented[0] = segmented[0].capitalize()
-                    result_words.extend(segmented)
-                else:
-                    result_words.append(word)
-            else:
-                result_words.append(word)
-
-        # Join all words and normalize spaces
-        result = " ".join(result_words)
-        result = re.sub(r"\s{2,}", " ", result).strip()
-
-        return result
+        return " ".join(self.cleaner.split_words(text))
 
     def clean_text(self, text: str) -> str:
-        # Remove single newlines that break sentences but preserve paragraph
-        # breaks (double newlines)
-        text = re.sub(r"(?<!\n)\n(?!\n)", " ", text)
-
-        # Separate glued words
-        text = self.separate_glued_words(text)
-
-        return text
+        # Single newlines and paragraph breaks both become word boundaries
+        return self.separate_glued_words(text)
 
     def final_text_cleaning(self, text: str) -> str:
         replacements = [
@@ -97,59 +186,89 @@ class PDFProcessor:
 
         return text
 
+    def extract_page_code_and_equations(
+        self,
+        page: str,
+        page_num: int,
+        code_blocks: List[str],
+        equations: List[str],
+    ) -> str:
+        """Move one page's code blocks and equations into the given lists."""
+        return self.cleaner.extract_page(page, page_num, code_blocks, equations)
+
     def extract_code_and_equations(
         self, pages: List[str]
     ) -> Tuple[str, List[str], List[str]]:
-        cleaned_text = ""
+        cleaned_pages = []
         code_blocks = []
         equations = []
 
-        # Define multiple patterns for code blocks and equations
-        code_patterns = [
-            re.compile(r"```(.*?)```", re.DOTALL),  # Triple backticks
-            re.compile(r"<code>(.*?)</code>", re.DOTALL),  # <code> tags
-            re.compile(r"(^|\n)\s{4,}(.*)", re.MULTILINE),  # Indented code blocks
-        ]
-        equation_patterns = [re.compile(r"\$\$?(.*?)\$\$?", re.DOTALL)]
-
         for page_num, page in enumerate(pages, 1):
             if not page:
                 continue  # Skip empty pages
 
-            # original_page = page  # Keep a copy for debugging
+            page = self.extract_page_code_and_equations(
+                page, page_num, code_blocks, equations
+            )
+            cleaned_pages.append(page + "\n")
 
-            # Extract code blocks using multiple patterns
-            for pattern in code_patterns:
-                codes = pattern.findall(page)
-                if codes:
-                    logging.info(
-                        f"Extracted {len(codes)} code block(s) from page {page_num}."
-                    )
-                # Handle indented code blocks differently
-                if pattern.pattern.startswith("(^|\\n)\\s{4,}"):
-                    for code in codes:
-                        code_blocks.append(code[1].strip())
-                else:
-                    code_blocks.extend([code.strip() for code in codes])
-                page = pattern.sub("", page)
-
-            # Extract equations using multiple patterns
-            for pattern in equation_patterns:
-                eqs = pattern.findall(page)
-                if eqs:
-                    logging.info(
-                        f"Extracted {len(eqs)} equation(s) from page {page_num}."
-                    )
-                equations.extend([eq.strip() for eq in eqs])
-                page = pattern.sub("", page)
+        logging.info(f"Total code blocks extracted: {len(code_blocks)}")
+        logging.info(f"Total equations extracted: {len(equations)}")
 
-            cleaned_text += page + "\n"
+        return "".join(cleaned_pages), code_blocks, equations
+
+    def iter_cleaned_text(
+        self,
+        pdf_path: str,
+        code_blocks: List[str],
+        equations: List[str],
+        cleaned_txt_path: Optional[str] = None,
+    ) -> Iterator[str]:
+        """
+        Streaming version of ``process_pdf``.
+
+        Extracts, cleans and yields the text one page at a time, appending
+        code blocks and equations to the given lists and the cleaned text to
+        ``cleaned_txt_path`` as it goes. The pieces concatenate to exactly
+        the text ``process_pdf`` returns, so memory use depends on the page
+        size rather than on the document length.
+        """
+        output = None
+        if cleaned_txt_path:
+            try:
+                output = open(cleaned_txt_path, "w", encoding="utf-8")
+            except Exception as e:
+                logging.error(f"Failed to save cleaned text: {e}")
+
+        previous = ""
+        try:
+            for page_num, page in self.iter_raw_pages(pdf_path):
+                if not page:
+                    continue
+                with metrics.span("code_equations"):
+                    page = self.extract_page_code_and_equations(
+                        page, page_num, code_blocks, equations
+                    )
+                with metrics.span("clean"):
+                    piece = self.cleaner.clean(page + "\n")
+                if not piece:
+                    continue
+                # Apply the cleaning's space rules across the page break
+                piece = self.cleaner.separator(previous, piece) + piece
+                previous = piece
+                if output is not None:
+                    output.write(piece)
+                yield piece
+        except Exception as e:
+            logging.error(f"Failed to extract text from {pdf_path}: {e}")
+        finally:
+            if output is not None:
+                output.close()
+                logging.info(f"Cleaned text saved to '{cleaned_txt_path}'.")
 
         logging.info(f"Total code blocks extracted: {len(code_blocks)}")
         logging.info(f"Total equations extracted: {len(equations)}")
 
-        return cleaned_text, code_blocks, equations
-
     def save_cleaned_text(self, text: str, output_txt_path: str) -> None:
         try:
             with open(output_txt_path, "w", encoding="utf-8") as f:
@@ -165,11 +284,13 @@ class PDFProcessor:
         cleaned_txt_path: Optional[str] = None,
     ) -> Tuple[str, List[str], List[str]]:
         pages_text = self.extract_raw_text(pdf_path)
-        cleaned_text, code_blocks, equations = self.extract_code_and_equations(
-            pages_text
-        )
-        cleaned_text = self.clean_text(cleaned_text)
-        cleaned_text = self.final_text_cleaning(cleaned_text)
+        with metrics.span("code_equations"):
+            cleaned_text, code_blocks, equations = self.extract_code_and_equations(
+                pages_text
+            )
+        # Glued word separation and the other cleaning rules
+        with metrics.span("clean"):
+            cleaned_text = self.cleaner.clean(cleaned_text)
 
         if save_cleaned and cleaned_txt_path:
             self.save_cleaned_text(cleaned_text, cleaned_txt_path)
@@ -1,103 +1,316 @@
 # pdf_summariser_app.py
-import re
 import os
 import sys
+import signal
 import logging
-import torch
+import threading
 import unicodedata
+from contextlib import contextmanager
+from functools import cached_property
+
+from . import metrics
 from .config import Config
 from .logger_setup import LoggerSetup
 from .file_tracker import FileTracker
-from .pdf_processor import PDFProcessor
-from .summariser import Summariser
-from .pdf_generator import PDFGenerator
 
 
 class PDFSummariserApp:
-    def __init__(self, config_file="config.yaml"):
+    def __init__(self, config_file="config.yaml", workers=None, inference_workers=None):
         self.config = Config(config_file)
+        if workers is not None:
+            self.config.workers = workers
+        if inference_workers is not None:
+            self.config.inference_workers = inference_workers
         LoggerSetup(self.config.log_file)
         logging.info("Logger initialised.")
         self.config.create_directories()
         logging.info("Directories ensured.")
-        self.file_tracker = FileTracker(self.config.processed_files_log)
+        self.file_tracker = FileTracker(
+            self.config.processed_files_db,
+            model_id=self.config.summarization_model_id,
+            fingerprint=self.config.summary_fingerprint(),
+            legacy_log=self.config.processed_files_log,
+        )
         logging.info("File tracker initialised.")
-        self.pdf_processor = PDFProcessor(
-            font_dir=self.config.font_directory,
-            cleaned_text_dir=self.config.cleaned_text_directory,
+        # Set by SIGTERM/SIGINT in watch mode
+        self.stopping = threading.Event()
+
+    # The components below import pdfplumber, torch and transformers and
+    # load the model, so they are only built once there is work to do
+
+    @cached_property
+    def pdf_processor(self):
+        # Loads the word segmentation corpora
+        with metrics.span("setup"):
+            from .pdf_processor import PDFProcessor
+
+            return PDFProcessor(
+                font_dir=self.config.font_directory,
+                cleaned_text_dir=self.config.cleaned_text_directory,
+                extraction_workers=self.config.extraction_workers,
+                page_cache=self.page_cache,
+                extractor=self.config.pdf_extractor,
+                known_digests=self.file_tracker.checked,
+            )
+
+    @cached_property
+    def page_cache(self):
+        if not self.config.raw_page_cache_path:
+            return None
+        from .page_cache import RawPageCache
+
+        return RawPageCache(
+            self.config.raw_page_cache_path,
+            max_bytes=self.config.raw_page_cache_max_mb * 1024 * 1024,
         )
-        self.summariser = Summariser(
+
+    @cached_property
+    def summary_cache(self):
+        if not self.config.summary_cache_path:
+            return None
+        from .summary_cache import SummaryCache
+
+        return SummaryCache(
+            self.config.summary_cache_path,
+            max_bytes=self.config.summary_cache_max_mb * 1024 * 1024,
+        )
+
+    @cached_property
+    def near_duplicates(self):
+        if not self.config.near_duplicate_index_path:
+            return None
+        from .near_duplicates import NearDuplicateIndex
+
+        return NearDuplicateIndex(
+            self.config.near_duplicate_index_path,
+            threshold=self.config.near_duplicate_threshold,
+        )
+
+    @cached_property
+    def checkpoints(self):
+        if not self.config.checkpoint_directory:
+            return None
+        from .checkpoints import CheckpointStore
+
+        return CheckpointStore(
+            self.config.checkpoint_directory,
             model_id=self.config.summarization_model_id,
-            device=0 if torch.cuda.is_available() else -1,
+            fingerprint=self.config.summary_fingerprint(),
+            known_digests=self.file_tracker.checked,
         )
-        logging.info("Summariser initialised.")
-        self.pdf_generator = PDFGenerator(font_dir=self.config.font_directory)
 
-    def process_pdf(self, pdf_filename):
-        pdf_path = os.path.join(self.config.input_directory, pdf_filename)
+    @cached_property
+    def metrics(self):
+        if not self.config.metrics_directory:
+            return None
+        from .metrics import MetricsWriter
+
+        return MetricsWriter(self.config.metrics_directory)
+
+    @contextmanager
+    def recording(self, pdf_filenames):
+        """Collect a metrics report for the enclosed work, when enabled."""
+        if self.metrics is None:
+            yield None
+            return
+        report = metrics.Report(pdf_filenames)
+        with metrics.recording(report):
+            yield report
+        self.metrics.write(report)
+
+    def open_checkpoint(self, pdf_path):
+        if self.checkpoints is None:
+            return None
+        return self.checkpoints.open(pdf_path)
+
+    @cached_property
+    def summariser(self):
+        # Imports torch and loads the model
+        with metrics.span("setup"):
+            import torch
+            from .summariser import Summariser
+
+            summariser = Summariser(
+                model_id=self.config.summarization_model_id,
+                device=0 if torch.cuda.is_available() else -1,
+                batch_size=self.config.batch_size,
+                max_batch_tokens=self.config.max_batch_tokens,
+                do_sample=self.config.do_sample,
+                cache=self.summary_cache,
+                backend=self.config.inference_backend,
+                onnx_cache_dir=self.config.onnx_cache_dir,
+                reduce_fan_in=self.config.reduce_fan_in,
+                reduce_level_ratios=self.config.reduce_level_ratios,
+                reduce_target_tokens=self.config.reduce_target_tokens,
+                near_duplicates=self.near_duplicates,
+            )
+            if self.config.inference_workers > 1:
+                summariser.start_pool(
+                    self.config.inference_workers,
+                    threads=self.config.inference_threads,
+                    pin=self.config.pin_inference_workers,
+                )
+            logging.info("Summariser initialised.")
+            return summariser
+
+    @cached_property
+    def chunker(self):
+        from .chunker import TokenChunker
+
+        return TokenChunker(
+            self.summariser.tokenizer, max_tokens=self.config.max_tokens
+        )
+
+    @cached_property
+    def chunk_store(self):
+        if not self.config.chunk_store:
+            return None
+        from .chunk_store import ChunkStore
+
+        return ChunkStore(self.chunker)
+
+    @cached_property
+    def extractive_filter(self):
+        if not self.config.extractive_keep_ratio:
+            return None
+        from .extractive import ExtractiveFilter
+
+        return ExtractiveFilter(
+            keep_ratio=self.config.extractive_keep_ratio,
+            redundancy_threshold=self.config.extractive_redundancy,
+        )
+
+    @cached_property
+    def pdf_generator(self):
+        from .pdf_generator import PDFGenerator
+
+        return PDFGenerator(font_dir=self.config.font_directory)
+
+    def output_paths(self, pdf_filename):
         name, ext = os.path.splitext(pdf_filename)
-        output_pdf_filename = f"{name}_cond{ext}"
         output_pdf_path = os.path.join(
-            self.config.output_directory, output_pdf_filename
+            self.config.output_directory, f"{name}_cond{ext}"
         )
-        cleaned_txt_filename = f"{name}_cleaned.txt"
         cleaned_txt_path = os.path.join(
-            self.config.cleaned_text_directory, cleaned_txt_filename
+            self.config.cleaned_text_directory, f"{name}_cleaned.txt"
         )
+        return output_pdf_path, cleaned_txt_path
+
+    def chunk_store_path(self, pdf_filename):
+        _, cleaned_txt_path = self.output_paths(pdf_filename)
+        return f"{os.path.splitext(cleaned_txt_path)[0]}.chunks"
+
+    def process_pdf(self, pdf_filename):
+        pdf_path = os.path.join(self.config.input_directory, pdf_filename)
+        output_pdf_path, cleaned_txt_path = self.output_paths(pdf_filename)
 
         logging.info(f"Processing '{pdf_filename}'...")
 
-        # Process PDF
-        cleaned_text, code_blocks, equations = self.pdf_processor.process_pdf(
-            pdf_path=pdf_path, save_cleaned=True, cleaned_txt_path=cleaned_txt_path
+        with self.recording([pdf_filename]):
+            if self.config.streaming_extraction:
+                final_summary = self.summarise_streamed(
+                    pdf_path,
+                    cleaned_txt_path,
+                    checkpoint=self.open_checkpoint(pdf_path),
+                )
+            else:
+                # Process PDF
+                cleaned_text, code_blocks, equations = self.pdf_processor.process_pdf(
+                    pdf_path=pdf_path,
+                    save_cleaned=True,
+                    cleaned_txt_path=cleaned_txt_path,
+                )
+                final_summary = self.summarise_text(
+                    cleaned_text, code_blocks, equations, pdf_filename=pdf_filename
+                )
+
+            self.write_summary(pdf_filename, final_summary, output_pdf_path)
+
+    def summarise_streamed(self, pdf_path, cleaned_txt_path, checkpoint=None):
+        # Extract, clean, chunk and summarise page by page
+        code_blocks = []
+        equations = []
+        pieces = self.pdf_processor.iter_cleaned_text(
+            pdf_path, code_blocks, equations, cleaned_txt_path=cleaned_txt_path
+        )
+        if self.extractive_filter is not None:
+            pieces = self.extractive_filter.iter_filter(pieces)
+        summary = self.summariser.summarise_stream(
+            self.chunker.iter_chunks(pieces),
+            first_min_ratio=self.config.first_min_ratio,
+            first_max_ratio=self.config.first_max_ratio,
+            second_min_ratio=self.config.second_min_ratio,
+            second_max_ratio=self.config.second_max_ratio,
+            checkpoint=checkpoint,
         )
+        return self.reintegrate_code_equations(summary, code_blocks, equations)
 
-        # Summarise
-        chunks = self.bin_text(cleaned_text)
-        summary = self.summariser.summarise(
-            chunks=chunks,
+    def summarise_text(self, cleaned_text, code_blocks, equations, pdf_filename=None):
+        return self.summarise_texts(
+            [(cleaned_text, code_blocks, equations)], pdf_filenames=[pdf_filename]
+        )[0]
+
+    def summarise_texts(self, documents, pdf_filenames=None):
+        # Documents named by their PDF get a checkpoint and a chunk store
+        pdf_filenames = pdf_filenames or [None] * len(documents)
+        checkpoints = [
+            (
+                self.open_checkpoint(os.path.join(self.config.input_directory, name))
+                if name
+                else None
+            )
+            for name in pdf_filenames
+        ]
+        # Summarise; chunks from all documents share inference batches
+        summaries = self.summariser.summarise_documents(
+            [
+                self.bin_text(cleaned_text, pdf_filename)
+                for (cleaned_text, _, _), pdf_filename in zip(documents, pdf_filenames)
+            ],
             first_min_ratio=self.config.first_min_ratio,
             first_max_ratio=self.config.first_max_ratio,
             second_min_ratio=self.config.second_min_ratio,
             second_max_ratio=self.config.second_max_ratio,
+            checkpoints=checkpoints,
         )
 
         # Reintegrate code and equations
-        final_summary = self.reintegrate_code_equations(summary, code_blocks, equations)
+        return [
+            self.reintegrate_code_equations(summary, code_blocks, equations)
+            for summary, (_, code_blocks, equations) in zip(summaries, documents)
+        ]
 
+    def write_summary(self, pdf_filename, final_summary, output_pdf_path):
         # Generate PDF
-        self.pdf_generator.add_text(final_summary)
-        self.pdf_generator.save_pdf(output_pdf_path)
+        with metrics.span("render"):
+            self.pdf_generator.add_text(final_summary)
+            self.pdf_generator.save_pdf(output_pdf_path)
 
-        # Mark as processed
-        self.file_tracker.mark_as_processed(pdf_filename)
+        # Mark as processed; only then is the checkpoint no longer needed
+        pdf_path = os.path.join(self.config.input_directory, pdf_filename)
+        self.file_tracker.mark_as_processed(pdf_path)
+        if self.checkpoints is not None:
+            self.checkpoints.remove(pdf_path)
 
         logging.info(
             f"'{pdf_filename}' has been summarised by Max_Agent and saved as "
-            f"'{output_pdf_filename}'."
+            f"'{os.path.basename(output_pdf_path)}'."
         )
 
-    def bin_text(self, text):
-        # Split text into sentences
-        sentences = re.split(r"(?<=[.!?]) +", text)
-        chunks = []
-        current_chunk = ""
-        current_length = 0
-
-        for sentence in sentences:
-            sentence_length = self.summariser.count_tokens(sentence)
-            if current_length + sentence_length <= self.config.max_tokens:
-                current_chunk += " " + sentence
-                current_length += sentence_length
+    def bin_text(self, text, pdf_filename=None):
+        if self.extractive_filter is not None:
+            with metrics.span("extractive_filter"):
+                text = self.extractive_filter.filter(text)
+        # Tokenisation and chunking, or loading a saved chunk plan
+        with metrics.span("chunk"):
+            if pdf_filename and self.chunk_store is not None:
+                chunks = self.chunk_store.chunk(
+                    text, self.chunk_store_path(pdf_filename)
+                )
             else:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = sentence
-                current_length = sentence_length
-
-        if current_chunk:
-            chunks.append(current_chunk.strip())
-
+                chunks = self.chunker.chunk(text)
+        metrics.count("chunks", len(chunks))
+        metrics.count("tokens_in", sum(chunk.token_count for chunk in chunks))
         logging.info(f"Total chunks created: {len(chunks)}")
         return chunks
 
@@ -113,16 +326,40 @@ class PDFSummariserApp:
             final_text += "\n\n# Equations\n" + "\n".join(equations)
         return final_text
 
-    def run(self):
+    def unprocessed(self, pdf_filenames):
+        # Filter out PDFs that have already been processed, and entries that
+        # are not files (such as a directory named *.pdf)
+        new_pdfs = []
+        for f in pdf_filenames:
+            path = os.path.join(self.config.input_directory, f)
+            if not os.path.isfile(path):
+                logging.warning(f"'{f}' is not a file; skipping.")
+            elif not self.file_tracker.is_processed(path):
+                new_pdfs.append(f)
+        return new_pdfs
+
+    def new_pdfs(self):
         # List all PDF files in the input directory
         all_pdfs = [
             f
             for f in os.listdir(self.config.input_directory)
             if f.lower().endswith(".pdf")
         ]
+        return self.unprocessed(all_pdfs)
 
-        # Filter out PDFs that have already been processed
-        new_pdfs = [f for f in all_pdfs if not self.file_tracker.is_processed(f)]
+    def process_pdfs(self, pdf_filenames):
+        if self.config.workers > 1:
+            from .pipeline import DocumentPipeline
+
+            DocumentPipeline(
+                self, workers=self.config.workers, queue_size=self.config.queue_size
+            ).run(pdf_filenames)
+        else:
+            for pdf_filename in pdf_filenames:
+                self.process_pdf(pdf_filename)
+
+    def run(self):
+        new_pdfs = self.new_pdfs()
 
         if not new_pdfs:
             logging.info("As far as I can see, no new PDFs to process.")
@@ -130,5 +367,128 @@ class PDFSummariserApp:
 
         logging.info(f"Good, found {len(new_pdfs)} new PDF(s) to process.")
 
-        for pdf_filename in new_pdfs:
-            self.process_pdf(pdf_filename)
+        if self.config.inference_workers > 1:
+            # Fork the inference workers now, before any other threads or
+            # worker pools start
+            self.summariser
+
+        self.process_pdfs(new_pdfs)
+
+        if self.config.inference_workers > 1:
+            self.summariser.close_pool()
+        self.close_extraction_pool()
+        self.log_stats()
+
+    def request_stop(self, signum, frame):
+        if self.stopping.is_set():
+            raise KeyboardInterrupt
+        logging.info(
+            f"Received {signal.Signals(signum).name}; stopping once the current "
+            "work is done (send it again to stop now)."
+        )
+        self.stopping.set()
+
+    def process_arrivals(self, pdf_filenames):
+        logging.info(f"Good, found {len(pdf_filenames)} new PDF(s) to process.")
+        if self.config.workers > 1:
+            self.process_pdfs(pdf_filenames)
+            return
+        for pdf_filename in pdf_filenames:
+            if self.stopping.is_set():
+                return
+            # One bad PDF must not stop the watcher
+            try:
+                self.process_pdf(pdf_filename)
+            except Exception as e:
+                logging.error(f"Failed to process '{pdf_filename}': {e}")
+
+    def watch(self):
+        """
+        Keep the model loaded and summarise PDFs as they arrive in the input
+        directory, until SIGTERM or SIGINT.
+
+        The directory is watched before the backlog is processed, so nothing
+        that arrives meanwhile is missed. A signal lets the document being
+        summarised finish (with the batch pipeline, the current batch) and
+        then exits; files not started yet are picked up by the next run.
+        """
+        from .watcher import DirectoryWatcher
+
+        handlers = {
+            signum: signal.signal(signum, self.request_stop)
+            for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+        watcher = DirectoryWatcher(
+            self.config.input_directory,
+            settle_seconds=self.config.watch_settle_seconds,
+            poll_interval=self.config.watch_poll_interval,
+            polling=self.config.watch_polling,
+        )
+        try:
+            # Load the model (and fork the inference workers) once, up front
+            self.summariser
+            # The backlog goes through the same settle check as arrivals, as
+            # a file may still be being copied in
+            backlog = self.new_pdfs()
+            watcher.add(backlog)
+            logging.info(f"Watching for new PDFs; {len(backlog)} waiting.")
+            new_pdfs = []
+            while not self.stopping.is_set():
+                if new_pdfs:
+                    self.process_arrivals(new_pdfs)
+                # A file that vanished or a directory that cannot be read
+                # must not stop the watcher
+                try:
+                    arrived = watcher.ready()
+                    new_pdfs = self.unprocessed(arrived)
+                except OSError as e:
+                    logging.error(f"Failed to check new PDFs: {e}")
+                    new_pdfs = []
+                    continue
+                for pdf_filename in sorted(set(arrived) - set(new_pdfs)):
+                    path = os.path.join(self.config.input_directory, pdf_filename)
+                    if os.path.isfile(path):
+                        logging.info(
+                            f"'{pdf_filename}' is already summarised; skipping."
+                        )
+        finally:
+            watcher.close()
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+            if self.config.inference_workers > 1 and "summariser" in self.__dict__:
+                self.summariser.close_pool()
+            self.close_extraction_pool()
+            self.log_stats()
+        logging.info("Watcher stopped.")
+
+    def serve(self, port=None):
+        """Summarise uploads over HTTP until SIGTERM or SIGINT."""
+        from .service import SummaryService
+
+        service = SummaryService(
+            self,
+            host=self.config.service_host,
+            port=self.config.service_port if port is None else port,
+            max_wait=self.config.service_max_wait_ms / 1000,
+            max_requests=self.config.service_max_requests,
+            max_upload_bytes=self.config.service_max_upload_mb * 1024 * 1024,
+        )
+        service.run()
+        self.close_extraction_pool()
+        self.log_stats()
+
+    def close_extraction_pool(self):
+        # Page extraction processes live for the whole run
+        if "pdf_processor" in self.__dict__:
+            self.pdf_processor.close()
+
+    def log_stats(self):
+        # A watch or serve session may never have built the processor
+        if "pdf_processor" in self.__dict__:
+            self.pdf_processor.extractor.log_stats()
+        if self.page_cache is not None:
+            self.page_cache.log_stats()
+        if self.summary_cache is not None:
+            self.summary_cache.log_stats()
+        if self.near_duplicates is not None:
+            self.near_duplicates.log_stats()
@@ -0,0 +1,232 @@
+# pipeline.py
+import os
+import queue
+import logging
+import threading
+
+from . import metrics
+from .page_cache import RawPageCache
+from .pdf_processor import PDFProcessor
+from .process_pools import pool_context, start_pool
+from .segmentation import get_segmenter
+
+_STOP = object()
+
+# Per-process PDFProcessor, built once by the pool initializer, and whether
+# to send metrics of each extraction back
+_worker_processor = None
+_worker_metrics = False
+
+
+def _init_worker(
+    font_dir,
+    cleaned_text_dir,
+    page_cache_path=None,
+    page_cache_bytes=0,
+    extractor="pdfplumber",
+    record_metrics=False,
+):
+    global _worker_processor, _worker_metrics
+    _worker_metrics = record_metrics
+    page_cache = None
+    if page_cache_path:
+        page_cache = RawPageCache(page_cache_path, max_bytes=page_cache_bytes)
+    _worker_processor = PDFProcessor(
+        font_dir=font_dir,
+        cleaned_text_dir=cleaned_text_dir,
+        page_cache=page_cache,
+        extractor=extractor,
+    )
+
+
+def _extract_document(pdf_path, cleaned_txt_path, known_digest=None):
+    if known_digest:
+        # Hashed by the FileTracker in the parent, see PDFProcessor.known_digests
+        _worker_processor.known_digests[pdf_path] = known_digest
+    report = metrics.Report() if _worker_metrics else None
+    with metrics.recording(report):
+        result = _worker_processor.process_pdf(
+            pdf_path=pdf_path, save_cleaned=True, cleaned_txt_path=cleaned_txt_path
+        )
+    # Extractor timings stay in this process, so log them per document
+    _worker_processor.extractor.log_stats()
+    _worker_processor.extractor.reset()
+    return result, report.snapshot() if report is not None else None
+
+
+class DocumentPipeline:
+    """
+    Three-stage batch pipeline over a list of PDFs.
+
+    Extraction and cleaning run in a process pool, summarisation runs in the
+    calling process (the only one that owns the model) and PDF output plus
+    FileTracker updates run in a writer thread. Stages are connected by
+    bounded queues so the model is fed continuously without extraction
+    running arbitrarily far ahead.
+    """
+
+    def __init__(self, app, workers=None, queue_size=None):
+        self.app = app
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size or 2 * self.workers
+        self.stop_event = threading.Event()
+
+    def _put(self, q, item):
+        # Blocking put that gives up once the pipeline is being torn down
+        while not self.stop_event.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _feed(self, executor, pdf_filenames, extracted):
+        config = self.app.config
+        try:
+            for pdf_filename in pdf_filenames:
+                pdf_path = os.path.join(config.input_directory, pdf_filename)
+                _, cleaned_txt_path = self.app.output_paths(pdf_filename)
+                future = executor.submit(
+                    _extract_document,
+                    pdf_path,
+                    cleaned_txt_path,
+                    self.app.file_tracker.checked.get(pdf_path),
+                )
+                if not self._put(extracted, (pdf_filename, future)):
+                    future.cancel()
+                    return
+        finally:
+            self._put(extracted, _STOP)
+
+    def _write(self, rendered):
+        while True:
+            item = rendered.get()
+            if item is _STOP:
+                return
+            pdf_filename, final_summary, output_pdf_path, report, last = item
+            try:
+                with metrics.recording(report):
+                    self.app.write_summary(pdf_filename, final_summary, output_pdf_path)
+                # A group's report is complete once its last summary is written
+                if report is not None and last:
+                    self.app.metrics.write(report)
+            except Exception as e:
+                logging.error(f"Failed to write summary for '{pdf_filename}': {e}")
+
+    def _pool_context(self):
+        # Forked workers share the segmentation corpora loaded here, but
+        # not once the model is loaded (as in watch mode)
+        return pool_context(forkable="summariser" not in self.app.__dict__)
+
+    def run(self, pdf_filenames):
+        config = self.app.config
+        extracted = queue.Queue(maxsize=self.queue_size)
+        rendered = queue.Queue(maxsize=self.queue_size)
+
+        logging.info(
+            f"Starting pipeline with {self.workers} extraction worker(s) "
+            f"and queue size {self.queue_size}."
+        )
+        if config.inference_workers > 1:
+            # Load the model and fork the inference workers before the
+            # extraction pool starts its management threads
+            self.app.summariser
+        context = self._pool_context()
+        if context.get_start_method() == "fork":
+            # Load the segmentation corpora before the pool forks so the
+            # workers share them instead of each reading them from disk
+            get_segmenter()
+        with start_pool(
+            self.workers,
+            context=context,
+            initializer=_init_worker,
+            initargs=(
+                config.font_directory,
+                config.cleaned_text_directory,
+                config.raw_page_cache_path,
+                config.raw_page_cache_max_mb * 1024 * 1024,
+                config.pdf_extractor,
+                self.app.metrics is not None,
+            ),
+        ) as executor:
+            writer = threading.Thread(
+                target=self._write, args=(rendered,), name="max-agent-writer"
+            )
+            writer.start()
+            try:
+                feeder = threading.Thread(
+                    target=self._feed,
+                    args=(executor, pdf_filenames, extracted),
+                    name="max-agent-feeder",
+                )
+                feeder.start()
+                try:
+                    self._summarise(extracted, rendered)
+                finally:
+                    self.stop_event.set()
+                    feeder.join()
+            finally:
+                rendered.put(_STOP)
+                writer.join()
+
+    def _next_group(self, extracted, pending):
+        """
+        Collect the next group of extracted documents for one inference round.
+
+        Blocks for the first document, then also takes every following
+        document whose extraction has already finished, so that chunks from
+        several small documents share inference batches. Returns the group and
+        the item (if any) that was dequeued but is not ready yet.
+        """
+        item = pending if pending is not None else extracted.get()
+        group = []
+        while item is not _STOP:
+            group.append(item)
+            if len(group) >= self.queue_size:
+                return group, None
+            try:
+                item = extracted.get_nowait()
+            except queue.Empty:
+                return group, None
+            if item is not _STOP and not item[1].done():
+                return group, item
+        return group, _STOP
+
+    def _summarise(self, extracted, rendered):
+        pending = None
+        while pending is not _STOP:
+            group, pending = self._next_group(extracted, pending)
+            documents = []
+            snapshots = []
+            for pdf_filename, future in group:
+                logging.info(f"Processing '{pdf_filename}'...")
+                try:
+                    extraction, snapshot = future.result()
+                except Exception as e:
+                    logging.error(f"Failed to process '{pdf_filename}': {e}")
+                    continue
+                documents.append((pdf_filename, extraction))
+                snapshots.append(snapshot)
+            if not documents:
+                continue
+
+            # Documents summarised together share one metrics report
+            report = None
+            if self.app.metrics is not None:
+                report = metrics.Report([pdf_filename for pdf_filename, _ in documents])
+                for snapshot in snapshots:
+                    report.merge(snapshot)
+            with metrics.recording(report):
+                final_summaries = self.app.summarise_texts(
+                    [extraction for _, extraction in documents],
+                    pdf_filenames=[pdf_filename for pdf_filename, _ in documents],
+                )
+            for index, ((pdf_filename, _), final_summary) in enumerate(
+                zip(documents, final_summaries)
+            ):
+                output_pdf_path, _ = self.app.output_paths(pdf_filename)
+                last = index == len(documents) - 1
+                rendered.put(
+                    (pdf_filename, final_summary, output_pdf_path, report, last)
+                )
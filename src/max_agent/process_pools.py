@@ -0,0 +1,40 @@
+# process_pools.py
+import os
+import sys
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def pool_context(forkable=True):
+    """
+    Multiprocessing context for a new worker pool.
+
+    Forked workers share everything this process has already loaded, but
+    forking is only safe while the process runs a single thread and has
+    not imported torch, whose native thread pools do not survive a fork.
+    Otherwise (or when ``forkable`` is false, e.g. once the model is
+    loaded) workers start from a fresh interpreter, through forkserver
+    where the platform has it and spawn elsewhere.
+    """
+    if forkable and threading.active_count() == 1 and "torch" not in sys.modules:
+        return multiprocessing.get_context()
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context(
+        "forkserver" if "forkserver" in methods else "spawn"
+    )
+
+
+def start_pool(max_workers, context=None, **kwargs):
+    """
+    A ProcessPoolExecutor whose ``max_workers`` workers are all started.
+
+    The pool would otherwise start workers on demand, possibly later from
+    another thread or after torch was imported, when forking is unsafe.
+    """
+    executor = ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=context or pool_context(), **kwargs
+    )
+    for future in [executor.submit(os.getpid) for _ in range(max_workers)]:
+        future.result()
+    return executor
@@ -0,0 +1,74 @@
+# segmentation.py
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, List
+
+GLUED_WORD = re.compile(r"^[a-zA-Z]+$")
+
+_segmenter = None
+_segmenter_lock = threading.Lock()
+
+
+def get_segmenter():
+    """
+    Return this process' wordsegment Segmenter, loading its corpora once.
+
+    Calling it in a parent process before worker processes are forked lets
+    the workers share the loaded unigram/bigram tables copy-on-write instead
+    of each reading them from disk again.
+    """
+    global _segmenter
+    if _segmenter is None:
+        with _segmenter_lock:
+            if _segmenter is None:
+                import wordsegment
+
+                segmenter = wordsegment.Segmenter()
+                segmenter.load()
+                _segmenter = segmenter
+    return _segmenter
+
+
+class GlueWordSegmenter:
+    """
+    Split long alphabetic tokens that are several words glued together.
+
+    Segmentation results are memoised in a bounded LRU keyed by the
+    lower-cased token, so tokens that repeat throughout a document (product
+    names, headings) only run wordsegment's dynamic program once.
+    """
+
+    def __init__(self, min_length: int = 7, cache_size: int = 65536) -> None:
+        self.min_length = min_length
+        self._segment = lru_cache(maxsize=cache_size)(self._segment_uncached)
+
+    @staticmethod
+    def _segment_uncached(word: str) -> tuple:
+        return tuple(get_segmenter().segment(word))
+
+    def split_word(self, word: str) -> List[str]:
+        if len(word) < self.min_length or not GLUED_WORD.match(word):
+            return [word]
+        segmented = list(self._segment(word.lower()))
+        if len(segmented) > 1:
+            # Capitalize first letter of first word if original was capitalized
+            if word[0].isupper():
+                segmented[0] = segmented[0].capitalize()
+            return segmented
+        return [word]
+
+    def segment_many(self, words: Iterable[str]) -> Dict[str, List[str]]:
+        """Split every distinct token in ``words`` once."""
+        return {word: self.split_word(word) for word in dict.fromkeys(words)}
+
+    def split_words(self, words: List[str]) -> List[str]:
+        """Split a list of tokens, returning the flattened list of words."""
+        segmented = self.segment_many(words)
+        result = []
+        for word in words:
+            result.extend(segmented[word])
+        return result
+
+    def cache_info(self):
+        return self._segment.cache_info()
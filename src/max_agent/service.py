@@ -0,0 +1,290 @@
+# service.py
+import json
+import time
+import signal
+import asyncio
+import logging
+import tempfile
+import threading
+from contextlib import closing
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+
+from .micro_batcher import MicroBatcher
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+}
+
+
+class RequestCancelled(Exception):
+    pass
+
+
+class SerialTokenizer:
+    """
+    A tokenizer shared by request threads, used by one thread at a time.
+
+    Fast tokenizers change their padding and truncation settings on every
+    call and fail with "Already borrowed" when two threads do so at once.
+    """
+
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+        self.lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        with self.lock:
+            return self.tokenizer(*args, **kwargs)
+
+    def decode(self, *args, **kwargs):
+        with self.lock:
+            return self.tokenizer.decode(*args, **kwargs)
+
+    def batch_decode(self, *args, **kwargs):
+        with self.lock:
+            return self.tokenizer.batch_decode(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.tokenizer, name)
+
+
+class SummaryService:
+    """
+    Local HTTP service summarising uploaded PDFs or raw text on demand.
+
+    ``POST /summarise`` takes a PDF (``Content-Type: application/pdf``) or
+    UTF-8 text as the request body and streams newline-delimited JSON back:
+    a ``chunks`` event with the chunk count, a ``chunk`` event with each
+    first-tier summary as soon as it and the chunks before it are done,
+    then a ``summary`` event (or an ``error`` event). ``GET /health``
+    reports the requests in flight.
+
+    Requests run in a thread pool against the app's one warm Summariser,
+    whose batches from all requests are merged by a MicroBatcher. Nothing
+    is written to the output directory or the file tracker.
+    """
+
+    def __init__(
+        self,
+        app,
+        host="127.0.0.1",
+        port=8765,
+        max_wait=0.01,
+        max_requests=8,
+        max_upload_bytes=64 * 1024 * 1024,
+    ):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.max_wait = max_wait
+        self.max_requests = max_requests
+        self.max_upload_bytes = max_upload_bytes
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_requests, thread_name_prefix="max-agent-request"
+        )
+        self.active = 0
+        self.served = 0
+        self.server = None
+        self.batcher = None
+
+    def start_batcher(self):
+        summariser = self.app.summariser
+        summariser.tokenizer = SerialTokenizer(summariser.tokenizer)
+        self.batcher = MicroBatcher(
+            summariser, max_wait=self.max_wait, inner=summariser.pool
+        )
+        summariser.pool = self.batcher
+
+    def summarise(self, body, is_pdf, emit):
+        """Summarise one request body, reporting progress through ``emit``."""
+        config = self.app.config
+        start = time.perf_counter()
+        if is_pdf:
+            with tempfile.NamedTemporaryFile(suffix=".pdf") as f:
+                f.write(body)
+                f.flush()
+                text, code_blocks, equations = self.app.pdf_processor.process_pdf(
+                    pdf_path=f.name, save_cleaned=False
+                )
+        else:
+            text, code_blocks, equations = body.decode("utf-8"), [], []
+
+        chunks = self.app.bin_text(text)
+        emit({"event": "chunks", "count": len(chunks)})
+        summariser = self.app.summariser
+        partials = [""] * len(chunks)
+        stream = summariser.iter_summaries(
+            chunks, config.first_min_ratio, config.first_max_ratio
+        )
+        with closing(stream):
+            for index, summary in stream:
+                partials[index] = summary
+                emit({"event": "chunk", "index": index, "summary": summary})
+        summary = summariser.reduce(
+            [partials], config.second_min_ratio, config.second_max_ratio
+        )[0]
+        emit(
+            {
+                "event": "summary",
+                "summary": self.app.reintegrate_code_equations(
+                    summary, code_blocks, equations
+                ),
+                "chunks": len(chunks),
+                "seconds": round(time.perf_counter() - start, 3),
+            }
+        )
+
+    async def read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise ValueError("Malformed request line.")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return method.upper(), urlsplit(target).path, headers
+
+    async def respond(self, writer, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+
+    async def stream(self, writer, body, is_pdf):
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+        cancelled = threading.Event()
+
+        def emit(event):
+            if cancelled.is_set():
+                raise RequestCancelled()
+            loop.call_soon_threadsafe(events.put_nowait, event)
+
+        def run():
+            try:
+                self.summarise(body, is_pdf, emit)
+            except RequestCancelled:
+                pass
+            except Exception as e:
+                logging.error(f"Failed to summarise request: {e}")
+                loop.call_soon_threadsafe(
+                    events.put_nowait, {"event": "error", "message": str(e)}
+                )
+            finally:
+                loop.call_soon_threadsafe(events.put_nowait, None)
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: application/x-ndjson\r\n"
+            b"Transfer-Encoding: chunked\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+        task = loop.run_in_executor(self.executor, run)
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                data = json.dumps(event).encode("utf-8") + b"\n"
+                writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+                await writer.drain()
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        finally:
+            # A client that went away stops its request at the next event
+            cancelled.set()
+            await task
+
+    async def handle(self, reader, writer):
+        self.active += 1
+        try:
+            request = await self.read_request(reader)
+            if request is None:
+                return
+            method, path, headers = request
+            if path == "/health":
+                await self.respond(
+                    writer, 200, {"status": "ok", "requests": self.active - 1}
+                )
+            elif path != "/summarise":
+                await self.respond(writer, 404, {"error": f"No route for {path}."})
+            elif method != "POST":
+                await self.respond(writer, 405, {"error": "Use POST."})
+            elif "content-length" not in headers:
+                await self.respond(writer, 411, {"error": "Content-Length required."})
+            elif int(headers["content-length"]) > self.max_upload_bytes:
+                await self.respond(writer, 413, {"error": "Upload too large."})
+            else:
+                body = await reader.readexactly(int(headers["content-length"]))
+                content_type = headers.get("content-type", "")
+                is_pdf = content_type.startswith("application/pdf") or (
+                    body.startswith(b"%PDF-")
+                )
+                await self.stream(writer, body, is_pdf)
+                self.served += 1
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            await self.respond(writer, 400, {"error": str(e)})
+        except ConnectionError:
+            pass
+        finally:
+            self.active -= 1
+            writer.close()
+
+    async def serve(self, stop=None):
+        """Serve until ``stop`` is set, then finish the requests in flight."""
+        stop = stop or asyncio.Event()
+        connections = set()
+
+        async def handle(reader, writer):
+            task = asyncio.current_task()
+            connections.add(task)
+            try:
+                await self.handle(reader, writer)
+            finally:
+                connections.discard(task)
+
+        self.server = await asyncio.start_server(handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        logging.info(f"Serving summaries on http://{self.host}:{self.port}/summarise")
+        async with self.server:
+            await stop.wait()
+            self.server.close()
+            if connections:
+                logging.info(f"Finishing {len(connections)} request(s) in flight...")
+                await asyncio.gather(*connections, return_exceptions=True)
+        logging.info(f"Service stopped after {self.served} request(s).")
+
+    def run(self):
+        """Serve until SIGTERM or SIGINT."""
+        self.start_batcher()
+
+        async def main():
+            stop = asyncio.Event()
+            loop = asyncio.get_running_loop()
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                loop.add_signal_handler(signum, stop.set)
+            await self.serve(stop)
+
+        try:
+            asyncio.run(main())
+        finally:
+            self.executor.shutdown()
+            self.batcher.log_stats()
+            self.app.summariser.close_pool()
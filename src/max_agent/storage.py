@@ -0,0 +1,88 @@
+# storage.py
+import os
+import sqlite3
+
+
+def connect(path, timeout=30.0):
+    """
+    Open a SQLite database shared between threads and processes.
+
+    The database runs in WAL mode so readers never block the single writer,
+    and waits up to ``timeout`` seconds for another process' write lock.
+    Connections are in autocommit mode; callers open explicit
+    ``BEGIN IMMEDIATE`` transactions for multi-statement updates.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    connection = sqlite3.connect(
+        path, timeout=timeout, isolation_level=None, check_same_thread=False
+    )
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+def cache_size_schema(table, column, measure=""):
+    """
+    SQL keeping a running total of the bytes stored in ``table``.
+
+    The total lives in a one-row ``cache_size`` table, kept up to date by
+    triggers so eviction checks do not scan ``table``. Each row's size is
+    ``measure(column)``, e.g. ``length`` of a blob column, or the value of
+    ``column`` itself when ``measure`` is empty.
+    """
+    new = f"{measure}(new.{column})"
+    old = f"{measure}(old.{column})"
+    return f"""
+        CREATE TABLE IF NOT EXISTS cache_size (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            total INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO cache_size (id, total) VALUES (0, 0);
+        CREATE TRIGGER IF NOT EXISTS {table}_insert AFTER INSERT ON {table}
+        BEGIN
+            UPDATE cache_size SET total = total + {new};
+        END;
+        CREATE TRIGGER IF NOT EXISTS {table}_update AFTER UPDATE OF {column}
+            ON {table}
+        BEGIN
+            UPDATE cache_size SET total = total + {new} - {old};
+        END;
+        CREATE TRIGGER IF NOT EXISTS {table}_delete AFTER DELETE ON {table}
+        BEGIN
+            UPDATE cache_size SET total = total - {old};
+        END;
+    """
+
+
+def cache_size(connection):
+    """The running total maintained by the ``cache_size_schema`` triggers."""
+    (total,) = connection.execute(
+        "SELECT total FROM cache_size WHERE id = 0"
+    ).fetchone()
+    return total
+
+
+def evict_to_budget(connection, max_bytes, *evictors):
+    """
+    Evict cache entries once the stored bytes exceed ``max_bytes``.
+
+    Each of ``evictors`` drops some entries and returns how many, or 0 once
+    it has nothing left to drop. They are called in order until the cache
+    is back under 90% of its budget, so eviction does not run again after
+    every insert. Returns the count per evictor, or None when the cache was
+    within its budget.
+    """
+    total = cache_size(connection)
+    if total <= max_bytes:
+        return None
+    target = int(max_bytes * 0.9)
+    counts = [0] * len(evictors)
+    for i, evict in enumerate(evictors):
+        while total > target:
+            evicted = evict()
+            if not evicted:
+                break
+            counts[i] += evicted
+            total = cache_size(connection)
+    return counts
@@ -1,94 +1,482 @@
 # summariser.py
-import os
+import queue
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import itertools
+import threading
+import contextvars
+from contextlib import closing
 
-# import torch  # Unused direct import
-
-# import intel_extension_for_pytorch as ipex
 import time
 
+import numpy as np
+
+from . import metrics
+from .backends import EagerBackend, get_backend
+from .batching import LengthBudgetLogitsProcessor, length_budget, plan_batches
+from .chunker import Chunk
+from .summary_cache import SummaryCache
+
+
+def chunk_text(chunk):
+    return chunk.text if isinstance(chunk, Chunk) else chunk
+
 
 class Summariser:
-    def __init__(self, model_id, device=-1):
+    def __init__(
+        self,
+        model_id,
+        device=-1,
+        batch_size=8,
+        max_batch_tokens=8192,
+        do_sample=False,
+        cache=None,
+        backend="eager",
+        onnx_cache_dir="./onnx_models/",
+        reduce_fan_in=8,
+        reduce_level_ratios=None,
+        reduce_target_tokens=None,
+        near_duplicates=None,
+    ):
         self.model_id = model_id
         self.device = device
+        self.batch_size = batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.do_sample = do_sample
+        self.cache = cache
+        self.near_duplicates = near_duplicates
+        self.backend = get_backend(backend, onnx_cache_dir)
+        # Reduce tree: partial summaries per group, (min, max) ratios per
+        # level (the last pair repeats) and the length to reduce down to
+        self.reduce_fan_in = reduce_fan_in
+        self.reduce_level_ratios = reduce_level_ratios
+        self.reduce_target_tokens = reduce_target_tokens
         self.tokenizer = None
         self.model = None
-        self.pipeline = None
+        self.pool = None
         self.load_model()
 
     def load_model(self):
-        from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, pipeline
+        from transformers import AutoTokenizer
 
         try:
             logging.info(f"Loading tokenizer for model '{self.model_id}'...")
             self.tokenizer = AutoTokenizer.from_pretrained(self.model_id)
-            logging.info(f"Loading model '{self.model_id}'...")
-            self.model = AutoModelForSeq2SeqLM.from_pretrained(self.model_id)
-            # logging.info("Optimising model with Intel® Extension for PyTorch...")
-            # self.model = ipex.optimize(self.model, dtype=torch.float32)
-            logging.info("Creating summarisation pipeline...")
-            self.pipeline = pipeline(
-                "summarization",
-                model=self.model,
-                tokenizer=self.tokenizer,
-                device=self.device,
-            )
-            logging.info("Model and pipeline loaded successfully.")
+            logging.info(
+                f"Loading model '{self.model_id}' " f"({self.backend.name} backend)..."
+            )
+            self.model = self.backend.load(self.model_id, self.device)
+            logging.info("Model loaded successfully.")
         except Exception as e:
             logging.error(f"Failed to load model '{self.model_id}': {e}")
             raise
 
+    def start_pool(self, workers, threads=None, pin=True):
+        """
+        Run inference in ``workers`` processes forked from this one.
+
+        Call it right after loading, before this process runs inference.
+        """
+        from .backends import OnnxBackend
+        from .inference_pool import InferencePool
+
+        if isinstance(self.backend, OnnxBackend):
+            # ONNX Runtime's thread pools do not survive a fork
+            logging.warning("The onnx backend cannot be forked; running in-process.")
+            return
+        self.pool = InferencePool(self, workers, threads=threads, pin=pin)
+
+    def close_pool(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
+
     def count_tokens(self, text):
         tokens = self.tokenizer(text, return_tensors="pt", truncation=False)
         return tokens.input_ids.shape[1]
 
-    def summarise_chunk(self, chunk, min_ratio, max_ratio, retries=3, delay=3):
-        chunk_length = self.count_tokens(chunk)
-        dynamic_min_length = max(int(chunk_length * min_ratio), 1)
-        dynamic_max_length = max(int(chunk_length * max_ratio), dynamic_min_length + 1)
+    def count_tokens_many(self, texts):
+        """Token counts of ``texts``, with special tokens, in one call."""
+        if not texts:
+            return []
+        encoded = self.tokenizer(
+            list(texts), return_attention_mask=False, truncation=False
+        )["input_ids"]
+        return [len(ids) for ids in encoded]
 
-        logging.info(
-            f"Summarising chunk with {chunk_length} tokens "
-            f"(min: {dynamic_min_length}, max: {dynamic_max_length})"
+    def chunk_length(self, chunk):
+        """Token count of a chunk, reusing the count a Chunk already carries."""
+        if isinstance(chunk, Chunk):
+            return chunk.token_count
+        return self.count_tokens(chunk)
+
+    def summary_budget(self, token_count, min_ratio, max_ratio):
+        """
+        ``(min_length, max_length)`` for a chunk of ``token_count`` tokens.
+
+        The budget is taken from the input as the model sees it (truncated
+        to ``model_max_length``) and capped at the decoder's position
+        window, which ``generate`` cannot go past.
+        """
+        window = self.tokenizer.model_max_length
+        config = getattr(self.model, "config", None)
+        positions = getattr(config, "max_position_embeddings", None) or window
+        return length_budget(
+            min(token_count, window), min_ratio, max_ratio, limit=positions
+        )
+
+    def pad_token_ids(self, token_ids):
+        """
+        Padded ``input_ids`` and ``attention_mask`` tensors for pre-tokenised
+        inputs, truncated like the tokenizer truncates (keeping the final
+        special token).
+        """
+        import torch
+
+        max_length = self.tokenizer.model_max_length
+        rows = [
+            (
+                ids
+                if len(ids) <= max_length
+                else np.concatenate((ids[: max_length - 1], ids[-1:]))
+            )
+            for ids in token_ids
+        ]
+        width = max(len(ids) for ids in rows)
+        input_ids = np.full((len(rows), width), self.tokenizer.pad_token_id, np.int64)
+        attention_mask = np.zeros((len(rows), width), np.int64)
+        for row, ids in enumerate(rows):
+            if self.tokenizer.padding_side == "left":
+                input_ids[row, width - len(ids) :] = ids
+                attention_mask[row, width - len(ids) :] = 1
+            else:
+                input_ids[row, : len(ids)] = ids
+                attention_mask[row, : len(ids)] = 1
+        return {
+            "input_ids": torch.from_numpy(input_ids),
+            "attention_mask": torch.from_numpy(attention_mask),
+        }
+
+    def generate_batch(self, texts, budgets, token_ids=None):
+        """
+        Summarise ``texts`` with a single padded ``generate`` call.
+
+        ``budgets`` holds one ``(min_length, max_length)`` pair per text.
+        With ``token_ids`` (one array per text) the texts are not tokenised
+        again.
+        """
+        if token_ids is not None:
+            inputs = {
+                name: tensor.to(self.model.device)
+                for name, tensor in self.pad_token_ids(token_ids).items()
+            }
+        else:
+            inputs = self.tokenizer(
+                list(texts),
+                padding=True,
+                truncation=True,
+                max_length=self.tokenizer.model_max_length,
+                return_tensors="pt",
+            ).to(self.model.device)
+        min_lengths = [budget[0] for budget in budgets]
+        max_lengths = [budget[1] for budget in budgets]
+        num_beams = self.model.generation_config.num_beams or 1
+        length_processor = LengthBudgetLogitsProcessor(
+            min_lengths,
+            max_lengths,
+            eos_token_id=self.model.generation_config.eos_token_id,
+            num_beams=1 if self.do_sample else num_beams,
         )
+        with self.backend.inference_context():
+            output_ids = self.model.generate(
+                **inputs,
+                max_length=max(max_lengths),
+                min_length=0,
+                do_sample=self.do_sample,
+                logits_processor=[length_processor],
+            )
+        return self.tokenizer.batch_decode(output_ids, skip_special_tokens=True)
+
+    def _generate_with_retries(
+        self, texts, budgets, retries=3, delay=3, token_ids=None
+    ):
         for attempt in range(retries):
             try:
-                summary = self.pipeline(
-                    chunk,
-                    max_length=dynamic_max_length,
-                    min_length=dynamic_min_length,
-                    do_sample=False,
-                )[0]["summary_text"]
-                logging.info("Chunk summarised successfully.")
-                return summary
+                return self.generate_batch(texts, budgets, token_ids=token_ids)
             except Exception as e:
-                logging.error(f"Attempt {attempt + 1} - Error summarizing chunk: {e}")
+                logging.error(f"Attempt {attempt + 1} - Error summarizing batch: {e}")
                 if attempt < retries - 1:
                     logging.info(f"Retrying in {delay} seconds...")
                     time.sleep(delay)
+                elif len(texts) > 1:
+                    # One bad row must not blank the rows batched with it
+                    logging.error("Max retries reached. Retrying row by row.")
+                    return [
+                        self._generate_with_retries(
+                            [text],
+                            [budget],
+                            retries=1,
+                            token_ids=None if token_ids is None else [ids],
+                        )[0]
+                        for text, budget, ids in zip(
+                            texts, budgets, token_ids or [None] * len(texts)
+                        )
+                    ]
                 else:
                     logging.error("Max retries reached. Skipping this chunk.")
-                    return ""
+                    return [""]
+
+    def _model_key(self):
+        # Quantised and exported models give different summaries, so they
+        # get their own cache entries
+        if self.backend.name != EagerBackend.name:
+            return f"{self.model_id}@{self.backend.name}"
+        return self.model_id
+
+    def _cache_key(self, text, budget):
+        return SummaryCache.make_key(
+            text, self._model_key(), budget[0], budget[1], self.do_sample
+        )
+
+    def _near_duplicate_scope(self, min_ratio, max_ratio):
+        return f"{self._model_key()}:{min_ratio}:{max_ratio}:{int(self.do_sample)}"
+
+    def iter_summaries(self, chunks, min_ratio, max_ratio, retries=3, delay=3):
+        """
+        Yield ``(chunk_index, summary)`` pairs in chunk order.
+
+        Batches are planned over windows of consecutive chunks and run in a
+        background thread, so each pair is yielded as soon as every chunk
+        before it is done and the caller can work on the ready prefix while
+        later batches are still being generated. Chunks longer than the
+        model window are split rather than truncated (see
+        ``_iter_split_summaries``). A batch that fails after all retries is
+        retried row by row, and chunks that still fail on their own are
+        yielded with an empty summary.
+        """
+        lengths = [self.chunk_length(chunk) for chunk in chunks]
+        window = self.tokenizer.model_max_length
+        if any(length > window for length in lengths):
+            yield from self._iter_split_summaries(
+                chunks, lengths, min_ratio, max_ratio, retries, delay
+            )
+            return
+        texts = [chunk_text(chunk) for chunk in chunks]
+        token_ids = [getattr(chunk, "token_ids", None) for chunk in chunks]
+        budgets = [
+            self.summary_budget(length, min_ratio, max_ratio) for length in lengths
+        ]
+
+        ready = {}
+        keys = None
+        if self.cache is not None:
+            keys = [
+                self._cache_key(text, budget) for text, budget in zip(texts, budgets)
+            ]
+            cached = self.cache.get_many(keys)
+            ready = {i: cached[key] for i, key in enumerate(keys) if key in cached}
+            metrics.count("cache_hits", len(ready))
+            logging.info(
+                f"{len(ready)} of {len(chunks)} chunk summaries served from cache."
+            )
+
+        pending = [i for i in range(len(chunks)) if i not in ready]
+        if self.near_duplicates is not None:
+            scope = self._near_duplicate_scope(min_ratio, max_ratio)
+            found = self.near_duplicates.lookup_many([texts[i] for i in pending], scope)
+            reused = {i: summary for i, summary in zip(pending, found) if summary}
+            logging.info(
+                f"{len(reused)} of {len(pending)} chunk(s) reuse the summary of a "
+                f"near-duplicate."
+            )
+            ready.update(reused)
+            metrics.count("near_duplicate_hits", len(reused))
+            pending = [i for i in pending if i not in reused]
+
+        batches = [
+            [pending[i] for i in batch]
+            for batch in plan_batches(
+                [lengths[i] for i in pending],
+                self.batch_size,
+                self.max_batch_tokens,
+                window=self.batch_size * 4,
+            )
+        ]
+        logging.info(
+            f"Summarising {len(pending)} chunk(s) in {len(batches)} batch(es)."
+        )
+
+        finished = queue.Queue()
+        cancelled = threading.Event()
+
+        def job(batch):
+            batch_ids = [token_ids[i] for i in batch]
+            return (
+                [texts[i] for i in batch],
+                [budgets[i] for i in batch],
+                # Pre-tokenised chunks skip the tokenizer
+                None if any(ids is None for ids in batch_ids) else batch_ids,
+                retries,
+                delay,
+                sum(lengths[i] for i in batch),
+            )
+
+        def generated():
+            """Yield ``(batch, results, seconds)`` as batches complete."""
+            if self.pool is not None:
+                with closing(self.pool.run(job(batch) for batch in batches)) as runs:
+                    for index, results, elapsed in runs:
+                        yield batches[index], results, elapsed
+                return
+            for batch in batches:
+                if cancelled.is_set():
+                    return
+                batch_texts, batch_budgets, batch_ids, _, _, _ = job(batch)
+                start = time.perf_counter()
+                results = self._generate_with_retries(
+                    batch_texts,
+                    batch_budgets,
+                    retries=retries,
+                    delay=delay,
+                    token_ids=batch_ids,
+                )
+                yield batch, results, time.perf_counter() - start
+
+        def run_batches():
+            try:
+                for batch, results, elapsed in generated():
+                    if cancelled.is_set():
+                        return
+                    batch_tokens = sum(lengths[i] for i in batch)
+                    logging.info(
+                        f"Batch of {len(batch)} chunk(s) ({batch_tokens} tokens) "
+                        f"summarised in {elapsed:.2f}s."
+                    )
+                    if metrics.current() is not None:
+                        metrics.count("batches")
+                        metrics.count("model_chunks", len(batch))
+                        metrics.count("model_seconds", elapsed)
+                        metrics.count(
+                            "tokens_out", sum(self.count_tokens_many(results))
+                        )
+                    if keys is not None:
+                        self.cache.put_many(
+                            (keys[i], summary) for i, summary in zip(batch, results)
+                        )
+                    if self.near_duplicates is not None:
+                        self.near_duplicates.add_many(
+                            ((texts[i], summary) for i, summary in zip(batch, results)),
+                            scope,
+                        )
+                    finished.put(list(zip(batch, results)))
+            except Exception as e:
+                logging.error(f"Inference stopped: {e}")
+            finally:
+                finished.put(None)
+
+        # The thread records into the caller's metrics report
+        worker = threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(run_batches,),
+            name="max-agent-inference",
+        )
+        worker.start()
+        try:
+            next_index = 0
+            while True:
+                while next_index in ready:
+                    yield next_index, ready.pop(next_index)
+                    next_index += 1
+                if next_index >= len(chunks):
+                    break
+                results = finished.get()
+                if results is None:
+                    raise RuntimeError("Inference stopped before all chunks finished.")
+                ready.update(results)
+        finally:
+            cancelled.set()
+            worker.join()
+
+    def _iter_split_summaries(
+        self, chunks, lengths, min_ratio, max_ratio, retries, delay
+    ):
+        """
+        ``iter_summaries`` for chunks that do not all fit the model window.
+
+        A chunk longer than the window, such as a single huge sentence, is
+        split by tokens into window-sized pieces instead of being truncated,
+        and its summary is the summaries of its pieces joined. If any piece
+        fails the chunk gets an empty summary.
+        """
+        window = self.tokenizer.model_max_length
+        pieces, owners = [], []
+        for index, (chunk, length) in enumerate(zip(chunks, lengths)):
+            if length > window:
+                split = self._split_oversized(chunk_text(chunk), window)
+                logging.info(
+                    f"Chunk of {length} tokens is over the {window} token "
+                    f"window; summarising it in {len(split)} pieces."
+                )
+                split = [
+                    Chunk(piece, min(count, window))
+                    for piece, count in zip(split, self.count_tokens_many(split))
+                ]
+            else:
+                split = [chunk]
+            pieces.extend(split)
+            owners.extend([index] * len(split))
+
+        stream = self.iter_summaries(
+            pieces, min_ratio, max_ratio, retries=retries, delay=delay
+        )
+        with closing(stream):
+            for index, group in itertools.groupby(
+                zip(owners, stream), key=lambda item: item[0]
+            ):
+                summaries = [summary for _, (_, summary) in group]
+                yield index, " ".join(summaries) if all(summaries) else ""
+
+    def summarise_batch(self, chunks, min_ratio, max_ratio, retries=3, delay=3):
+        """
+        Summarise ``chunks`` in length-sorted padded batches.
+
+        Returns one summary per chunk, in the order of ``chunks``. Chunks
+        that still fail when retried on their own get an empty string.
+        """
+        return [
+            summary
+            for _, summary in self.iter_summaries(
+                chunks, min_ratio, max_ratio, retries=retries, delay=delay
+            )
+        ]
+
+    def summarise_chunk(self, chunk, min_ratio, max_ratio, retries=3, delay=3):
+        chunk_length = self.chunk_length(chunk)
+        dynamic_min_length, dynamic_max_length = self.summary_budget(
+            chunk_length, min_ratio, max_ratio
+        )
+
+        logging.info(
+            f"Summarising chunk with {chunk_length} tokens "
+            f"(min: {dynamic_min_length}, max: {dynamic_max_length})"
+        )
+        return self.summarise_batch(
+            [chunk], min_ratio, max_ratio, retries=retries, delay=delay
+        )[0]
 
     def summarise_chunks_parallel(
         self, chunks, min_ratio=0.20, max_ratio=0.35, max_workers=None
     ):
-        if max_workers is None:
-            max_workers = os.cpu_count() or 4
+        """
+        Summarise ``chunks`` in batches, dropping empty summaries.
 
-        partial_summaries = []
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [
-                executor.submit(self.summarise_chunk, chunk, min_ratio, max_ratio)
-                for chunk in chunks
-            ]
-            for future in as_completed(futures):
-                summary = future.result()
-                if summary:
-                    partial_summaries.append(summary)
-        return partial_summaries
+        ``max_workers`` is accepted for compatibility and ignored: chunks
+        are batched through the model instead of summarised one per thread.
+        """
+        return [
+            summary
+            for summary in self.summarise_batch(chunks, min_ratio, max_ratio)
+            if summary
+        ]
 
     def summarise(
         self,
@@ -98,42 +486,250 @@ class Summariser:
         second_min_ratio,
         second_max_ratio,
     ):
+        return self.summarise_documents(
+            [chunks],
+            first_min_ratio,
+            first_max_ratio,
+            second_min_ratio,
+            second_max_ratio,
+        )[0]
+
+    def summarise_documents(
+        self,
+        documents,
+        first_min_ratio,
+        first_max_ratio,
+        second_min_ratio,
+        second_max_ratio,
+        checkpoints=None,
+    ):
+        """
+        Summarise several documents, each given as a list of chunks.
+
+        The first tier batches chunks across all documents so that short
+        documents still fill a batch; the second tier is batched across the
+        documents that need it.
+
+        ``checkpoints`` optionally gives a DocumentCheckpoint (or None) per
+        document: chunks it already holds are not summarised again, and
+        every new partial summary is recorded as soon as it arrives.
+        """
         # First summarisation tier
         logging.info("Starting first summarisation tier...")
-        partial_summaries = self.summarise_chunks_parallel(
-            chunks, min_ratio=first_min_ratio, max_ratio=first_max_ratio
+        checkpoints = checkpoints or [None] * len(documents)
+        partials = []
+        pending = []
+        for document, (chunks, checkpoint) in enumerate(zip(documents, checkpoints)):
+            done = {}
+            if checkpoint is not None:
+                checkpoint.start(chunks)
+                done = checkpoint.completed(chunks)
+                if done:
+                    logging.info(
+                        f"{len(done)} of {len(chunks)} chunk summaries restored "
+                        f"from checkpoint."
+                    )
+            partials.append([done.get(index, "") for index in range(len(chunks))])
+            pending.extend(
+                (document, index, chunk)
+                for index, chunk in enumerate(chunks)
+                if index not in done
+            )
+
+        # Partial summaries arrive in chunk order and are checkpointed one
+        # by one, so an interrupted run loses at most the batches in flight
+        stream = self.iter_summaries(
+            [chunk for _, _, chunk in pending], first_min_ratio, first_max_ratio
         )
+        with closing(stream), metrics.span("first_tier"):
+            for (document, index, chunk), (_, summary) in zip(pending, stream):
+                partials[document][index] = summary
+                # Failed chunks are left out so they are retried on resume
+                if checkpoints[document] is not None and summary:
+                    checkpoints[document].record(index, chunk, summary)
+
+        with metrics.span("second_tier"):
+            return self.reduce(partials, second_min_ratio, second_max_ratio)
 
-        combined_summary = " ".join(partial_summaries)
-        combined_length = self.count_tokens(combined_summary)
-        logging.info(f"Combined summaries token length: {combined_length}")
+    def summarise_stream(
+        self,
+        chunks,
+        first_min_ratio,
+        first_max_ratio,
+        second_min_ratio,
+        second_max_ratio,
+        checkpoint=None,
+    ):
+        """
+        Summarise one document given as an iterable of chunks.
 
-        # Check if combined summary exceeds model's max length
-        if combined_length > self.tokenizer.model_max_length:
-            logging.warning(
-                f"Combined summary exceeds model's max length "
-                f"({self.tokenizer.model_max_length} tokens). "
-                f"Performing second summarization tier..."
+        Chunks are pulled and summarised a window at a time, so only the
+        partial summaries of the document are held in memory, never all of
+        its chunks. With a ``checkpoint``, chunks it holds are skipped and
+        new partial summaries are recorded as they arrive; the chunk plan
+        is not known up front here, so partials are matched chunk by chunk.
+        """
+        logging.info("Starting first summarisation tier...")
+        chunks = iter(chunks)
+        window = self.batch_size * 4
+        partial_summaries = []
+        while True:
+            block = list(itertools.islice(chunks, window))
+            if not block:
+                break
+            offset = len(partial_summaries)
+            done = checkpoint.completed(block, offset) if checkpoint else {}
+            partial_summaries.extend(
+                done.get(index, "") for index in range(offset, offset + len(block))
             )
-            dynamic_min_length = max(int(combined_length * second_min_ratio), 1)
-            dynamic_max_length = max(
-                int(combined_length * second_max_ratio), dynamic_min_length + 1
+            pending = [
+                (offset + i, chunk)
+                for i, chunk in enumerate(block)
+                if offset + i not in done
+            ]
+            stream = self.iter_summaries(
+                [chunk for _, chunk in pending], first_min_ratio, first_max_ratio
             )
+            with metrics.span("first_tier"):
+                for (index, chunk), (_, summary) in zip(pending, stream):
+                    partial_summaries[index] = summary
+                    if checkpoint is not None and summary:
+                        checkpoint.record(index, chunk, summary)
+        with metrics.span("second_tier"):
+            return self.reduce([partial_summaries], second_min_ratio, second_max_ratio)[
+                0
+            ]
 
-            try:
-                final_summary = self.pipeline(
-                    combined_summary,
-                    max_length=dynamic_max_length,
-                    min_length=dynamic_min_length,
-                    do_sample=False,
-                )[0]["summary_text"]
-                logging.info("Final summary generated successfully.")
-                return final_summary
-            except Exception as e:
-                logging.error(f"Error in second summarisation tier: {e}")
-                return "Summary could not be generated."
-        else:
+    def level_ratios(self, level, second_min_ratio, second_max_ratio):
+        """(min, max) ratios for reduce ``level``, counting from 1."""
+        if not self.reduce_level_ratios:
+            return second_min_ratio, second_max_ratio
+        index = min(level, len(self.reduce_level_ratios)) - 1
+        min_ratio, max_ratio = self.reduce_level_ratios[index]
+        return min_ratio, max_ratio
+
+    def _split_oversized(self, text, window):
+        """Split ``text`` into pieces of at most ``window`` tokens."""
+        budget = window - self.tokenizer.num_special_tokens_to_add()
+        ids = self.tokenizer(text, add_special_tokens=False)["input_ids"]
+        return [
+            self.tokenizer.decode(ids[start : start + budget])
+            for start in range(0, len(ids), budget)
+        ]
+
+    def group_partials(self, partials, window):
+        """
+        Pack consecutive partial summaries into chunks for the next level.
+
+        Each chunk holds at most ``reduce_fan_in`` partial summaries and
+        ``window`` tokens, so nothing is truncated by the model.
+        """
+        lengths = self.count_tokens_many(partials)
+        if any(length > window for length in lengths):
+            pieces = []
+            for partial, length in zip(partials, lengths):
+                if length > window:
+                    pieces.extend(self._split_oversized(partial, window))
+                else:
+                    pieces.append(partial)
+            partials, lengths = pieces, self.count_tokens_many(pieces)
+
+        chunks = []
+        group, group_tokens = [], 0
+        for partial, length in zip(partials, lengths):
+            if group and (
+                len(group) >= self.reduce_fan_in or group_tokens + length > window
+            ):
+                chunks.append(Chunk(" ".join(group), group_tokens))
+                group, group_tokens = [], 0
+            group.append(partial)
+            group_tokens += length
+        if group:
+            chunks.append(Chunk(" ".join(group), group_tokens))
+        return chunks
+
+    def reduce(self, documents, second_min_ratio, second_max_ratio):
+        """
+        Reduce each document's partial summaries to a single summary.
+
+        While a document's combined summary is longer than the target
+        (``reduce_target_tokens``, by default the model's max length), its
+        partial summaries are regrouped into window-sized chunks of at most
+        ``reduce_fan_in`` summaries and summarised again, one tree level at
+        a time. Each level is batched across all documents that still need
+        it and shrinks the text by at least its max ratio.
+        """
+        window = self.tokenizer.model_max_length
+        target = self.reduce_target_tokens or window
+        results = [None] * len(documents)
+        partials = [[summary for summary in doc if summary] for doc in documents]
+        previous_lengths = [None] * len(documents)
+        level = 0
+        while True:
+            active = []
+            combined = [" ".join(doc) for doc in partials]
+            for index, length in enumerate(self.count_tokens_many(combined)):
+                if results[index] is not None:
+                    continue
+                if level == 0:
+                    logging.info(f"Combined summaries token length: {length}")
+                if length <= target:
+                    results[index] = combined[index]
+                elif previous_lengths[index] is not None and (
+                    length >= previous_lengths[index]
+                ):
+                    # Guard against a level that does not shorten the text
+                    logging.warning(
+                        f"Reduce level {level} did not shorten the summary "
+                        f"({length} tokens); stopping."
+                    )
+                    results[index] = combined[index]
+                else:
+                    previous_lengths[index] = length
+                    active.append(index)
+            if not active:
+                return results
+
+            level += 1
+            min_ratio, max_ratio = self.level_ratios(
+                level, second_min_ratio, second_max_ratio
+            )
+            groups = {
+                index: self.group_partials(partials[index], window) for index in active
+            }
+            chunks = [chunk for index in active for chunk in groups[index]]
+            logging.info(
+                f"Reduce level {level}: {len(active)} document(s) over {target} "
+                f"tokens, summarising {len(chunks)} group(s) "
+                f"(ratios {min_ratio}-{max_ratio})..."
+            )
+            start = time.perf_counter()
+            summaries = iter(
+                self.summarise_batch(chunks, min_ratio, max_ratio, retries=1)
+            )
+            for index in active:
+                reduced = [
+                    summary
+                    for summary in itertools.islice(summaries, len(groups[index]))
+                    if summary
+                ]
+                if reduced:
+                    partials[index] = reduced
+                else:
+                    logging.error(f"Error in reduce level {level}.")
+                    results[index] = "Summary could not be generated."
+            input_tokens = sum(chunk.token_count for chunk in chunks)
+            output_tokens = sum(
+                self.count_tokens_many(
+                    [
+                        partial
+                        for index in active
+                        if results[index] is None
+                        for partial in partials[index]
+                    ]
+                )
+            )
             logging.info(
-                "Combined summary within token limits. Returning combined summary."
+                f"Reduce level {level}: {input_tokens} -> {output_tokens} tokens "
+                f"in {time.perf_counter() - start:.2f}s."
             )
-            return combined_summary
@@ -0,0 +1,132 @@
+# summary_cache.py
+import time
+import hashlib
+import logging
+import threading
+
+from .storage import cache_size_schema, connect, evict_to_budget
+
+
+def text_digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    """
+    Persistent, content-addressed cache of chunk summaries.
+
+    Entries are keyed by the chunk text hash together with everything that
+    changes the generated summary: model id, min/max length and do_sample.
+    The cache lives in a SQLite database in WAL mode, so several worker
+    processes can share it, and the least recently used entries are evicted
+    once the stored summaries exceed ``max_bytes``.
+    """
+
+    def __init__(self, path, max_bytes=512 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.connection = connect(path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS summaries (
+                key TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS summaries_last_access
+                ON summaries (last_access);
+            """)
+        self.connection.executescript(cache_size_schema("summaries", "size"))
+
+    @staticmethod
+    def make_key(text, model_id, min_length, max_length, do_sample):
+        digest = text_digest(text)
+        return f"{digest}:{model_id}:{min_length}:{max_length}:{int(bool(do_sample))}"
+
+    def get_many(self, keys):
+        """Return a ``{key: summary}`` dict for the keys found in the cache."""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self.lock:
+            # SQLite limits the number of bound parameters per statement
+            for start in range(0, len(keys), 500):
+                batch = keys[start : start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self.connection.execute(
+                    f"SELECT key, summary FROM summaries WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self.connection.execute("BEGIN IMMEDIATE")
+                try:
+                    self.connection.executemany(
+                        "UPDATE summaries SET last_access = ? WHERE key = ?",
+                        [(now, key) for key in found],
+                    )
+                    self.connection.execute("COMMIT")
+                except Exception:
+                    self.connection.execute("ROLLBACK")
+                    raise
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items):
+        """Store ``(key, summary)`` pairs, then evict down to ``max_bytes``."""
+        now = time.time()
+        rows = [
+            (key, summary, len(summary.encode("utf-8")), now)
+            for key, summary in items
+            if summary
+        ]
+        if not rows:
+            return
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                self.connection.executemany(
+                    "INSERT INTO summaries (key, summary, size, last_access) "
+                    "VALUES (?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+                    "summary = excluded.summary, size = excluded.size, "
+                    "last_access = excluded.last_access",
+                    rows,
+                )
+                self._evict()
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+
+    def put(self, key, summary):
+        self.put_many([(key, summary)])
+
+    def _evict_oldest(self):
+        return self.connection.execute(
+            "DELETE FROM summaries WHERE key = "
+            "(SELECT key FROM summaries ORDER BY last_access LIMIT 1)"
+        ).rowcount
+
+    def _evict(self):
+        counts = evict_to_budget(self.connection, self.max_bytes, self._evict_oldest)
+        if counts is not None:
+            logging.info(f"Summary cache evicted {counts[0]} entries.")
+
+    def log_stats(self):
+        total = self.hits + self.misses
+        rate = 100.0 * self.hits / total if total else 0.0
+        logging.info(
+            f"Summary cache: {self.hits} hit(s), {self.misses} miss(es) "
+            f"({rate:.1f}% hit rate)."
+        )
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,187 @@
+# watcher.py
+import os
+import time
+import errno
+import ctypes
+import select
+import struct
+import logging
+import ctypes.util
+from stat import S_ISREG
+
+# inotify(7) event masks
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyChanges:
+    """Names of entries changed in one directory, from Linux inotify."""
+
+    def __init__(self, directory):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, f"Cannot watch '{directory}'")
+
+    def changes(self, timeout):
+        """
+        Names changed within ``timeout`` seconds, or None when the kernel
+        queue overflowed and the directory has to be scanned again.
+        """
+        names = set()
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        while readable:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                _, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset : offset + length].rstrip(b"\0")
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    return None
+                if name:
+                    names.add(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingChanges:
+    """Names of entries whose size or mtime changed between directory scans."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                snapshot[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def changes(self, timeout):
+        time.sleep(timeout)
+        snapshot = self.scan()
+        names = {
+            name for name, stat in snapshot.items() if self.snapshot.get(name) != stat
+        }
+        self.snapshot = snapshot
+        return names
+
+    def close(self):
+        pass
+
+
+class DirectoryWatcher:
+    """
+    New and changed PDFs in a directory, once they have stopped changing.
+
+    Changes come from inotify where the platform has it and from periodic
+    scans otherwise (or when ``polling`` is set, e.g. for network mounts,
+    where inotify does not see writes from other hosts). A changed file is
+    only reported after its size and mtime have stayed the same for
+    ``settle_seconds``, so uploads and copies in progress are not read
+    half-written. Hidden files (such as rsync's temporary copies) and
+    anything that is not a regular file are ignored.
+    """
+
+    def __init__(
+        self,
+        directory,
+        suffix=".pdf",
+        settle_seconds=1.0,
+        poll_interval=1.0,
+        polling=False,
+    ):
+        self.directory = directory
+        self.suffix = suffix
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        # name -> (size, mtime_ns, unchanged since)
+        self.pending = {}
+        self.backend = None
+        if not polling:
+            try:
+                self.backend = InotifyChanges(directory)
+                logging.info(f"Watching '{directory}' with inotify.")
+            except OSError as e:
+                logging.warning(f"inotify unavailable ({e}); polling instead.")
+        if self.backend is None:
+            self.backend = PollingChanges(directory)
+            logging.info(f"Watching '{directory}' every {poll_interval}s.")
+
+    def wanted(self, name):
+        return not name.startswith(".") and name.lower().endswith(self.suffix)
+
+    def add(self, names):
+        """
+        Report ``names`` once they have settled, as if they had just changed.
+
+        Used for files that were already in the directory when watching
+        started, which may still be being copied.
+        """
+        for name in names:
+            if self.wanted(name) and name not in self.pending:
+                self.pending[name] = (None, None, 0.0)
+
+    def ready(self, timeout=None):
+        """
+        Names of files that have settled, waiting at most ``timeout`` seconds
+        (``poll_interval`` by default) for changes.
+        """
+        timeout = self.poll_interval if timeout is None else timeout
+        if self.pending:
+            # Wake up in time to report the next file that settles
+            now = time.monotonic()
+            settles = min(since for _, _, since in self.pending.values())
+            timeout = max(0.0, min(timeout, settles + self.settle_seconds - now))
+        names = self.backend.changes(timeout)
+        if names is None:
+            logging.warning("Change events were lost; rescanning the directory.")
+            names = os.listdir(self.directory)
+        self.add(names)
+
+        ready = []
+        now = time.monotonic()
+        for name, (size, mtime_ns, since) in list(self.pending.items()):
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                del self.pending[name]
+                continue
+            if not S_ISREG(stat.st_mode):
+                # Such as a directory named *.pdf
+                del self.pending[name]
+                continue
+            if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                self.pending[name] = (stat.st_size, stat.st_mtime_ns, now)
+            elif now - since >= self.settle_seconds:
+                del self.pending[name]
+                ready.append(name)
+        return sorted(ready)
+
+    def close(self):
+        self.backend.close()
@@ -0,0 +1,39 @@
+# test_backends.py
+import unittest
+from src.max_agent.backends import OnnxBackend, get_backend
+from src.max_agent.summary_cache import SummaryCache
+from test_summariser import FakeSummariser
+
+
+class TestBackends(unittest.TestCase):
+    def test_get_backend(self):
+        self.assertEqual(get_backend("int8").name, "int8")
+        self.assertEqual(get_backend("onnx", "/tmp/x").cache_dir, "/tmp/x")
+        with self.assertRaises(ValueError):
+            get_backend("fp8")
+
+    def test_onnx_export_path_is_per_model(self):
+        backend = OnnxBackend("./onnx_models/")
+        self.assertEqual(
+            backend.export_path("facebook/bart-large-cnn"),
+            backend.export_path("facebook/bart-large-cnn"),
+        )
+        self.assertNotEqual(
+            backend.export_path("facebook/bart-large-cnn"),
+            backend.export_path("facebook/bart-large-xsum"),
+        )
+
+    def test_cache_keys_differ_by_backend(self):
+        eager = FakeSummariser("fake")
+        int8 = FakeSummariser("fake", backend="int8")
+        self.assertEqual(
+            eager._cache_key("text", (1, 2)),
+            SummaryCache.make_key("text", "fake", 1, 2, False),
+        )
+        self.assertNotEqual(
+            eager._cache_key("text", (1, 2)), int8._cache_key("text", (1, 2))
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
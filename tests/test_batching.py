@@ -0,0 +1,33 @@
+# test_batching.py
+import unittest
+from src.max_agent.batching import length_budget, plan_batches
+
+
+class TestBatching(unittest.TestCase):
+    def test_plan_batches_respects_limits(self):
+        lengths = [100, 900, 300, 120, 880, 50, 310]
+        batches = plan_batches(lengths, batch_size=3, max_batch_tokens=2000)
+        self.assertEqual(sorted(i for batch in batches for i in batch), list(range(7)))
+        for batch in batches:
+            self.assertLessEqual(len(batch), 3)
+            padded = len(batch) * max(lengths[i] for i in batch)
+            self.assertLessEqual(padded, 2000)
+        # Longest items are grouped together
+        self.assertEqual(batches[0], [1, 4])
+
+    def test_oversized_item_gets_own_batch(self):
+        batches = plan_batches([5000, 10], batch_size=8, max_batch_tokens=1024)
+        self.assertEqual(batches, [[0], [1]])
+
+    def test_length_budget(self):
+        self.assertEqual(length_budget(100, 0.25, 0.45), (25, 45))
+        self.assertEqual(length_budget(2, 0.25, 0.45), (1, 2))
+
+    def test_length_budget_limit(self):
+        self.assertEqual(length_budget(2816, 0.25, 0.45, limit=1024), (704, 1024))
+        self.assertEqual(length_budget(4000, 0.3, 0.45, limit=1024), (1023, 1024))
+        self.assertEqual(length_budget(100, 0.25, 0.45, limit=1024), (25, 45))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+# test_benchmarks.py
+import os
+import sys
+import json
+import tempfile
+import subprocess
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS = os.path.join(ROOT, "benchmarks")
+sys.path.insert(0, BENCHMARKS)
+
+from synthetic import CORPUS, Spec, document_pages, write_corpus
+
+
+class TestSyntheticCorpus(unittest.TestCase):
+    def test_corpus_is_deterministic(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths, digests = write_corpus(os.path.join(tmp, "first"))
+            _, again = write_corpus(os.path.join(tmp, "second"))
+            self.assertEqual(set(paths), {spec.name for spec in CORPUS})
+            self.assertEqual(digests, again)
+        # The baseline was recorded on the same bytes
+        with open(os.path.join(BENCHMARKS, "baselines", "reference.json")) as f:
+            work = json.load(f)["work"]
+        self.assertEqual(digests, {name: work[name]["pdf"] for name in digests})
+
+    def test_specs_shape_the_text(self):
+        spec = Spec("tiny", pages=2, words_per_page=60, code_blocks_per_page=1)
+        pages = document_pages(spec)
+        self.assertEqual(len(pages), 2)
+        self.assertEqual(pages, document_pages(spec))
+        self.assertTrue(all("```" in page for page in pages))
+
+
+class TestBenchSuite(unittest.TestCase):
+    """Run the suite on the smallest document, so a broken suite fails here."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.results = cls.path("results.json")
+        cls.run_result = cls.bench(
+            "run", "--documents", "short", "--repeat", "1", "--output", cls.results
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    @classmethod
+    def path(cls, name):
+        return os.path.join(cls.tmp.name, name)
+
+    @staticmethod
+    def bench(*args):
+        return subprocess.run(
+            [sys.executable, os.path.join(BENCHMARKS, "bench_suite.py"), *args],
+            cwd=ROOT,
+            env=dict(os.environ, PYTHONPATH=os.path.join(ROOT, "src")),
+            capture_output=True,
+            text=True,
+        )
+
+    def baseline(self, slowdown):
+        """The results, doctored to look ``slowdown`` times faster."""
+        with open(self.results) as f:
+            report = json.load(f)
+        for values in report["benchmarks"].values():
+            values["min"] /= slowdown
+            values["median"] /= slowdown
+        path = self.path(f"baseline_{slowdown}.json")
+        with open(path, "w") as f:
+            json.dump(report, f)
+        return path
+
+    def test_run_times_every_stage(self):
+        self.assertEqual(self.run_result.returncode, 0, self.run_result.stderr)
+        with open(self.results) as f:
+            report = json.load(f)
+        stages = ["process_pdf", "bin_text", "summarise", "render", "end_to_end"]
+        for stage in stages:
+            self.assertIn(f"{stage}/short", report["benchmarks"])
+        self.assertEqual(list(report["work"]), ["short"])
+
+    def test_compare_exits_with_1_on_slowdowns(self):
+        within = self.bench("compare", self.results, self.baseline(1.1))
+        self.assertEqual(within.returncode, 0, within.stdout)
+        slower = self.bench("compare", self.results, self.baseline(1.2))
+        self.assertEqual(slower.returncode, 1, slower.stdout)
+        self.assertIn("REGRESSION", slower.stdout)
+
+
+if __name__ == "__main__":
+    unittest.main()
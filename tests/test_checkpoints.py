@@ -0,0 +1,115 @@
+# test_checkpoints.py
+import os
+import tempfile
+import unittest
+from unittest import mock
+from src.max_agent.checkpoints import CheckpointStore, DocumentCheckpoint
+from test_summariser import FakeSummariser
+
+
+class Killed(BaseException):
+    """Stands in for the process being killed mid-document."""
+
+
+class KilledCheckpoint(DocumentCheckpoint):
+    """Kills the run once ``limit`` chunk summaries were recorded."""
+
+    def __init__(self, path, limit):
+        super().__init__(path)
+        self.limit = limit
+
+    def record(self, index, chunk, summary):
+        super().record(index, chunk, summary)
+        if len(self.partials) == self.limit:
+            raise Killed()
+
+
+class TestCheckpoints(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "doc")
+        self.chunks = [f"chunk number {n} " + "word " * n for n in range(10)]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def summarise(self, summariser, checkpoint, streaming=False):
+        if streaming:
+            return summariser.summarise_stream(
+                iter(self.chunks), 0.25, 0.45, 0.6, 0.8, checkpoint=checkpoint
+            )
+        return summariser.summarise_documents(
+            [self.chunks], 0.25, 0.45, 0.6, 0.8, checkpoints=[checkpoint]
+        )[0]
+
+    def test_resume_after_kill_summarises_only_missing_chunks(self):
+        for streaming in (False, True):
+            with self.subTest(streaming=streaming):
+                expected = self.summarise(FakeSummariser("fake", batch_size=2), None)
+                path = os.path.join(self.tmp.name, f"doc-{streaming}")
+                killed = FakeSummariser("fake", batch_size=2)
+                with self.assertRaises(Killed):
+                    self.summarise(killed, KilledCheckpoint(path, 6), streaming)
+
+                resumed = FakeSummariser("fake", batch_size=2)
+                summary = self.summarise(resumed, DocumentCheckpoint(path), streaming)
+                self.assertEqual(summary, expected)
+                first_tier = [text for batch in resumed.generated for text in batch]
+                self.assertEqual(
+                    sorted(set(first_tier) & set(self.chunks)),
+                    sorted(self.chunks[6:]),
+                )
+
+    def test_torn_line_and_changed_plan(self):
+        checkpoint = DocumentCheckpoint(self.path)
+        checkpoint.start(self.chunks)
+        checkpoint.record(0, self.chunks[0], "first")
+        checkpoint.record(1, self.chunks[1], "second")
+        with open(checkpoint.partials_path, "a", encoding="utf-8") as f:
+            f.write('{"index": 2, "dig')
+
+        reopened = DocumentCheckpoint(self.path)
+        reopened.start(self.chunks)
+        self.assertEqual(reopened.completed(self.chunks), {0: "first", 1: "second"})
+
+        rechunked = DocumentCheckpoint(self.path)
+        rechunked.start(self.chunks[1:])
+        self.assertEqual(rechunked.completed(self.chunks[1:]), {})
+        self.assertEqual(DocumentCheckpoint(self.path).partials, {})
+
+    def test_store_keys_by_content_and_settings(self):
+        pdf = os.path.join(self.tmp.name, "a.pdf")
+        with open(pdf, "wb") as f:
+            f.write(b"%PDF-1.4 content")
+        store = CheckpointStore(self.tmp.name, "model", "settings")
+        checkpoint = store.open(pdf)
+        checkpoint.record(0, "chunk", "summary")
+        self.assertEqual(store.open(pdf).completed(["chunk"]), {0: "summary"})
+        other = CheckpointStore(self.tmp.name, "model", "other settings")
+        self.assertEqual(other.open(pdf).partials, {})
+        store.remove(pdf)
+        self.assertFalse(os.path.exists(checkpoint.path))
+
+    def test_store_reuses_content_hashes(self):
+        pdf = os.path.join(self.tmp.name, "a.pdf")
+        with open(pdf, "wb") as f:
+            f.write(b"%PDF-1.4 content")
+        stat = os.stat(pdf)
+        known = {pdf: (stat.st_size, stat.st_mtime_ns, "hash from the tracker")}
+        store = CheckpointStore(self.tmp.name, "model", "settings", known)
+        with mock.patch(
+            "src.max_agent.file_tracker.file_digest", return_value="digest"
+        ) as file_digest:
+            first = store.open(pdf).path
+            self.assertEqual(store.open(pdf).path, first)
+            self.assertEqual(file_digest.call_count, 0)
+            with open(pdf, "ab") as f:
+                f.write(b" changed")
+            self.assertNotEqual(store.open(pdf).path, first)
+            store.open(pdf)
+            store.remove(pdf)
+            self.assertEqual(file_digest.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+# test_chunk_store.py
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.max_agent.chunk_store import ChunkStore
+from src.max_agent.chunker import TokenChunker
+from test_summariser import FakeSummariser
+
+
+class WordIdTokenizer:
+    """One id per word (its length) between BOS and EOS, counting calls."""
+
+    name_or_path = "word-ids"
+    model_max_length = 1024
+    pad_token_id = 1
+    padding_side = "right"
+
+    def __init__(self):
+        self.calls = 0
+
+    def num_special_tokens_to_add(self):
+        return 2
+
+    def __call__(self, texts, add_special_tokens=True, **kwargs):
+        self.calls += 1
+        ids = [[len(word) + 3 for word in text.split()] for text in texts]
+        if add_special_tokens:
+            ids = [[0] + row + [2] for row in ids]
+        return {"input_ids": ids}
+
+
+class TestChunkStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "doc_cleaned.chunks")
+        self.tokenizer = WordIdTokenizer()
+        self.store = ChunkStore(TokenChunker(self.tokenizer, max_tokens=20))
+        self.text = " ".join(f"Sentence {n} has some words." for n in range(20))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_is_memory_mapped_and_skips_tokenisation(self):
+        chunks = self.store.chunk(self.text, self.path)
+        self.assertEqual(
+            [chunk.text for chunk in chunks],
+            [chunk.text for chunk in self.store.chunker.chunk(self.text)],
+        )
+        calls = self.tokenizer.calls
+        loaded = self.store.chunk(self.text, self.path)
+        self.assertEqual(self.tokenizer.calls, calls)
+        self.assertEqual([chunk.text for chunk in loaded], [c.text for c in chunks])
+        first = loaded[0]
+        self.assertIsInstance(first.token_ids.base, np.memmap)
+        self.assertEqual(
+            first.token_ids.tolist(), self.tokenizer([first.text])["input_ids"][0]
+        )
+        self.assertEqual(first.token_count, len(first.token_ids))
+
+    def test_changed_text_or_chunk_size_is_rechunked(self):
+        self.store.chunk(self.text, self.path)
+        changed = self.store.chunk(self.text + " One more.", self.path)
+        self.assertTrue(changed[-1].text.endswith("One more."))
+        smaller = ChunkStore(TokenChunker(self.tokenizer, max_tokens=8))
+        self.assertEqual(len(smaller.chunk(self.text, self.path)), 20)
+
+    def test_summariser_feeds_token_ids(self):
+        summariser = FakeSummariser("fake")
+        summariser.tokenizer = self.tokenizer
+        chunks = self.store.chunk(self.text, self.path)
+        received = []
+
+        def generate_batch(texts, budgets, token_ids=None):
+            received.extend(token_ids)
+            return list(texts)
+
+        summariser.generate_batch = generate_batch
+        summariser.summarise_batch(chunks, 0.25, 0.45)
+        self.assertEqual(len(received), len(chunks))
+        inputs = summariser.pad_token_ids(received[:2])
+        self.assertEqual(inputs["input_ids"].shape[0], 2)
+        self.assertEqual(
+            inputs["attention_mask"].sum(dim=1).tolist(),
+            [len(ids) for ids in received[:2]],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+# test_chunker.py
+import unittest
+from src.max_agent.chunker import TokenChunker
+
+
+class WhitespaceTokenizer:
+    """One token per word plus BOS/EOS, enough to check chunk boundaries."""
+
+    def num_special_tokens_to_add(self):
+        return 2
+
+    def __call__(self, texts, add_special_tokens=True, **kwargs):
+        extra = 2 if add_special_tokens else 0
+        return {"input_ids": [[0] * (len(text.split()) + extra) for text in texts]}
+
+
+class TestTokenChunker(unittest.TestCase):
+    def setUp(self):
+        self.chunker = TokenChunker(WhitespaceTokenizer(), max_tokens=12)
+
+    def test_greedy_sentence_packing(self):
+        text = "One two three. Four five six seven! Eight nine? Ten."
+        chunks = self.chunker.chunk(text)
+        # 5 + 6 tokens fit in 12, the third sentence (4 tokens) does not
+        self.assertEqual(
+            [chunk.text for chunk in chunks],
+            ["One two three. Four five six seven!", "Eight nine? Ten."],
+        )
+        # Token counts include one set of special tokens per chunk
+        self.assertEqual([chunk.token_count for chunk in chunks], [9, 5])
+
+    def test_long_sentence_gets_own_chunk(self):
+        long_sentence = " ".join(["word"] * 20) + "."
+        chunks = self.chunker.chunk(f"Short one. {long_sentence} Tail.")
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(chunks[1].text, long_sentence)
+        self.assertEqual(chunks[1].token_count, 22)
+
+
+if __name__ == "__main__":
+    unittest.main()
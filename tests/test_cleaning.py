@@ -0,0 +1,48 @@
+# test_cleaning.py
+import json
+import os
+import unittest
+from src.max_agent.pdf_processor import PDFProcessor
+
+GOLDEN = os.path.join(os.path.dirname(__file__), "golden", "cleaning.json")
+
+
+class TestCleaningEngine(unittest.TestCase):
+    """Compare the cleaning engine with output recorded from the regex chain."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.processor = PDFProcessor(font_dir="./dejavu-sans/")
+        with open(GOLDEN, encoding="utf-8") as f:
+            cls.cases = json.load(f)
+
+    def test_matches_golden_corpus(self):
+        for case in self.cases:
+            with self.subTest(pages=case["pages"][:1]):
+                cleaned, code_blocks, equations = (
+                    self.processor.extract_code_and_equations(case["pages"])
+                )
+                self.assertEqual(self.processor.cleaner.clean(cleaned), case["text"])
+                self.assertEqual(code_blocks, case["code_blocks"])
+                self.assertEqual(equations, case["equations"])
+
+    def test_step_by_step_cleaning_matches_engine(self):
+        for case in self.cases:
+            cleaned, _, _ = self.processor.extract_code_and_equations(case["pages"])
+            text = self.processor.final_text_cleaning(
+                self.processor.clean_text(cleaned)
+            )
+            self.assertEqual(text, case["text"])
+
+    def test_pages_join_like_whole_text(self):
+        cleaner = self.processor.cleaner
+        pieces = ["Open (", "note ) end :", "value . Done"]
+        joined = ""
+        for piece in pieces:
+            piece = cleaner.clean(piece + "\n")
+            joined += cleaner.separator(joined, piece) + piece
+        self.assertEqual(joined, cleaner.clean("\n".join(pieces)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+# test_extractive.py
+import unittest
+from src.max_agent.extractive import ExtractiveFilter
+
+
+class TestExtractiveFilter(unittest.TestCase):
+    def setUp(self):
+        topics = ["apps", "repos", "secrets", "themes", "caching", "layouts"]
+        self.sentences = []
+        for i, topic in enumerate(topics * 3):
+            self.sentences.append(
+                f"Sentence {i} explains how {topic} work with shared {topics[i % 2]} "
+                f"settings and deployment options."
+            )
+        self.text = " ".join(self.sentences)
+
+    def test_keeps_about_keep_ratio_in_order(self):
+        filtered = ExtractiveFilter(keep_ratio=0.5, redundancy_threshold=1.1).filter(
+            self.text
+        )
+        kept = filtered.split(". ")
+        self.assertLess(len(filtered.split()), 0.6 * len(self.text.split()))
+        self.assertGreaterEqual(len(filtered.split()), 0.5 * len(self.text.split()))
+        positions = [self.text.index(sentence) for sentence in kept]
+        self.assertEqual(positions, sorted(positions))
+
+    def test_drops_repeated_headers(self):
+        header = "Home / Deploy / Share your app."
+        text = " ".join(f"{header} {sentence}" for sentence in self.sentences)
+        filtered = ExtractiveFilter(keep_ratio=1.0).filter(text)
+        self.assertEqual(filtered.count(header), 1)
+
+    def test_short_text_is_unchanged(self):
+        self.assertEqual(ExtractiveFilter().filter("One. Two."), "One. Two.")
+
+    def test_pieces_match_whole_text(self):
+        extractive = ExtractiveFilter(keep_ratio=0.5, block_size=5)
+        pieces = [self.text[:100], self.text[100:517], self.text[517:]]
+        self.assertEqual(
+            "".join(extractive.iter_filter(pieces)), extractive.filter(self.text)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+# test_extractors.py
+import os
+import tempfile
+import unittest
+from src.max_agent.config import Config
+from src.max_agent.extractors import (
+    AutoExtractor,
+    Extractor,
+    PdfplumberExtractor,
+    get_extractor,
+)
+from src.max_agent.pdf_processor import PDFProcessor
+
+SAMPLE = "./pdfs/Share your app - Streamlit Docs.pdf"
+
+
+class ScriptedExtractor(Extractor):
+    """Fast extractor stand-in returning fixed text per page."""
+
+    name = "scripted"
+
+    def __init__(self, texts):
+        self.texts = texts
+        super().__init__()
+
+    def page_count(self, pdf_path):
+        return len(self.texts)
+
+    def _iter_pages(self, pdf_path, first_page, last_page):
+        for page_num in range(first_page, (last_page or len(self.texts)) + 1):
+            yield page_num, self.texts[page_num - 1]
+
+
+class TestExtractors(unittest.TestCase):
+    def test_fast_extractors_match_pdfplumber_words(self):
+        reference = set(
+            " ".join(
+                text for _, text in PdfplumberExtractor().iter_pages(SAMPLE)
+            ).split()
+        )
+        for name in ("pdfium", "pdfminer", "auto"):
+            with self.subTest(extractor=name):
+                pages = list(get_extractor(name).iter_pages(SAMPLE))
+                words = set(" ".join(text for _, text in pages).split())
+                self.assertGreater(len(reference & words) / len(reference), 0.9)
+
+    def test_page_range(self):
+        pdfium = get_extractor("pdfium")
+        count = pdfium.page_count(SAMPLE)
+        self.assertEqual([page for page, _ in pdfium.iter_pages(SAMPLE, 2, 3)], [2, 3])
+        self.assertEqual(pdfium.pages, 2)
+        self.assertEqual(get_extractor("pdfminer").page_count(SAMPLE), count)
+
+    def test_auto_falls_back_on_empty_or_glued_pages(self):
+        reference = dict(PdfplumberExtractor().iter_pages(SAMPLE))
+        good = "A page of ordinary, well spaced text. " * 5
+        glued = "Thisisonelongrunofgluedwordsfromabrokenextractor " * 5
+        texts = [good, "", glued] + [good] * (len(reference) - 3)
+        auto = AutoExtractor(fast=ScriptedExtractor(texts))
+        pages = dict(auto.iter_pages(SAMPLE))
+        self.assertEqual(pages[1], good)
+        self.assertEqual(pages[2], reference[2])
+        self.assertEqual(pages[3], reference[3])
+        self.assertEqual((auto.fallbacks, auto.fallback.pages), (2, 2))
+
+    def test_parallel_extraction_merges_counters(self):
+        processor = PDFProcessor(
+            font_dir="./dejavu-sans/", extraction_workers=2, extractor="auto"
+        )
+        self.addCleanup(processor.close)
+        pages = list(processor.iter_raw_pages(SAMPLE))
+        self.assertEqual(processor.extractor.pages, len(pages))
+        self.assertEqual(processor.extractor.fast.pages, len(pages))
+
+    def test_extractor_changes_summary_fingerprint(self):
+        fingerprints = set()
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ("pdfplumber", "pdfium", "pdfminer"):
+                path = os.path.join(tmp, f"{name}.yaml")
+                with open(path, "w") as f:
+                    f.write(f"pdf_extractor: {name}\n")
+                fingerprints.add(Config(path).summary_fingerprint())
+        self.assertEqual(len(fingerprints), 3)
+
+    def test_unknown_extractor(self):
+        with self.assertRaises(ValueError):
+            get_extractor("ocr")
+
+
+if __name__ == "__main__":
+    unittest.main()
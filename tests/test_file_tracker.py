@@ -0,0 +1,62 @@
+# test_file_tracker.py
+import os
+import tempfile
+import unittest
+from src.max_agent.file_tracker import FileTracker
+
+
+class TestFileTracker(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = os.path.join(self.tmp.name, "state.sqlite3")
+        self.pdf = self.write("a.pdf", b"%PDF first")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as f:
+            f.write(content)
+        return path
+
+    def tracker(self, **kwargs):
+        tracker = FileTracker(self.db, model_id="model", fingerprint="f1", **kwargs)
+        self.addCleanup(tracker.close)
+        return tracker
+
+    def test_processed_state_persists(self):
+        self.assertFalse(self.tracker().is_processed(self.pdf))
+        self.tracker().mark_as_processed(self.pdf)
+        self.assertTrue(self.tracker().is_processed(self.pdf))
+
+    def test_renamed_file_is_recognised_by_content(self):
+        self.tracker().mark_as_processed(self.pdf)
+        renamed = os.path.join(self.tmp.name, "b.pdf")
+        os.rename(self.pdf, renamed)
+        self.assertTrue(self.tracker().is_processed(renamed))
+
+    def test_changed_content_or_settings_are_reprocessed(self):
+        self.tracker().mark_as_processed(self.pdf)
+        other = FileTracker(self.db, model_id="model", fingerprint="f2")
+        self.addCleanup(other.close)
+        self.assertFalse(other.is_processed(self.pdf))
+        self.write("a.pdf", b"%PDF second version")
+        self.assertFalse(self.tracker().is_processed(self.pdf))
+
+    def test_unreadable_entries_are_unprocessed(self):
+        folder = os.path.join(self.tmp.name, "folder.pdf")
+        os.mkdir(folder)
+        tracker = self.tracker()
+        self.assertFalse(tracker.is_processed(folder))
+        self.assertFalse(tracker.is_processed(os.path.join(self.tmp.name, "gone.pdf")))
+        self.assertFalse(tracker.is_processed(self.pdf))
+
+    def test_legacy_log_is_imported(self):
+        log = self.write("processed_pdfs.txt", b"a.pdf\n")
+        self.assertTrue(self.tracker(legacy_log=log).is_processed(self.pdf))
+        self.assertFalse(self.tracker().is_processed(self.write("c.pdf", b"new")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+# test_inference_pool.py
+import os
+import unittest
+from test_summariser import FakeSummariser
+
+
+class PidSummariser(FakeSummariser):
+    """Tags each summary with the process that generated it."""
+
+    def generate_batch(self, texts, budgets, token_ids=None):
+        return [f"{text.upper()}|{os.getpid()}" for text in texts]
+
+
+class TestInferencePool(unittest.TestCase):
+    def setUp(self):
+        self.chunks = [" ".join(["word"] * n) + f" {n}" for n in range(1, 40)]
+        self.summariser = PidSummariser("fake", batch_size=2, max_batch_tokens=64)
+        self.summariser.start_pool(2, threads=1, pin=False)
+
+    def tearDown(self):
+        self.summariser.close_pool()
+
+    def test_pool_matches_in_process_results(self):
+        summaries = self.summariser.summarise_batch(self.chunks, 0.25, 0.45)
+        texts = [summary.split("|")[0] for summary in summaries]
+        self.assertEqual(texts, [chunk.upper() for chunk in self.chunks])
+        pids = {summary.split("|")[1] for summary in summaries}
+        worker_pids = {str(process.pid) for process in self.summariser.pool.processes}
+        self.assertEqual(pids, worker_pids)
+
+    def test_dead_worker_is_reported(self):
+        self.summariser.pool.processes[0].kill()
+        self.summariser.pool.processes[0].join()
+        with self.assertRaises(RuntimeError):
+            self.summariser.summarise_batch(self.chunks, 0.25, 0.45)
+
+
+if __name__ == "__main__":
+    unittest.main()
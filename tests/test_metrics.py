@@ -0,0 +1,91 @@
+# test_metrics.py
+import os
+import sys
+import json
+import pstats
+import tempfile
+import threading
+import contextvars
+import unittest
+from src.max_agent import metrics
+from src.max_agent.metrics import MetricsWriter, Report
+
+
+class TestMetrics(unittest.TestCase):
+    def test_no_report_is_noop(self):
+        self.assertIsNone(metrics.current())
+        with metrics.span("extract"):
+            metrics.count("pages", 3)
+
+    def test_spans_and_counters(self):
+        report = Report(["a.pdf"])
+        with metrics.recording(report):
+            with metrics.span("extract"):
+                pass
+            with metrics.span("extract"):
+                pass
+            metrics.count("pages", 2)
+            pages = list(metrics.timed(range(3), "clean", "lines"))
+        self.assertIsNone(metrics.current())
+        self.assertEqual(pages, [0, 1, 2])
+        self.assertEqual(report.spans["extract"][1], 2)
+        self.assertEqual(report.spans["clean"][1], 4)
+        self.assertEqual(report.counters, {"pages": 2, "lines": 3})
+
+    def test_copied_context_records_from_thread(self):
+        report = Report(["a.pdf"])
+        with metrics.recording(report):
+            context = contextvars.copy_context()
+        thread = threading.Thread(target=context.run, args=(metrics.count, "batches"))
+        thread.start()
+        thread.join()
+        self.assertEqual(report.counters, {"batches": 1})
+
+    def test_merge_snapshot(self):
+        worker, group = Report(), Report(["a.pdf", "b.pdf"])
+        worker.add_span("extract", 1.5)
+        worker.count("pages", 4)
+        group.add_span("extract", 0.5)
+        group.merge(worker.snapshot())
+        self.assertEqual(group.spans["extract"], (2.0, 2))
+        self.assertEqual(group.as_dict()["pages_per_second"], 2.0)
+
+    def test_writer_outputs(self):
+        report = Report(["in/a.pdf", "in/b.pdf"])
+        report.add_span("summarise", 0.25)
+        report.count("model_chunks", 2)
+        report.count("model_seconds", 0.2)
+        with tempfile.TemporaryDirectory() as tmp:
+            MetricsWriter(tmp).write(report)
+            self.assertEqual(
+                sorted(os.listdir(tmp)), ["a.json", "b.json", "max_agent.prom"]
+            )
+            with open(os.path.join(tmp, "a.json")) as f:
+                data = json.load(f)
+            self.assertEqual(data["documents"], ["in/a.pdf", "in/b.pdf"])
+            self.assertAlmostEqual(data["model_seconds_per_chunk"], 0.1)
+            with open(os.path.join(tmp, "max_agent.prom")) as f:
+                prom = f.read()
+            self.assertIn("max_agent_documents_total 2", prom)
+            self.assertIn('max_agent_stage_seconds_total{stage="summarise"}', prom)
+
+    def test_profiled_threads_keep_running(self):
+        results = []
+
+        def work():
+            results.append(sum(range(1000)))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "run.prof")
+            with metrics.profiled(path, top=1):
+                thread = threading.Thread(target=work)
+                thread.start()
+                thread.join()
+            self.assertEqual(results, [499500])
+            functions = {name for _, _, name in pstats.Stats(path).stats}
+            if sys.version_info < (3, 12):
+                self.assertIn("work", functions)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+# test_near_duplicates.py
+import os
+import random
+import tempfile
+import unittest
+from src.max_agent.near_duplicates import NearDuplicateIndex
+from test_summariser import FakeSummariser
+
+
+def paragraph(seed, words=200):
+    rng = random.Random(seed)
+    return " ".join(f"word{rng.randrange(5000)}" for _ in range(words))
+
+
+class TestNearDuplicateIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "near.sqlite3")
+        self.index = NearDuplicateIndex(self.path)
+        self.text = paragraph(1)
+        self.index.add_many([(self.text, "summary one")], "scope")
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp.cleanup()
+
+    def test_finds_near_duplicate_only(self):
+        revised = "Page 12 " + self.text.replace("  ", " ") + " Page 12"
+        self.assertEqual(self.index.lookup(revised, "scope"), "summary one")
+        self.assertIsNone(self.index.lookup(paragraph(2), "scope"))
+        self.assertIsNone(self.index.lookup(revised, "other scope"))
+        self.assertEqual((self.index.lookups, self.index.reused), (3, 1))
+
+    def test_index_persists(self):
+        reopened = NearDuplicateIndex(self.path)
+        self.assertEqual(reopened.lookup(self.text, "scope"), "summary one")
+        reopened.close()
+
+    def test_summariser_reuses_near_duplicate_summaries(self):
+        summariser = FakeSummariser("fake", near_duplicates=self.index)
+        first = summariser.summarise_batch([paragraph(3)], 0.25, 0.45)
+        summariser.generated = []
+        second = summariser.summarise_batch([paragraph(3) + " 7"], 0.25, 0.45)
+        self.assertEqual(first, second)
+        self.assertEqual(summariser.generated, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+# test_page_cache.py
+import os
+import tempfile
+import unittest
+from unittest import mock
+from src.max_agent.page_cache import RawPageCache
+from src.max_agent.pdf_processor import PDFProcessor
+
+SAMPLE = "./pdfs/Share your app - Streamlit Docs.pdf"
+
+
+class TestRawPageCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "pages.sqlite3")
+        self.cache = RawPageCache(self.path)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def test_document_served_only_once_complete(self):
+        self.cache.put_page("hash", "params", 1, "first page")
+        self.assertFalse(self.cache.has_document("hash", "params"))
+        self.cache.put_page("hash", "params", 2, "second page")
+        self.cache.finish_document("hash", "params", 2)
+        self.assertTrue(self.cache.has_document("hash", "params"))
+        self.assertFalse(self.cache.has_document("hash", "other params"))
+        self.assertEqual(
+            list(self.cache.iter_pages("hash", "params")),
+            [(1, "first page"), (2, "second page")],
+        )
+
+    def test_evicts_least_recently_used_documents(self):
+        text = os.urandom(4000).hex()
+        cache = RawPageCache(os.path.join(self.tmp.name, "small.sqlite3"), 12000)
+        for name in ("a", "b", "c"):
+            cache.put_page(name, "params", 1, text)
+            cache.finish_document(name, "params", 1)
+            if name == "b":
+                cache.has_document("a", "params")
+        self.assertTrue(cache.has_document("a", "params"))
+        self.assertFalse(cache.has_document("b", "params"))
+        self.assertTrue(cache.has_document("c", "params"))
+        cache.close()
+
+    def test_evicts_pages_of_unfinished_extractions(self):
+        text = os.urandom(4000).hex()
+        cache = RawPageCache(os.path.join(self.tmp.name, "small.sqlite3"), 12000)
+        # Pages of a killed extraction, and of one still running
+        cache.put_page("killed", "params", 1, text)
+        cache.start_document("running", "params")
+        cache.put_page("running", "params", 1, text)
+        cache.put_page("done", "params", 1, text)
+        cache.finish_document("done", "params", 1)
+        pages = cache.connection.execute(
+            "SELECT pdf_hash FROM pages ORDER BY pdf_hash"
+        ).fetchall()
+        self.assertEqual(pages, [("done",), ("running",)])
+        self.assertTrue(cache.has_document("done", "params"))
+        cache.close()
+
+    def test_abandoned_extraction_drops_its_pages(self):
+        processor = PDFProcessor(font_dir="./dejavu-sans/", page_cache=self.cache)
+        pages = processor.iter_raw_pages(SAMPLE)
+        next(pages)
+        pages.close()
+        (count,) = self.cache.connection.execute(
+            "SELECT COUNT(*) FROM pages"
+        ).fetchone()
+        self.assertEqual(count, 0)
+
+    def test_second_extraction_skips_pdf_parsing(self):
+        processor = PDFProcessor(font_dir="./dejavu-sans/", page_cache=self.cache)
+        expected = processor.extract_raw_text(SAMPLE)
+        with mock.patch("pdfplumber.open", side_effect=AssertionError):
+            self.assertEqual(processor.extract_raw_text(SAMPLE), expected)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_known_digest_is_not_recomputed(self):
+        stat = os.stat(SAMPLE)
+        processor = PDFProcessor(
+            font_dir="./dejavu-sans/",
+            page_cache=self.cache,
+            known_digests={SAMPLE: (stat.st_size, stat.st_mtime_ns, "known")},
+        )
+        with mock.patch(
+            "src.max_agent.file_tracker.file_digest", side_effect=AssertionError
+        ):
+            processor.extract_raw_text(SAMPLE)
+        self.assertTrue(self.cache.has_document("known", processor.extraction_params))
+
+
+if __name__ == "__main__":
+    unittest.main()
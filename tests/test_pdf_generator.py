@@ -0,0 +1,50 @@
+# test_pdf_generator.py
+import os
+import tempfile
+import unittest
+from src.max_agent.pdf_generator import CachedTTFontFile, PDFGenerator
+
+FONT_DIR = "./dejavu-sans/"
+
+
+class TestPDFGenerator(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.generator = PDFGenerator(FONT_DIR)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def render(self, name, text):
+        path = os.path.join(self.tmp.name, name)
+        self.generator.add_text(text)
+        self.generator.save_pdf(path)
+        return path
+
+    def test_each_save_starts_a_new_document(self):
+        text = "A summary sentence with several words in it. " * 40
+        first = os.path.getsize(self.render("first.pdf", text))
+        for i in range(3):
+            self.render(f"more-{i}.pdf", text)
+        last = os.path.getsize(self.render("last.pdf", text))
+        # Only the creation date may differ
+        self.assertLess(abs(last - first), 16)
+        self.assertEqual(self.generator.pdf.page, 1)
+
+    def test_sanitise_keeps_lines_and_base_letters(self):
+        text = "Café résumé\n\n\nx = y\t+ 1\n"
+        self.assertEqual(self.generator.sanitise(text), "Cafe resume\nx = y+ 1")
+
+    def test_sanitise_replaces_private_use_glyphs(self):
+        text = "\ue000 Icon \uf8ff and \u2603"
+        self.assertEqual(self.generator.sanitise(text), "# Icon # and")
+
+    def test_font_subsets_are_reused(self):
+        self.render("first.pdf", "Reused subset text.")
+        cached = len(CachedTTFontFile.subsets)
+        self.render("second.pdf", "Reused subset text.")
+        self.assertEqual(len(CachedTTFontFile.subsets), cached)
+
+
+if __name__ == "__main__":
+    unittest.main()
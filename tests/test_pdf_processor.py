@@ -1,20 +1,57 @@
 # test_pdf_processor.py
+import threading
 import unittest
 from src.max_agent.pdf_processor import PDFProcessor
+from src.max_agent.process_pools import pool_context
+
 
 class TestPDFProcessor(unittest.TestCase):
     def setUp(self):
-        self.processor = PDFProcessor(font_dir="./dejavu-sans/", cleaned_text_dir="./cleaned_texts/")
-    
+        self.processor = PDFProcessor(
+            font_dir="./dejavu-sans/", cleaned_text_dir="./cleaned_texts/"
+        )
+
     def test_extract_raw_text(self):
         pdf_path = "./pdfs/Share your app - Streamlit Docs.pdf"
         text = self.processor.extract_raw_text(pdf_path)
         self.assertIsInstance(text, list)
-    
+
+    def test_parallel_extraction_matches_serial(self):
+        pdf_path = "./pdfs/Share your app - Streamlit Docs.pdf"
+        parallel = PDFProcessor(font_dir="./dejavu-sans/", extraction_workers=2)
+        self.addCleanup(parallel.close)
+        self.assertEqual(
+            parallel.extract_raw_text(pdf_path),
+            self.processor.extract_raw_text(pdf_path),
+        )
+        # Later documents reuse the same extraction processes
+        executor = parallel.executor
+        parallel.extract_raw_text(pdf_path)
+        self.assertIs(parallel.executor, executor)
+
+    def test_pools_are_not_forked_from_a_threaded_process(self):
+        self.assertNotEqual(pool_context(forkable=False).get_start_method(), "fork")
+        release = threading.Event()
+        thread = threading.Thread(target=release.wait)
+        thread.start()
+        try:
+            self.assertNotEqual(pool_context().get_start_method(), "fork")
+        finally:
+            release.set()
+            thread.join()
+
     def test_separate_glued_words(self):
         text = "ThisIsATest123ExampleHopeitworksforyou"
         cleaned = self.processor.separate_glued_words(text)
         self.assertEqual(cleaned, "This Is A Test 123 Example Hope it works for you")
 
-if __name__ == '__main__':
+    def test_glued_word_segmentation_is_memoised(self):
+        text = "ProductName ships ProductName. See productname docs."
+        first = self.processor.separate_glued_words(text)
+        hits = self.processor.segmenter.cache_info().hits
+        self.assertEqual(self.processor.separate_glued_words(text), first)
+        self.assertGreater(self.processor.segmenter.cache_info().hits, hits)
+
+
+if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,182 @@
+# test_pipeline.py
+import os
+import json
+import tempfile
+import threading
+import unittest
+from functools import cached_property
+from fpdf import FPDF
+from src.max_agent.pdf_summariser_app import PDFSummariserApp
+from src.max_agent.pipeline import DocumentPipeline
+from test_summariser import FakeSummariser
+
+FONT_DIR = os.path.abspath("./dejavu-sans/")
+
+
+def make_pdf(path, topic, pages=2):
+    pdf = FPDF()
+    pdf.set_font("Arial", size=10)
+    for page in range(pages):
+        pdf.add_page()
+        for line in range(3):
+            pdf.cell(
+                0, 6, f"The {topic} report covers page {page} line {line}.", ln=True
+            )
+    pdf.output(path)
+
+
+class FakeApp(PDFSummariserApp):
+    """The app with the model replaced by the fake summariser."""
+
+    fail_on = None
+
+    @cached_property
+    def summariser(self):
+        self.threads_at_load = threading.active_count()
+        return FakeSummariser("fake", batch_size=4, max_batch_tokens=256)
+
+    def write_summary(self, pdf_filename, final_summary, output_pdf_path):
+        if pdf_filename == self.fail_on:
+            raise OSError("disk full")
+        self.written.append((pdf_filename, final_summary))
+        super().write_summary(pdf_filename, final_summary, output_pdf_path)
+
+
+class TestDocumentPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.topics = ["alpha", "beta", "gamma", "delta", "epsilon"]
+        os.makedirs(self.path("pdfs"))
+        for topic in self.topics:
+            make_pdf(self.path("pdfs", f"{topic}.pdf"), topic)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, *parts):
+        return os.path.join(self.tmp.name, *parts)
+
+    def make_app(self, workers, **settings):
+        config_file = self.path("config.yaml")
+        with open(config_file, "w") as f:
+            json.dump(
+                {
+                    "input_directory": self.path("pdfs"),
+                    "output_directory": self.path("out"),
+                    "cleaned_text_directory": self.path("cleaned"),
+                    "font_directory": FONT_DIR,
+                    "processed_files_db": self.path("processed.sqlite3"),
+                    "processed_files_log": self.path("processed.txt"),
+                    "log_file": self.path("test.log"),
+                    "max_tokens": 64,
+                    "raw_page_cache_path": None,
+                    "summary_cache_path": None,
+                    "checkpoint_directory": None,
+                    "chunk_store": False,
+                    "metrics_directory": self.path("metrics"),
+                    "workers": workers,
+                    "queue_size": 2,
+                    **settings,
+                },
+                f,
+            )
+        app = FakeApp(config_file)
+        app.written = []
+        return app
+
+    def assert_processed(self, app, topics):
+        for topic in topics:
+            pdf_path = self.path("pdfs", f"{topic}.pdf")
+            self.assertTrue(app.file_tracker.is_processed(pdf_path), topic)
+            self.assertTrue(os.path.exists(self.path("out", f"{topic}_cond.pdf")))
+
+    def test_pipeline_writes_every_document_in_order(self):
+        app = self.make_app(workers=2)
+        pdf_filenames = [f"{topic}.pdf" for topic in self.topics]
+        app.process_pdfs(pdf_filenames)
+        self.assertEqual([name for name, _ in app.written], pdf_filenames)
+        for topic, (_, summary) in zip(self.topics, app.written):
+            self.assertIn(f"THE {topic.upper()} REPORT", summary)
+        self.assert_processed(app, self.topics)
+        # Each group's report is written once its last document is written
+        for topic in self.topics:
+            with open(self.path("metrics", f"{topic}.json")) as f:
+                report = json.load(f)
+            self.assertIn(f"{topic}.pdf", report["documents"])
+            self.assertIn("first_tier", report["stages"])
+
+    def test_workers_are_not_forked_after_the_model_loads(self):
+        app = self.make_app(workers=2)
+        # As in watch mode, where the model is loaded up front
+        app.summariser
+        pipeline = DocumentPipeline(app, workers=2)
+        self.assertNotEqual(pipeline._pool_context().get_start_method(), "fork")
+        pipeline.run([f"{topic}.pdf" for topic in self.topics])
+        self.assert_processed(app, self.topics)
+
+    def test_model_loads_before_the_extraction_pool_starts(self):
+        app = self.make_app(workers=2, inference_workers=2)
+        DocumentPipeline(app, workers=2).run([f"{topic}.pdf" for topic in self.topics])
+        # The real app forks its inference workers when the model loads
+        self.assertEqual(app.threads_at_load, 1)
+        self.assert_processed(app, self.topics)
+
+    def test_failed_write_does_not_stop_the_pipeline(self):
+        app = self.make_app(workers=2)
+        app.fail_on = "beta.pdf"
+        app.process_pdfs([f"{topic}.pdf" for topic in self.topics])
+        self.assertEqual(len(app.written), len(self.topics) - 1)
+        self.assertFalse(app.file_tracker.is_processed(self.path("pdfs", "beta.pdf")))
+        self.assert_processed(app, [t for t in self.topics if t != "beta"])
+
+    def test_summarisation_error_stops_the_pipeline(self):
+        app = self.make_app(workers=2)
+
+        def fail(*args, **kwargs):
+            raise RuntimeError("model crashed")
+
+        app.summarise_texts = fail
+        with self.assertRaises(RuntimeError):
+            app.process_pdfs([f"{topic}.pdf" for topic in self.topics])
+        self.assertEqual(app.written, [])
+
+    def test_watch_skips_entries_that_cannot_be_summarised(self):
+        os.mkdir(self.path("pdfs", "folder.pdf"))
+        app = self.make_app(
+            workers=1,
+            watch_polling=True,
+            watch_settle_seconds=0.1,
+            watch_poll_interval=0.05,
+        )
+        self.assertEqual(
+            sorted(app.unprocessed(["folder.pdf", "missing.pdf", "alpha.pdf"])),
+            ["alpha.pdf"],
+        )
+        process_arrivals = app.process_arrivals
+
+        def process_then_stop(pdf_filenames):
+            process_arrivals(pdf_filenames)
+            app.stopping.set()
+
+        app.process_arrivals = process_then_stop
+        app.watch()
+        self.assert_processed(app, self.topics)
+
+    def test_idle_session_does_not_build_the_processor(self):
+        app = self.make_app(workers=1)
+        app.log_stats()
+        self.assertNotIn("pdf_processor", app.__dict__)
+
+    def test_run_processes_new_pdfs_one_by_one(self):
+        app = self.make_app(workers=1)
+        app.run()
+        self.assertEqual(
+            sorted(name for name, _ in app.written),
+            sorted(f"{topic}.pdf" for topic in self.topics),
+        )
+        self.assert_processed(app, self.topics)
+        self.assertEqual(app.new_pdfs(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+# test_service.py
+import json
+import asyncio
+import threading
+import unittest
+from types import SimpleNamespace
+from src.max_agent.micro_batcher import MicroBatcher
+from src.max_agent.service import SummaryService
+from test_summariser import FakeSummariser
+
+
+class FakeApp:
+    def __init__(self, summariser):
+        self.summariser = summariser
+        self.config = SimpleNamespace(
+            first_min_ratio=0.25,
+            first_max_ratio=0.45,
+            second_min_ratio=0.6,
+            second_max_ratio=0.8,
+        )
+
+    def bin_text(self, text):
+        return [sentence.strip() for sentence in text.split(".") if sentence.strip()]
+
+    def reintegrate_code_equations(self, summary, code_blocks, equations):
+        return summary
+
+
+def job(text):
+    return ([text], [(1, 10)], None, 1, 0, len(text.split()))
+
+
+class TestMicroBatcher(unittest.TestCase):
+    def setUp(self):
+        self.summariser = FakeSummariser("fake", batch_size=8, max_batch_tokens=64)
+        self.summariser.delay = 0.05
+        self.batcher = MicroBatcher(self.summariser, max_wait=0.3)
+
+    def tearDown(self):
+        self.batcher.close()
+
+    def test_concurrent_jobs_share_a_batch(self):
+        results = {}
+
+        def request(name):
+            results[name] = list(self.batcher.run([job(f"text of {name}")]))
+
+        threads = [threading.Thread(target=request, args=(n,)) for n in "abcd"]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.summariser.generated), 1)
+        self.assertEqual(len(self.summariser.generated[0]), 4)
+        for name in "abcd":
+            self.assertEqual(results[name][0][:2], (0, [f"TEXT OF {name.upper()}"]))
+
+    def test_merged_batches_respect_limits(self):
+        self.batcher.max_batch_tokens = 6
+        jobs = [job("one two three"), job("four five six"), job("seven")]
+        results = sorted(self.batcher.run(jobs))
+        self.assertEqual([index for index, _, _ in results], [0, 1, 2])
+        self.assertEqual([len(batch) for batch in self.summariser.generated], [2, 1])
+
+
+class TestSummaryService(unittest.TestCase):
+    def setUp(self):
+        self.summariser = FakeSummariser("fake", batch_size=8, max_batch_tokens=512)
+        self.summariser.delay = 0.05
+        self.service = SummaryService(FakeApp(self.summariser), port=0, max_wait=0.1)
+        self.service.start_batcher()
+        self.loop = asyncio.new_event_loop()
+        self.stop = asyncio.Event()
+        self.started = threading.Event()
+
+        async def serve():
+            task = asyncio.ensure_future(self.service.serve(self.stop))
+            while self.service.server is None:
+                await asyncio.sleep(0.01)
+            self.started.set()
+            await task
+
+        self.thread = threading.Thread(
+            target=self.loop.run_until_complete, args=(serve(),)
+        )
+        self.thread.start()
+        self.started.wait(5)
+
+    def tearDown(self):
+        self.loop.call_soon_threadsafe(self.stop.set)
+        self.thread.join()
+        self.loop.close()
+        self.service.executor.shutdown()
+        self.summariser.close_pool()
+
+    async def post(self, body):
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.service.port)
+        writer.write(
+            b"POST /summarise HTTP/1.1\r\nHost: localhost\r\n"
+            b"Content-Type: text/plain\r\nContent-Length: %d\r\n\r\n%s"
+            % (len(body), body)
+        )
+        response = await reader.read()
+        writer.close()
+        head, _, chunked = response.partition(b"\r\n\r\n")
+        events = []
+        while chunked:
+            size, _, rest = chunked.partition(b"\r\n")
+            size = int(size, 16)
+            if not size:
+                break
+            events.append(json.loads(rest[:size]))
+            chunked = rest[size + 2 :]
+        return head, events
+
+    def test_streams_chunk_summaries_and_summary(self):
+        head, events = asyncio.run(self.post(b"First part. Second part. Third part."))
+        self.assertTrue(head.startswith(b"HTTP/1.1 200"))
+        self.assertEqual(events[0], {"event": "chunks", "count": 3})
+        self.assertEqual(
+            [(e["index"], e["summary"]) for e in events[1:4]],
+            [(0, "FIRST PART"), (1, "SECOND PART"), (2, "THIRD PART")],
+        )
+        self.assertEqual(events[-1]["summary"], "FIRST PART SECOND PART THIRD PART")
+
+    def test_concurrent_requests_share_batches(self):
+        async def requests():
+            return await asyncio.gather(
+                *(self.post(f"Request {i} text.".encode()) for i in range(4))
+            )
+
+        responses = asyncio.run(requests())
+        summaries = [events[-1]["summary"] for _, events in responses]
+        self.assertEqual(summaries, [f"REQUEST {i} TEXT" for i in range(4)])
+        self.assertLess(len(self.summariser.generated), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,23 @@
+# test_startup.py
+import subprocess
+import sys
+import unittest
+
+
+class TestStartup(unittest.TestCase):
+    def test_package_import_does_not_load_torch(self):
+        code = (
+            "import sys\n"
+            "import src.max_agent as max_agent\n"
+            "from src.max_agent import cli, pdf_summariser_app\n"
+            "max_agent.Config\n"
+            "print('torch' in sys.modules or 'transformers' in sys.modules)\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        self.assertEqual(result.stdout.strip(), "False")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+# test_streaming_memory.py
+import gc
+import os
+import tempfile
+import tracemalloc
+import unittest
+from unittest import mock
+from fpdf import FPDF
+from src.max_agent.chunker import TokenChunker
+from src.max_agent.pdf_processor import PDFProcessor
+from test_chunker import WhitespaceTokenizer
+
+
+def make_pdf(path, pages, lines_per_page=4, extra_lines=()):
+    pdf = FPDF()
+    pdf.set_font("Arial", size=10)
+    for page in range(pages):
+        pdf.add_page()
+        for line in range(lines_per_page):
+            pdf.cell(
+                0,
+                6,
+                f"Page {page} line {line}: "
+                "The quick brown fox jumps over the lazy dog.",
+                ln=True,
+            )
+        for line in extra_lines:
+            pdf.cell(0, 6, line.format(page=page), ln=True)
+    pdf.output(path)
+
+
+class TestStreamingMemory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.processor = PDFProcessor(font_dir="./dejavu-sans/")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def traced_peak(self, function, arg):
+        gc.collect()
+        tracemalloc.start()
+        try:
+            result = function(arg)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return result, peak
+
+    def extract(self, path):
+        return sum(1 for _ in self.processor.iter_raw_pages(path))
+
+    def clean_and_chunk(self, pages):
+        def iter_raw_pages(path):
+            # Extraction has its own test, so the pages are made up here
+            for page_num in range(1, pages + 1):
+                yield page_num, "\n".join(
+                    f"Page {page_num} line {line}: "
+                    "The quick brown fox jumps over the lazy dog."
+                    for line in range(40)
+                )
+
+        chunker = TokenChunker(WhitespaceTokenizer(), max_tokens=64)
+        with mock.patch.object(self.processor, "iter_raw_pages", iter_raw_pages):
+            pieces = self.processor.iter_cleaned_text("synthetic.pdf", [], [])
+            return sum(1 for _ in chunker.iter_chunks(pieces))
+
+    def peak_memory(self, pages):
+        path = os.path.join(self.tmp.name, f"synthetic_{pages}.pdf")
+        make_pdf(path, pages)
+        count, peak = self.traced_peak(self.extract, path)
+        self.assertEqual(count, pages)
+        return peak
+
+    def test_peak_memory_does_not_grow_with_page_count(self):
+        small = self.peak_memory(10)
+        large = self.peak_memory(60)
+        # Holding every page's layout objects would make this ~6x larger
+        self.assertLess(large, 2 * small)
+
+    def test_cleaning_and_chunking_memory_does_not_grow(self):
+        # Loads the segmentation corpora outside the measurements
+        self.clean_and_chunk(1)
+        small_chunks, small = self.traced_peak(self.clean_and_chunk, 20)
+        large_chunks, large = self.traced_peak(self.clean_and_chunk, 200)
+        self.assertEqual(large_chunks, 10 * small_chunks)
+        # Joining the cleaned text or keeping the chunks would make this
+        # ~10x larger
+        self.assertLess(large, 2 * small)
+
+    def test_streamed_text_matches_process_pdf(self):
+        path = os.path.join(self.tmp.name, "code_and_equations.pdf")
+        make_pdf(
+            path,
+            5,
+            extra_lines=[
+                "See <code>print({page})</code> for the output.",
+                "It follows from $E = mc^{page}$ directly.",
+            ],
+        )
+        code_blocks = []
+        equations = []
+        streamed = "".join(
+            self.processor.iter_cleaned_text(path, code_blocks, equations)
+        )
+        expected = self.processor.process_pdf(path, save_cleaned=False)
+        self.assertEqual((streamed, code_blocks, equations), expected)
+        self.assertEqual(len(code_blocks), 5)
+        self.assertEqual(len(equations), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,197 @@
+# test_summariser.py
+import os
+import time
+import tempfile
+import unittest
+from src.max_agent.summariser import Summariser
+from src.max_agent.summary_cache import SummaryCache
+
+
+class FakeTokenizer:
+    """Whitespace tokenizer with two special tokens per input."""
+
+    model_max_length = 1024
+
+    def __call__(self, text, add_special_tokens=True, **kwargs):
+        if isinstance(text, str):
+            return {"input_ids": text.split()}
+        return {"input_ids": [item.split() for item in text]}
+
+    def num_special_tokens_to_add(self):
+        return 2
+
+    def decode(self, ids):
+        return " ".join(ids)
+
+
+class FakeSummariser(Summariser):
+    """
+    Summariser with the model replaced by a deterministic stand-in.
+
+    Every generate call takes ``delay`` seconds, for tests that need batches
+    to overlap.
+    """
+
+    delay = 0.0
+
+    def load_model(self):
+        self.tokenizer = FakeTokenizer()
+        self.generated = []
+
+    def count_tokens(self, text):
+        return len(text.split()) + 2
+
+    def count_tokens_many(self, texts):
+        return [self.count_tokens(text) for text in texts]
+
+    def generate_batch(self, texts, budgets, token_ids=None):
+        self.generated.append(list(texts))
+        if self.delay:
+            time.sleep(self.delay)
+        return [text.upper() for text in texts]
+
+
+class ShrinkingSummariser(FakeSummariser):
+    """Keeps the first words of each input, up to its max length."""
+
+    def summarise_batch(self, chunks, *args, **kwargs):
+        self.levels.append(len(chunks))
+        return super().summarise_batch(chunks, *args, **kwargs)
+
+    def generate_batch(self, texts, budgets, token_ids=None):
+        self.generated.append(list(texts))
+        for text in texts:
+            # Inputs must fit the model window
+            assert self.count_tokens(text) <= self.tokenizer.model_max_length
+        return [
+            " ".join(text.split()[: max_length - 2])
+            for text, (_, max_length) in zip(texts, budgets)
+        ]
+
+
+class WindowedSummariser(FakeSummariser):
+    """Fails like BART when asked to generate past its position window."""
+
+    def generate_batch(self, texts, budgets, token_ids=None):
+        self.generated.append(list(texts))
+        if max(max_length for _, max_length in budgets) > 1024:
+            raise IndexError("index out of range in self")
+        if any("bad" in text for text in texts):
+            raise RuntimeError("bad row")
+        return [text.upper() for text in texts]
+
+
+class TestSummariser(unittest.TestCase):
+    def setUp(self):
+        self.summariser = FakeSummariser("fake", batch_size=2, max_batch_tokens=64)
+        self.chunks = [" ".join(["word"] * n) + f" {n}" for n in (3, 9, 1, 7, 5, 2)]
+
+    def test_iter_summaries_yields_in_chunk_order(self):
+        results = list(self.summariser.iter_summaries(self.chunks, 0.25, 0.45))
+        self.assertEqual([index for index, _ in results], list(range(6)))
+        self.assertEqual(
+            [summary for _, summary in results],
+            [chunk.upper() for chunk in self.chunks],
+        )
+        # Batches were length sorted, so generation order differs
+        generated = [text for batch in self.summariser.generated for text in batch]
+        self.assertNotEqual(generated, self.chunks)
+
+    def test_summarise_chunks_parallel_accepts_max_workers(self):
+        self.assertEqual(
+            self.summariser.summarise_chunks_parallel(
+                self.chunks, 0.25, 0.45, max_workers=3
+            ),
+            [chunk.upper() for chunk in self.chunks],
+        )
+
+    def test_summarise_is_deterministic(self):
+        first = self.summariser.summarise(self.chunks, 0.25, 0.45, 0.6, 0.8)
+        second = self.summariser.summarise(self.chunks, 0.25, 0.45, 0.6, 0.8)
+        self.assertEqual(first, second)
+        self.assertEqual(first, " ".join(chunk.upper() for chunk in self.chunks))
+
+    def test_summarise_documents_keeps_documents_apart(self):
+        summaries = self.summariser.summarise_documents(
+            [self.chunks[:2], [], self.chunks[2:]], 0.25, 0.45, 0.6, 0.8
+        )
+        self.assertEqual(len(summaries), 3)
+        self.assertEqual(summaries[1], "")
+        self.assertEqual(summaries[0], " ".join(c.upper() for c in self.chunks[:2]))
+
+    def test_cached_chunks_skip_inference(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = SummaryCache(os.path.join(tmp, "cache.sqlite3"))
+            self.summariser.cache = cache
+            first = self.summariser.summarise(self.chunks, 0.25, 0.45, 0.6, 0.8)
+            self.summariser.generated = []
+            second = self.summariser.summarise(self.chunks, 0.25, 0.45, 0.6, 0.8)
+            self.assertEqual(first, second)
+            self.assertEqual(self.summariser.generated, [])
+            cache.close()
+
+
+class TestFailingRows(unittest.TestCase):
+    def setUp(self):
+        self.summariser = WindowedSummariser("fake")
+
+    def test_oversized_row_budget_is_clamped(self):
+        chunks = [" ".join(["word"] * n) for n in (538, 2814, 538)]
+        summaries = self.summariser.summarise_batch(
+            chunks, 0.25, 0.45, retries=1, delay=0
+        )
+        self.assertTrue(all(summaries))
+
+    def test_failed_batch_is_retried_row_by_row(self):
+        chunks = ["good one", "bad one", "good two"]
+        summaries = self.summariser.summarise_batch(
+            chunks, 0.25, 0.45, retries=1, delay=0
+        )
+        self.assertEqual(summaries, ["GOOD ONE", "", "GOOD TWO"])
+        self.assertEqual(len(self.summariser.generated), 4)
+
+
+class TestReduceTree(unittest.TestCase):
+    def setUp(self):
+        self.summariser = ShrinkingSummariser("fake", reduce_fan_in=3)
+        self.summariser.levels = []
+        self.summariser.tokenizer.model_max_length = 40
+        self.partials = [" ".join(f"w{i}" for i in range(30))] * 12
+
+    def test_reduces_until_target_without_truncation(self):
+        summary = self.summariser.reduce([self.partials, ["short"]], 0.3, 0.5)
+        self.assertLessEqual(self.summariser.count_tokens(summary[0]), 40)
+        self.assertEqual(summary[1], "short")
+        # Several levels, each with fewer inputs than the last
+        levels = self.summariser.levels
+        self.assertGreater(len(levels), 1)
+        self.assertEqual(levels, sorted(levels, reverse=True))
+
+    def test_oversized_first_tier_chunk_is_split(self):
+        chunk = " ".join(f"w{i}" for i in range(100))
+        summaries = self.summariser.summarise_batch(
+            [chunk, "a b c d e f g h i j"], 0.3, 0.5
+        )
+        # 100 words go through the 40 token window in pieces of 38, 38, 24
+        self.assertEqual(
+            sorted(len(text.split()) for text in self.summariser.generated[0]),
+            [10, 24, 38, 38],
+        )
+        self.assertTrue(summaries[0].startswith("w0 "))
+        self.assertIn("w38", summaries[0])
+        self.assertIn("w76", summaries[0])
+        self.assertEqual(summaries[1], "a b c d")
+
+    def test_groups_respect_fan_in_and_window(self):
+        groups = self.summariser.group_partials(["a b c"] * 10, window=40)
+        self.assertEqual([chunk.text.count("a") for chunk in groups], [3, 3, 3, 1])
+        self.assertTrue(all(chunk.token_count <= 40 for chunk in groups))
+
+    def test_level_ratios(self):
+        self.summariser.reduce_level_ratios = [(0.1, 0.2), (0.3, 0.4)]
+        self.assertEqual(self.summariser.level_ratios(1, 0.6, 0.8), (0.1, 0.2))
+        self.assertEqual(self.summariser.level_ratios(5, 0.6, 0.8), (0.3, 0.4))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+# test_summary_cache.py
+import os
+import sqlite3
+import tempfile
+import unittest
+from src.max_agent.summary_cache import SummaryCache
+
+
+class TestSummaryCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_key_covers_budget_and_model(self):
+        key = SummaryCache.make_key("text", "model", 10, 20, False)
+        self.assertNotEqual(key, SummaryCache.make_key("text", "model", 10, 21, False))
+        self.assertNotEqual(key, SummaryCache.make_key("text", "other", 10, 20, False))
+        self.assertNotEqual(key, SummaryCache.make_key("text", "model", 10, 20, True))
+        self.assertEqual(key, SummaryCache.make_key("text", "model", 10, 20, False))
+
+    def test_round_trip_and_counters(self):
+        cache = SummaryCache(self.path)
+        cache.put("a", "summary a")
+        self.assertEqual(cache.get("a"), "summary a")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        cache.close()
+
+        # Entries survive reopening
+        cache = SummaryCache(self.path)
+        self.assertEqual(cache.get_many(["a", "b"]), {"a": "summary a"})
+        cache.close()
+
+    def test_lru_eviction(self):
+        cache = SummaryCache(self.path, max_bytes=100)
+        cache.put("old", "x" * 40)
+        cache.put("recent", "y" * 40)
+        cache.get("old")
+        cache.put("new", "z" * 40)
+        self.assertIsNone(cache.get("recent"))
+        self.assertIsNotNone(cache.get("old"))
+        self.assertIsNotNone(cache.get("new"))
+        cache.close()
+
+    def test_failed_access_update_is_rolled_back(self):
+        cache = SummaryCache(self.path)
+        cache.put("a", "summary a")
+        connection = cache.connection
+
+        class FailingUpdates:
+            def __getattr__(self, name):
+                return getattr(connection, name)
+
+            def executemany(self, *args):
+                raise sqlite3.OperationalError("disk I/O error")
+
+        cache.connection = FailingUpdates()
+        with self.assertRaises(sqlite3.OperationalError):
+            cache.get("a")
+        cache.connection = connection
+        self.assertFalse(connection.in_transaction)
+        cache.put("b", "summary b")
+        self.assertEqual(cache.get("b"), "summary b")
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
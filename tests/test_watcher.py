@@ -0,0 +1,93 @@
+# test_watcher.py
+import os
+import time
+import tempfile
+import unittest
+from src.max_agent.watcher import DirectoryWatcher, InotifyChanges
+
+
+class TestDirectoryWatcher(unittest.TestCase):
+    polling = True
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.watcher = DirectoryWatcher(
+            self.tmp.name, settle_seconds=0.3, poll_interval=0.05, polling=self.polling
+        )
+
+    def tearDown(self):
+        self.watcher.close()
+        self.tmp.cleanup()
+
+    def write(self, name, data, mode="wb"):
+        with open(os.path.join(self.tmp.name, name), mode) as f:
+            f.write(data)
+
+    def collect(self, seconds):
+        ready = []
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            ready.extend(self.watcher.ready())
+        return ready
+
+    def test_reports_new_pdf_once_settled(self):
+        self.write("report.pdf", b"%PDF-1.4")
+        self.write("notes.txt", b"text")
+        self.write(".report.pdf.tmp1", b"partial")
+        self.assertEqual(self.collect(0.1), [])
+        self.assertEqual(self.collect(0.6), ["report.pdf"])
+        self.assertEqual(self.collect(0.2), [])
+
+    def test_waits_for_upload_in_progress(self):
+        self.write("upload.pdf", b"%PDF-1.4")
+        ready = []
+        for _ in range(6):
+            time.sleep(0.1)
+            self.write("upload.pdf", b" more", mode="ab")
+            ready.extend(self.watcher.ready())
+        self.assertEqual(ready, [])
+        self.assertEqual(self.collect(0.6), ["upload.pdf"])
+
+    def test_existing_files_wait_to_settle(self):
+        self.write("old.pdf", b"%PDF-1.4")
+        self.watcher.add(["old.pdf", "notes.txt"])
+        ready = []
+        for _ in range(4):
+            time.sleep(0.1)
+            self.write("old.pdf", b" more", mode="ab")
+            ready.extend(self.watcher.ready())
+        self.assertEqual(ready, [])
+        self.assertEqual(self.collect(0.6), ["old.pdf"])
+
+    def test_skips_entries_that_are_not_files(self):
+        os.mkdir(os.path.join(self.tmp.name, "folder.pdf"))
+        self.write("report.pdf", b"%PDF-1.4")
+        self.watcher.add(["folder.pdf"])
+        self.assertEqual(self.collect(0.6), ["report.pdf"])
+        self.assertEqual(self.watcher.pending, {})
+
+    def test_reports_changed_pdf_again(self):
+        self.write("report.pdf", b"%PDF-1.4")
+        self.assertEqual(self.collect(0.6), ["report.pdf"])
+        self.write("report.pdf", b"%PDF-1.5 changed")
+        self.assertEqual(self.collect(0.6), ["report.pdf"])
+
+
+def inotify_available():
+    try:
+        InotifyChanges(tempfile.gettempdir()).close()
+    except OSError:
+        return False
+    return True
+
+
+@unittest.skipUnless(inotify_available(), "inotify is not available")
+class TestInotifyDirectoryWatcher(TestDirectoryWatcher):
+    polling = False
+
+    def test_uses_inotify(self):
+        self.assertIsInstance(self.watcher.backend, InotifyChanges)
+
+
+if __name__ == "__main__":
+    unittest.main()